@@ -0,0 +1,46 @@
+"""
+Benchmark: acceso de equipos a la red por vértice vs por proyección sobre
+la arista más cercana (nodo virtual).
+
+Uso:
+    python -m benchmarks.bench_acceso_arista
+"""
+
+import random
+import time
+from benchmarks.bench_indice_espacial import generar_red_cuadricula
+
+
+def ejecutar(n: int, consultas: int = 2000, radio: float = 20.0) -> None:
+    # Cuadras de 200 m: la mayoría de los equipos queda lejos de un vértice
+    grafo = generar_red_cuadricula(n, espaciado=200.0)
+    extension = (n - 1) * 200.0
+    rnd = random.Random(42)
+    puntos = [
+        (rnd.uniform(0, extension), rnd.uniform(0, extension)) for _ in range(consultas)
+    ]
+
+    t0 = time.perf_counter()
+    grafo.find_nearest_access(puntos[0], max_radius=radio)  # Arma la rejilla
+    t_rejilla = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vertices = [grafo.find_nearest_node(p, max_radius=radio) for p in puntos]
+    t_vertice = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    accesos = [grafo.find_nearest_access(p, max_radius=radio) for p in puntos]
+    t_arista = time.perf_counter() - t0
+
+    con_vertice = sum(1 for nodo, _ in vertices if nodo is not None)
+    con_arista = sum(1 for acceso, _ in accesos if acceso is not None)
+    print(
+        f"nodos={len(grafo.nodes):>7} consultas={consultas} rejilla={t_rejilla:6.2f}s | "
+        f"vertice={t_vertice * 1000:7.1f}ms ({con_vertice} con acceso) "
+        f"arista={t_arista * 1000:7.1f}ms ({con_arista} con acceso)"
+    )
+
+
+if __name__ == "__main__":
+    for lado in (50, 100, 224):
+        ejecutar(lado)
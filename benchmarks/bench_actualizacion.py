@@ -0,0 +1,66 @@
+"""
+Benchmark: actualizar el grafo vial con unas pocas líneas editadas
+(NetworkGraph.sincronizar) vs reconstruirlo completo.
+
+Uso:
+    python -m benchmarks.bench_actualizacion
+"""
+
+import random
+import time
+from optimizer.acad_geometry import NetworkGraph
+from benchmarks.bench_noding import generar_calles
+
+
+def ejecutar(n: int, editadas: int = 10) -> None:
+    extension = (n ** 0.5) * 20
+    lineas = generar_calles(n, extension)
+    segmentos = [(format(i, "X"), p1, p2) for i, (p1, p2) in enumerate(lineas)]
+
+    t0 = time.perf_counter()
+    grafo = NetworkGraph(tolerance=0.1)
+    grafo.sincronizar(segmentos)
+    grafo.compilar()
+    t_construir = time.perf_counter() - t0
+
+    # Edición típica: se mueven, borran y agregan unas pocas líneas
+    rnd = random.Random(11)
+    editados = list(segmentos)
+    for i in rnd.sample(range(n), editadas):
+        h, (x1, y1), p2 = editados[i]
+        editados[i] = (h, (x1 + rnd.uniform(-3, 3), y1), p2)
+    for i in sorted(rnd.sample(range(n), editadas), reverse=True):
+        del editados[i]
+    nuevas = generar_calles(editadas, extension, semilla=13)
+    editados += [(f"N{i}", p1, p2) for i, (p1, p2) in enumerate(nuevas)]
+
+    t0 = time.perf_counter()
+    stats = grafo.sincronizar(editados)
+    t_actualizar = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    grafo.compilar()
+    t_compilar = time.perf_counter() - t0
+
+    # Deshacer la edición (la rejilla de líneas ya está armada)
+    t0 = time.perf_counter()
+    grafo.sincronizar(segmentos)
+    t_deshacer = time.perf_counter() - t0
+    grafo.sincronizar(editados)
+
+    completo = NetworkGraph(tolerance=0.1)
+    completo.sincronizar(editados)
+    iguales = (
+        len(completo.nodes) == len(grafo.nodes)
+        and completo.component_stats() == grafo.component_stats()
+    )
+    print(
+        f"lineas={n:>7} construir={t_construir:6.2f}s | "
+        f"actualizar={t_actualizar * 1000:6.1f}ms deshacer={t_deshacer * 1000:6.1f}ms "
+        f"(vecinas renodadas={stats['lineas_renodadas']}) "
+        f"recompilar={t_compilar:5.2f}s iguales={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for n in (5_000, 30_000, 100_000):
+        ejecutar(n)
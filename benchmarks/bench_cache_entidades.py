@@ -0,0 +1,66 @@
+"""
+Benchmark: tres botones seguidos sobre el mismo dibujo (inventario,
+análisis de FAT y asociación de hubs), con y sin la caché de entidades de
+la sesión, sobre el backend en memoria con latencia simulada. La corrida
+principal lee siempre del dibujo y no se incluye.
+
+Uso:
+    python -m benchmarks.bench_cache_entidades [n] [latencia_ms]
+"""
+
+import logging
+import os
+import sys
+import time
+from benchmarks.bench_flujo_completo import configurar, poblar
+from optimizer.acad_interface import usar_backend
+from optimizer.acad_memoria import AplicacionMemoria, BackendMemoria
+from optimizer.config_loader import load_config
+from optimizer.feedback_logger import logger
+from optimizer.tools import (
+    herramienta_analizar_fat,
+    herramienta_asociar_hubs,
+    herramienta_inventario_rapido,
+)
+
+
+def correr(n: int, latencia_ms: float, cache: bool) -> None:
+    ruta = configurar(cache_entidades=cache)
+    try:
+        load_config(ruta)
+        logger.setLevel(logging.WARNING)
+        app = AplicacionMemoria()
+        poblar(app, n)
+        msp = app.ActiveDocument.ModelSpace
+        app.latencia_ms = latencia_ms
+
+        anterior = usar_backend(BackendMemoria(app))
+        viajes = []
+        try:
+            t0 = time.perf_counter()
+            for boton in (
+                herramienta_inventario_rapido,
+                herramienta_analizar_fat,
+                herramienta_asociar_hubs,
+            ):
+                app.reiniciar_contador()
+                boton()
+                viajes.append(app.llamadas)
+            duracion = time.perf_counter() - t0
+        finally:
+            usar_backend(anterior)
+    finally:
+        os.remove(ruta)
+        load_config()
+
+    print(
+        f"entidades={msp.Count:>6} caché={'sí' if cache else 'no':<3} "
+        f"viajes por botón={viajes} total={sum(viajes):>6} t={duracion:6.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    for cache in (False, True):
+        correr(n, latencia, cache)
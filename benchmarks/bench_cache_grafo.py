@@ -0,0 +1,48 @@
+"""
+Benchmark: construir el grafo vial vs cargarlo desde la caché en disco.
+
+Uso:
+    python -m benchmarks.bench_cache_grafo
+"""
+
+import os
+import tempfile
+import time
+from optimizer.cache_grafo import cargar_grafo, guardar_grafo, huella_red
+from optimizer.acad_geometry import NetworkGraph
+from benchmarks.bench_noding import generar_calles
+
+
+def ejecutar(n: int) -> None:
+    lineas = generar_calles(n, (n ** 0.5) * 20)
+    segmentos = [(format(i, "X"), p1, p2) for i, (p1, p2) in enumerate(lineas)]
+
+    t0 = time.perf_counter()
+    huella = huella_red(segmentos, 0.1, True)
+    t_huella = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    grafo = NetworkGraph(tolerance=0.1)
+    stats = grafo.add_lines(lineas)
+    grafo.compilar()
+    t_construir = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "grafo.bin")
+        guardar_grafo(grafo, ruta, huella, stats)
+        tam = os.path.getsize(ruta)
+        t0 = time.perf_counter()
+        cargado, _ = cargar_grafo(ruta, huella)
+        t_cargar = time.perf_counter() - t0
+
+    iguales = cargado.compilar().huella() == grafo.compilar().huella()
+    print(
+        f"lineas={n:>7} nodos={len(grafo.nodes):>7} archivo={tam / 2**20:6.1f}MB | "
+        f"huella={t_huella * 1000:6.0f}ms construir={t_construir:6.2f}s "
+        f"cargar={t_cargar * 1000:7.0f}ms iguales={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for n in (5_000, 30_000, 100_000):
+        ejecutar(n)
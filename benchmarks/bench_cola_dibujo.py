@@ -0,0 +1,109 @@
+"""
+Benchmark: llamadas COM por tramo al dibujar resultados (etiqueta de tramo,
+etiqueta de reserva, ruta debug y cambio de capa), escribiendo cada entidad
+en el momento vs encolando y vaciando la cola al final. Usa un AutoCAD
+simulado donde cada propiedad leída o asignada cuenta como un viaje COM.
+
+Uso:
+    python -m benchmarks.bench_cola_dibujo
+"""
+
+import random
+import time
+from optimizer.acad_cola_dibujo import ColaDibujo
+from optimizer.acad_drawer import dibujar_debug_offset
+from optimizer.acad_labeler import insertar_etiqueta_reserva, insertar_etiqueta_tramo
+from optimizer.constants import ASI, Geometry, SysLayers
+
+
+class ObjetoCOM:
+    """
+    Proxy COM simulado: cada acceso o asignación es un viaje. Sirve a la vez
+    de propiedad y de método (llamarlo devuelve otro proxy sin costo extra).
+    """
+
+    def __init__(self, contador):
+        object.__setattr__(self, "_contador", contador)
+
+    def __getattr__(self, nombre):
+        self._contador[0] += 1
+        return ObjetoCOM(self._contador)
+
+    def __call__(self, *args):
+        return ObjetoCOM(self._contador)
+
+    def __setattr__(self, nombre, valor):
+        self._contador[0] += 1
+
+
+def dibujo_directo(msp, doc, ruta, handle):
+    """Réplica de la escritura previa (una entidad y sus propiedades a la vez)."""
+    txt = msp.AddText("2H SM 150m", None, Geometry.TEXT_HEIGHT)
+    txt.Rotation = 0.0
+    txt.Alignment = Geometry.TEXT_ALIGNMENT_CENTER
+    txt.TextAlignmentPoint = None
+    txt.Layer = SysLayers.TEXTO_TRAMOS
+    txt.Color = ASI.MAGENTA
+
+    txt = msp.AddText("Reserva:10m", None, 0.8)
+    txt.Color = ASI.CYAN
+    txt.Layer = SysLayers.TEXTO_RESERVAS
+
+    pline = msp.AddLightWeightPolyline(None)
+    final = pline.Offset(Geometry.OFFSET_RUTAS)
+    pline.Delete()
+    final.Layer = SysLayers.DEBUG_RUTAS
+    final.Color = ASI.MAGENTA
+
+    obj = doc.HandleToObject(handle)
+    obj.Layer = "CABLE PRECONECT 2H SM (150M)"
+    obj.ConstantWidth = 0.5
+    obj.LinetypeScale = 4
+
+
+def dibujo_encolado(cola, ruta, handle):
+    insertar_etiqueta_tramo(cola, ruta, "2H SM 150m", capa=SysLayers.TEXTO_TRAMOS)
+    insertar_etiqueta_reserva(cola, ruta[-1], 10, capa=SysLayers.TEXTO_RESERVAS)
+    dibujar_debug_offset(cola, ruta)
+    cola.modificar(
+        handle, Layer="CABLE PRECONECT 2H SM (150M)", ConstantWidth=0.5, LinetypeScale=4
+    )
+
+
+def ejecutar(tramos: int) -> None:
+    rnd = random.Random(9)
+    rutas = []
+    for _ in range(tramos):
+        x, y = rnd.uniform(0, 5000), rnd.uniform(0, 5000)
+        rutas.append([(x, y), (x + 40, y), (x + 40, y + 30), (x + 90, y + 30)])
+
+    contador = [0]
+    msp = ObjetoCOM(contador)
+    doc = ObjetoCOM(contador)
+    t0 = time.perf_counter()
+    for i, ruta in enumerate(rutas):
+        dibujo_directo(msp, doc, ruta, format(i, "X"))
+    t_directo = time.perf_counter() - t0
+    directo = contador[0]
+
+    contador = [0]
+    msp = ObjetoCOM(contador)
+    t0 = time.perf_counter()
+    cola = ColaDibujo(msp)
+    for i, ruta in enumerate(rutas):
+        dibujo_encolado(cola, ruta, format(i, "X"))
+    en_bucle = contador[0]
+    cola.vaciar()
+    t_cola = time.perf_counter() - t0
+    encolado = contador[0]
+
+    print(
+        f"tramos={tramos:>6} COM/tramo directo={directo / tramos:5.2f} "
+        f"cola={encolado / tramos:5.2f} (durante el ruteo: {en_bucle}) "
+        f"t_sim={t_directo:6.3f}s/{t_cola:6.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    for n in (100, 1_000, 10_000):
+        ejecutar(n)
@@ -0,0 +1,63 @@
+"""
+Benchmark: jerarquía de contracción vs Dijkstra en redes en cuadrícula.
+Reporta tiempo de preproceso, tamaño del índice y latencia por consulta.
+
+Uso:
+    python -m benchmarks.bench_contraccion
+"""
+
+import os
+import random
+import tempfile
+import time
+from optimizer.constants import Busqueda
+from optimizer.contraction import ContractionHierarchy
+from benchmarks.bench_indice_espacial import generar_red_cuadricula
+
+
+def ejecutar(lado: int, consultas: int = 100) -> None:
+    grafo = generar_red_cuadricula(lado)
+    csr = grafo.compilar()
+
+    t0 = time.perf_counter()
+    ch = ContractionHierarchy.construir(csr)
+    t_pre = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "red.ch")
+        ch.guardar(ruta)
+        tam_archivo = os.path.getsize(ruta)
+        t0 = time.perf_counter()
+        ContractionHierarchy.cargar(ruta, csr.huella())
+        t_carga = time.perf_counter() - t0
+        grafo._jerarquia = ch
+
+    rnd = random.Random(3)
+    claves = list(grafo.nodes)
+    pares = [(rnd.choice(claves), rnd.choice(claves)) for _ in range(consultas)]
+
+    resultados = {}
+    for estrategia in (Busqueda.DIJKSTRA, Busqueda.CONTRACCION):
+        asentados = 0
+        distancias = []
+        t0 = time.perf_counter()
+        for a, b in pares:
+            distancias.append(grafo.get_path_length(a, b, strategy=estrategia)[0])
+            asentados += grafo.ultima_busqueda["nodos_asentados"]
+        t = (time.perf_counter() - t0) / consultas
+        resultados[estrategia] = (t, asentados / consultas, distancias)
+
+    t_dij, n_dij, d_dij = resultados[Busqueda.DIJKSTRA]
+    t_ch, n_ch, d_ch = resultados[Busqueda.CONTRACCION]
+    iguales = "OK" if d_dij == d_ch else "DIFERENTES"
+    print(
+        f"nodos={csr.num_nodos:>6} preproceso={t_pre:6.1f}s "
+        f"indice={tam_archivo / 2**20:5.1f}MB carga={t_carga * 1000:5.1f}ms "
+        f"atajos={ch.num_atajos:>6} | dijkstra={t_dij * 1000:7.2f}ms ({n_dij:7.0f} nodos) "
+        f"ch={t_ch * 1000:6.2f}ms ({n_ch:5.0f} nodos) distancias={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for lado in (30, 60, 100):
+        ejecutar(lado)
@@ -0,0 +1,81 @@
+"""
+Benchmark: volcado de decenas de miles de anotaciones (rutas, etiquetas,
+círculos de error y cambios de capa) a un DXF de superposición, contra el
+mismo volcado por COM sobre el backend en memoria con latencia simulada.
+
+Uso:
+    python -m benchmarks.bench_escritor_dxf [tramos] [latencia_ms]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from optimizer.acad_cola_dibujo import ColaDibujo
+from optimizer.acad_drawer import dibujar_circulo_error, dibujar_debug_offset
+from optimizer.acad_labeler import insertar_etiqueta_tramo
+from optimizer.acad_memoria import AplicacionMemoria
+from optimizer.escritor_dxf import CapasDXF, ColaDXF
+
+
+def encolar(cola: ColaDibujo, tramos, semilla: int = 5) -> None:
+    """Por tramo: ruta de depuración, etiqueta, cambio de capa y algún error."""
+    rnd = random.Random(semilla)
+    for handle, coords in tramos.items():
+        puntos = list(zip(coords[::2], coords[1::2]))
+        dibujar_debug_offset(cola, puntos)
+        insertar_etiqueta_tramo(cola, puntos, f"2H SM {rnd.randint(5, 300)}m")
+        cola.modificar(handle, Layer="CABLE PRECONECT 2H", ConstantWidth=0.3)
+        if rnd.random() < 0.1:
+            dibujar_circulo_error(cola, puntos[0], radio=2.0)
+
+
+def ejecutar(n: int, latencia_ms: float) -> None:
+    rnd = random.Random(1)
+    tramos = {}
+    for i in range(n):
+        x, y = rnd.uniform(0, 50_000), rnd.uniform(0, 50_000)
+        tramos[format(0x100 + i, "X")] = (x, y, x + 30, y + 10, x + 60, y)
+
+    fd, ruta = tempfile.mkstemp(suffix=".dxf")
+    os.close(fd)
+    try:
+        cola = ColaDXF(ruta, CapasDXF(), tramos)
+        encolar(cola, tramos)
+        pendientes = len(cola)
+        t0 = time.perf_counter()
+        hechos = cola.vaciar()
+        dt_dxf = time.perf_counter() - t0
+        tam = os.path.getsize(ruta) / 1024**2
+    finally:
+        os.remove(ruta)
+
+    # Mismo trabajo por COM (una muestra: la latencia domina y es lineal)
+    app = AplicacionMemoria()
+    msp = app.ActiveDocument.ModelSpace
+    muestra = {}
+    for coords in list(tramos.values())[: max(1, n // 20)]:
+        tramo = msp.polilinea(list(zip(coords[::2], coords[1::2])), "TRAMO")
+        muestra[tramo._leer("Handle")] = coords
+    cola = ColaDibujo(msp)
+    encolar(cola, muestra)
+    app.latencia_ms = latencia_ms
+    app.reiniciar_contador()
+    t0 = time.perf_counter()
+    cola.vaciar()
+    escala = len(tramos) / len(muestra)
+    dt_com = (time.perf_counter() - t0) * escala
+    viajes = int(app.llamadas * escala)
+
+    print(
+        f"tramos={n:>6} comandos={pendientes:>6} escritos={hechos:>6} "
+        f"dxf={dt_dxf:6.3f}s ({tam:5.1f} MB) "
+        f"com≈{dt_com:7.2f}s ({viajes} viajes a {latencia_ms} ms)"
+    )
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    ejecutar(n, latencia)
@@ -0,0 +1,161 @@
+"""
+Benchmark: corrida completa de FiberController._proceso_worker sin AutoCAD,
+sobre el backend en memoria con una latencia por llamada similar a la de
+AutoCAD real. Compara el escaneo completo sin sesión de edición contra los
+conjuntos de selección filtrados con sesión de edición.
+
+Uso:
+    python -m benchmarks.bench_flujo_completo [latencia_ms]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+import yaml
+from interface.controller import FiberController
+from optimizer.acad_interface import usar_backend
+from optimizer.acad_memoria import AplicacionMemoria, BackendMemoria
+from optimizer.config_loader import get_config, get_config_path, load_config
+from optimizer.feedback_logger import logger
+
+ESPACIADO = 60.0  # Metros entre esquinas de la grilla vial
+
+
+class _Variable:
+    """Sustituto de tk.BooleanVar."""
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def get(self):
+        return self.valor
+
+    def set(self, valor):
+        self.valor = valor
+
+
+class VistaSimulada:
+    """Vista sin Tkinter: guarda el último mensaje mostrado."""
+
+    def __init__(self):
+        self.var_debug_ruta = _Variable(True)
+        self.var_capas = _Variable(True)
+        self.var_labels = _Variable(True)
+        self.var_errores = _Variable(True)
+        self.var_csv = _Variable(False)
+        self.btn_run = {"state": "normal"}
+        self.mensaje = None
+
+    def set_controller(self, controller):
+        pass
+
+    def log_message(self, msg, level_name="INFO"):
+        pass
+
+    def update_status(self, text, progress=None):
+        pass
+
+    def toggle_run_button(self, state):
+        pass
+
+    def show_info(self, title, msg):
+        self.mensaje = msg
+
+    def show_error(self, title, msg):
+        self.mensaje = f"ERROR: {msg}"
+
+
+def poblar(app: AplicacionMemoria, n: int) -> int:
+    """
+    Grilla vial de n x n esquinas con un equipo junto a cada una (HBOX en la
+    primera columna, FAT intermedias en el resto) y un tramo entre cada par
+    de equipos vecinos de la misma fila.
+    Returns:
+        int: Cantidad de tramos.
+    """
+    msp = app.ActiveDocument.ModelSpace
+    capa_red = get_config("rutas.capa_red_vial")
+    capa_tramos = get_config("rutas.capa_tramos_logicos", "TRAMO")
+    hbox = get_config("equipos.hbox")[0]
+    fat = get_config("equipos.fat_int")[0]
+
+    for f in range(n):
+        for c in range(n):
+            x, y = c * ESPACIADO, f * ESPACIADO
+            if c + 1 < n:
+                msp.linea((x, y), (x + ESPACIADO, y), capa_red)
+            if f + 1 < n:
+                msp.linea((x, y), (x, y + ESPACIADO), capa_red)
+            nombre = hbox if c == 0 else fat
+            msp.insertar_bloque(
+                nombre, (x + 3, y + 3), "EQUIPOS", {"ID_NAME": f"E{f}_{c}"}
+            )
+            # Contenido ajeno a la red (lotes y cotas), como en un plano real
+            msp.polilinea([(x + 10, y + 10), (x + 50, y + 10)], "LOTES")
+            msp.texto(f"LOTE {f}-{c}", (x + 30, y + 30), "COTAS")
+
+    tramos = 0
+    for f in range(n):
+        for c in range(n - 1):
+            x, y = c * ESPACIADO + 3, f * ESPACIADO + 3
+            msp.polilinea([(x, y), (x + ESPACIADO, y)], capa_tramos)
+            tramos += 1
+    return tramos
+
+
+def configurar(**cad) -> str:
+    """Copia temporal de config.yaml con la sección 'cad' modificada."""
+    with open(get_config_path(), "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config.setdefault("cad", {}).update(cad)
+    # Sin escribir cache/ del grafo: cada escenario arranca en frío
+    config.setdefault("ruteo", {})["cache_grafo"] = False
+    fd, ruta = tempfile.mkstemp(suffix=".yaml")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return ruta
+
+
+def correr(n: int, latencia_ms: float, filtrar: bool, sesion: bool) -> None:
+    ruta = configurar(conjuntos_seleccion=filtrar, sesion_edicion=sesion)
+    try:
+        load_config(ruta)
+        app = AplicacionMemoria()
+        tramos = poblar(app, n)
+        entidades = app.ActiveDocument.ModelSpace.Count
+
+        app.latencia_ms = latencia_ms
+        app.reiniciar_contador()
+        anterior = usar_backend(BackendMemoria(app))
+        try:
+            vista = VistaSimulada()
+            controlador = FiberController(vista)
+            logger.setLevel(logging.WARNING)
+            vista.var_csv.set(False)
+            t0 = time.perf_counter()
+            controlador._proceso_worker()
+            duracion = time.perf_counter() - t0
+        finally:
+            usar_backend(anterior)
+    finally:
+        os.remove(ruta)
+        load_config()
+
+    creadas = app.ActiveDocument.ModelSpace.Count - entidades
+    modo = ("filtrado" if filtrar else "completo") + (" + sesión" if sesion else "")
+    resultado = (vista.mensaje or "").replace("\n", " ")
+    print(
+        f"entidades={entidades:>6} tramos={tramos:>5} {modo:<19} "
+        f"viajes={app.llamadas:>7} creadas={creadas:>5} t={duracion:7.3f}s "
+        f"({resultado})"
+    )
+
+
+if __name__ == "__main__":
+    latencia = float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+    print(f"latencia simulada: {latencia} ms por llamada")
+    for n in (10, 25):
+        for filtrar, sesion in ((False, False), (True, True)):
+            correr(n, latencia, filtrar, sesion)
@@ -0,0 +1,67 @@
+"""
+Benchmark: Dijkstra sobre diccionarios vs grafo compacto (CSR).
+Compara memoria de la estructura y tiempo de consultas punto a punto.
+
+Uso:
+    python -m benchmarks.bench_grafo_compacto
+"""
+
+import heapq
+import random
+import time
+import tracemalloc
+from benchmarks.bench_indice_espacial import generar_red_cuadricula
+
+
+def dijkstra_diccionarios(grafo, start_node, end_node):
+    """Implementación de referencia sobre grafo.adj (diccionarios)."""
+    queue = [(0, start_node)]
+    visited = {start_node: (0, None)}
+    while queue:
+        current_dist, current_node = heapq.heappop(queue)
+        if current_node == end_node:
+            return current_dist
+        if current_dist > visited[current_node][0]:
+            continue
+        for neighbor, weight in grafo.adj.get(current_node, ()):
+            new_dist = current_dist + weight
+            if neighbor not in visited or new_dist < visited[neighbor][0]:
+                visited[neighbor] = (new_dist, current_node)
+                heapq.heappush(queue, (new_dist, neighbor))
+    return None
+
+
+def ejecutar(lado: int, consultas: int = 50) -> None:
+    tracemalloc.start()
+    grafo = generar_red_cuadricula(lado)
+    mem_dict = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    csr = grafo.compilar()
+    t_compilar = time.perf_counter() - t0
+
+    rnd = random.Random(1)
+    claves = list(grafo.nodes)
+    pares = [(rnd.choice(claves), rnd.choice(claves)) for _ in range(consultas)]
+
+    t0 = time.perf_counter()
+    ref = [dijkstra_diccionarios(grafo, a, b) for a, b in pares]
+    t_dict = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    res = [grafo.get_path_length(a, b)[0] for a, b in pares]
+    t_csr = time.perf_counter() - t0
+
+    iguales = "OK" if ref == res else "DIFERENTES"
+    print(
+        f"aristas={csr.num_aristas:>8} grafo_dict={mem_dict / 2**20:7.1f}MB "
+        f"csr={csr.memoria_bytes() / 2**20:6.1f}MB compilar={t_compilar:6.2f}s | "
+        f"dijkstra dict={t_dict / consultas * 1000:8.1f}ms "
+        f"csr={t_csr / consultas * 1000:8.1f}ms distancias={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for lado in (100, 300, 500):
+        ejecutar(lado)
@@ -0,0 +1,72 @@
+"""
+Benchmark: búsqueda de nodo cercano (lineal vs índice espacial).
+Genera redes sintéticas en cuadrícula y compara tiempos y resultados.
+
+Uso:
+    python -m benchmarks.bench_indice_espacial
+"""
+
+import random
+import time
+from optimizer.acad_geometry import NetworkGraph
+from optimizer.utils_math import distancia_euclidiana
+
+
+def generar_red_cuadricula(n: int, espaciado: float = 50.0) -> NetworkGraph:
+    """Red de n x n cruces unidos por calles rectas (2*n*(n-1) líneas)."""
+    grafo = NetworkGraph(tolerance=0.1)
+    for i in range(n):
+        for j in range(n):
+            p = (i * espaciado, j * espaciado)
+            if i + 1 < n:
+                grafo.add_line(p, ((i + 1) * espaciado, j * espaciado))
+            if j + 1 < n:
+                grafo.add_line(p, (i * espaciado, (j + 1) * espaciado))
+    return grafo
+
+
+def busqueda_lineal(grafo: NetworkGraph, point, max_radius):
+    """Implementación de referencia (recorrido completo de nodos)."""
+    best_node = None
+    min_dist = float("inf")
+    for key, coords in grafo.nodes.items():
+        if abs(point[0] - coords[0]) > max_radius:
+            continue
+        if abs(point[1] - coords[1]) > max_radius:
+            continue
+        d = distancia_euclidiana(point, coords)
+        if d < min_dist:
+            min_dist = d
+            best_node = key
+    if min_dist <= max_radius:
+        return best_node, min_dist
+    return None, None
+
+
+def ejecutar(n: int, consultas: int = 2000, radio: float = 20.0) -> None:
+    grafo = generar_red_cuadricula(n)
+    extension = (n - 1) * 50.0
+    rnd = random.Random(42)
+    puntos = [
+        (rnd.uniform(0, extension), rnd.uniform(0, extension)) for _ in range(consultas)
+    ]
+
+    t0 = time.perf_counter()
+    ref = [busqueda_lineal(grafo, p, radio) for p in puntos]
+    t_lineal = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    res = [grafo.find_nearest_node(p, max_radius=radio) for p in puntos]
+    t_indice = time.perf_counter() - t0
+
+    iguales = "OK" if ref == res else "DIFERENTES"
+    print(
+        f"nodos={len(grafo.nodes):>7} consultas={consultas} "
+        f"lineal={t_lineal:8.3f}s indice={t_indice:8.4f}s "
+        f"speedup=x{t_lineal / max(t_indice, 1e-9):,.0f} resultados={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for lado in (50, 100, 224):
+        ejecutar(lado)
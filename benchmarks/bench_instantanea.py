@@ -0,0 +1,193 @@
+"""
+Benchmark: lecturas COM del pipeline (tres escaneos del ModelSpace) vs
+una instantánea de una sola pasada, recorriendo todo o con conjuntos de
+selección filtrados. Usa un ModelSpace simulado que cuenta cada llamada a
+Item() y cada propiedad leída (cada una es un viaje COM).
+
+Uso:
+    python -m benchmarks.bench_instantanea
+"""
+
+import random
+import time
+from optimizer.acad_block_reader import leer_bloque
+from optimizer.acad_query import TIPOS_DXF
+from optimizer.acad_snapshot import capturar_modelo
+
+
+class EntidadSimulada:
+    """Entidad COM falsa: cuenta cada propiedad leída."""
+
+    def __init__(self, contador, **props):
+        self._contador = contador
+        self._props = props
+
+    def __getattr__(self, nombre):
+        if nombre not in self._props:
+            raise AttributeError(nombre)
+        self._contador[0] += 1
+        return self._props[nombre]
+
+
+class ModelSpaceSimulado:
+    def __init__(self, n: int, semilla: int = 5):
+        rnd = random.Random(semilla)
+        self.lecturas = [0]
+        self.entidades = []
+        for i in range(n):
+            r = rnd.random()
+            h = format(i, "X")
+            x, y = rnd.uniform(0, 5000), rnd.uniform(0, 5000)
+            if r < 0.6:
+                props = dict(
+                    ObjectName="AcDbLine",
+                    Layer="RED" if r < 0.5 else "OTRA",
+                    StartPoint=(x, y, 0.0),
+                    EndPoint=(x + 20, y, 0.0),
+                )
+            elif r < 0.7:
+                props = dict(
+                    ObjectName="AcDbPolyline",
+                    Layer="TRAMO",
+                    Coordinates=(x, y, x + 50, y + 50),
+                )
+            elif r < 0.75:
+                props = dict(
+                    ObjectName="AcDbBlockReference",
+                    Layer="EQUIPOS",
+                    EffectiveName="FAT_INT_3.0_P",
+                    InsertionPoint=(x, y, 0.0),
+                    HasAttributes=False,
+                    IsDynamicBlock=False,
+                )
+            else:
+                props = dict(ObjectName="AcDbText", Layer="TEXTOS")
+            self.entidades.append(EntidadSimulada(self.lecturas, Handle=h, **props))
+        self.items = 0
+
+    @property
+    def Document(self):
+        return DocumentoSimulado(self)
+
+    @property
+    def Count(self):
+        return len(self.entidades)
+
+    def Item(self, i):
+        self.items += 1
+        return self.entidades[i]
+
+
+class ConjuntoSimulado:
+    """SelectionSet: el filtro se resuelve 'en AutoCAD' (sin viajes COM)."""
+
+    def __init__(self, msp):
+        self._msp = msp
+        self._sel = []
+
+    def Select(self, modo, p1, p2, tipos, datos):
+        # VARIANT de win32com o tupla (sin win32com)
+        codigos = getattr(tipos, "value", tipos)
+        valores = getattr(datos, "value", datos)
+        filtro = dict(zip(codigos, valores))
+        dxf = set(filtro[0].split(","))
+        capa = filtro.get(8, "").replace("`", "").upper()
+        nombres = set(filtro.get(2, "").replace("`", "").split(","))
+        self._sel = [
+            e
+            for e in self._msp.entidades
+            if TIPOS_DXF.get(e._props["ObjectName"]) in dxf
+            and (not capa or e._props["Layer"].upper() == capa)
+            and (2 not in filtro or e._props.get("EffectiveName") in nombres)
+        ]
+
+    @property
+    def Count(self):
+        return len(self._sel)
+
+    def Item(self, i):
+        self._msp.items += 1
+        return self._sel[i]
+
+    def Delete(self):
+        pass
+
+
+class DocumentoSimulado:
+    def __init__(self, msp):
+        self.SelectionSets = self
+        self._msp = msp
+
+    def Item(self, nombre):
+        raise KeyError(nombre)
+
+    def Add(self, nombre):
+        return ConjuntoSimulado(self._msp)
+
+
+def pipeline_anterior(msp, nombres):
+    """Réplica de los escaneos previos: grafo, bloques y tramos por separado."""
+    segmentos = []
+    for i in range(msp.Count):
+        obj = msp.Item(i)
+        if obj.ObjectName == "AcDbLine" and obj.Layer.upper() == "RED":
+            segmentos.append((obj.Handle, obj.StartPoint[:2], obj.EndPoint[:2]))
+
+    bloques = []
+    for i in range(msp.Count):
+        item = msp.Item(i)
+        if item.ObjectName == "AcDbBlockReference":
+            nombre = item.EffectiveName if hasattr(item, "EffectiveName") else item.Name
+            if nombre in nombres:
+                bloques.append(leer_bloque(item, nombre))
+
+    tramos = [
+        msp.Item(i)
+        for i in range(msp.Count)
+        if getattr(msp.Item(i), "ObjectName", "") == "AcDbPolyline"
+        and getattr(msp.Item(i), "Layer", "").upper() == "TRAMO"
+    ]
+    coords = [obj.Coordinates for obj in tramos]
+    return len(segmentos), len(bloques), len(coords)
+
+
+def ejecutar(n: int) -> None:
+    nombres = ["FAT_INT_3.0_P"]
+
+    msp = ModelSpaceSimulado(n)
+    t0 = time.perf_counter()
+    ref = pipeline_anterior(msp, nombres)
+    t_antes = time.perf_counter() - t0
+    viajes_antes = msp.items + msp.lecturas[0]
+
+    print(
+        f"entidades={n:>7} tres escaneos: viajes_COM={viajes_antes:>8} "
+        f"t_sim={t_antes:6.3f}s"
+    )
+
+    for filtrar in (False, True):
+        msp = ModelSpaceSimulado(n)
+        t0 = time.perf_counter()
+        modelo = capturar_modelo(
+            msp,
+            capa_red="RED",
+            capa_tramos="TRAMO",
+            nombres_bloques=nombres,
+            filtrar=filtrar,
+        )
+        t_despues = time.perf_counter() - t0
+        viajes = msp.items + msp.lecturas[0]
+
+        res = (len(modelo.lineas), len(modelo.bloques), len(modelo.tramos))
+        iguales = "OK" if ref == res else "DIFERENTES"
+        modo = "filtrada" if filtrar else "completa"
+        print(
+            f"{'':17}una pasada {modo}: viajes_COM={viajes:>8} "
+            f"(x{viajes_antes / viajes:.1f}) t_sim={t_despues:6.3f}s "
+            f"resultados={iguales}"
+        )
+
+
+if __name__ == "__main__":
+    for n in (10_000, 100_000):
+        ejecutar(n)
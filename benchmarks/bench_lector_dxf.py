@@ -0,0 +1,124 @@
+"""
+Benchmark: lectura de un DXF grande sin AutoCAD (mmap + salto de secciones
+y entidades que no interesan). Genera un plano sintético con red vial,
+tramos, equipos con atributos y mucho contenido ajeno (lotes, cotas,
+círculos y una sección OBJECTS voluminosa), y mide tiempo y memoria.
+
+Uso:
+    python -m benchmarks.bench_lector_dxf [MB]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from optimizer.lector_dxf import leer_dxf
+
+RED, TRAMO = "CAT_LINEA DE RED EXISTENTE", "TRAMO"
+EQUIPOS = ["FAT_INT_3.0_P", "HBOX_3.5P"]
+
+
+def _pares(*pares) -> str:
+    return "".join(f"{c:>3}\n{v}\n" for c, v in pares)
+
+
+def generar(ruta: str, megas: float, semilla: int = 3) -> int:
+    """Escribe el DXF sintético; devuelve la cantidad de entidades."""
+    rnd = random.Random(semilla)
+    objetivo = megas * 1024 * 1024
+    handle = 0x100
+    entidades = 0
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(_pares((0, "SECTION"), (2, "HEADER"), (9, "$ACADVER"), (1, "AC1032")))
+        f.write(_pares((0, "ENDSEC"), (0, "SECTION"), (2, "ENTITIES")))
+        while f.tell() < objetivo * 0.8:
+            handle += 1
+            x, y = rnd.uniform(0, 50_000), rnd.uniform(0, 50_000)
+            r = rnd.random()
+            h = format(handle, "X")
+            if r < 0.3:
+                capa = RED if r < 0.15 else "LOTES"
+                f.write(
+                    _pares(
+                        (0, "LINE"), (5, h), (100, "AcDbEntity"), (8, capa),
+                        (100, "AcDbLine"), (10, x), (20, y), (30, 0.0),
+                        (11, x + 25), (21, y), (31, 0.0),
+                    )
+                )  # fmt: skip
+            elif r < 0.4:
+                f.write(
+                    _pares(
+                        (0, "LWPOLYLINE"), (5, h), (100, "AcDbEntity"),
+                        (8, TRAMO), (100, "AcDbPolyline"), (90, 3), (70, 0),
+                        (10, x), (20, y), (10, x + 30), (20, y + 10),
+                        (10, x + 60), (20, y),
+                    )
+                )  # fmt: skip
+            elif r < 0.45:
+                f.write(
+                    _pares(
+                        (0, "INSERT"), (5, h), (100, "AcDbEntity"), (8, "EQ"),
+                        (100, "AcDbBlockReference"), (66, 1),
+                        (2, rnd.choice(EQUIPOS)), (10, x), (20, y), (30, 0.0),
+                        (0, "ATTRIB"), (5, h + "A"), (8, "EQ"), (10, x),
+                        (20, y), (40, 1.0), (1, f"E{handle}"), (2, "ID_NAME"),
+                        (0, "SEQEND"), (5, h + "B"), (8, "EQ"),
+                    )
+                )  # fmt: skip
+            elif r < 0.75:
+                f.write(
+                    _pares(
+                        (0, "TEXT"), (5, h), (100, "AcDbEntity"), (8, "COTAS"),
+                        (100, "AcDbText"), (10, x), (20, y), (30, 0.0),
+                        (40, 2.5), (1, f"{rnd.uniform(0, 99):.2f}"),
+                    )
+                )  # fmt: skip
+            else:
+                f.write(
+                    _pares(
+                        (0, "CIRCLE"), (5, h), (100, "AcDbEntity"), (8, "0"),
+                        (62, 0), (100, "AcDbCircle"), (10, x), (20, y),
+                        (30, 0.0), (40, 1.5),
+                    )
+                )  # fmt: skip
+            entidades += 1
+        f.write(_pares((0, "ENDSEC"), (0, "SECTION"), (2, "OBJECTS")))
+        while f.tell() < objetivo:
+            handle += 1
+            f.write(_pares((0, "XRECORD"), (5, format(handle, "X")), (1, "x" * 40)))
+        f.write(_pares((0, "ENDSEC"), (0, "EOF")))
+    return entidades
+
+
+def ejecutar(megas: float) -> None:
+    fd, ruta = tempfile.mkstemp(suffix=".dxf")
+    os.close(fd)
+    argumentos = dict(capa_red=RED, capa_tramos=TRAMO, nombres_bloques=EQUIPOS)
+    try:
+        entidades = generar(ruta, megas)
+        tam = os.path.getsize(ruta) / 1024**2
+        t0 = time.perf_counter()
+        modelo = leer_dxf(ruta, **argumentos)
+        dt = time.perf_counter() - t0
+        hallados = len(modelo.lineas), len(modelo.tramos), len(modelo.bloques)
+        del modelo
+
+        # Memoria de Python (las páginas del mmap las administra el sistema)
+        tracemalloc.start()
+        leer_dxf(ruta, **argumentos)
+        pico = tracemalloc.get_traced_memory()[1] / 1024**2
+        tracemalloc.stop()
+    finally:
+        os.remove(ruta)
+
+    print(
+        f"DXF={tam:7.1f} MB entidades={entidades:>8} t={dt:6.2f}s "
+        f"({tam / dt:5.1f} MB/s) líneas/tramos/bloques={hallados} "
+        f"pico_python={pico:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    ejecutar(float(sys.argv[1]) if len(sys.argv) > 1 else 50)
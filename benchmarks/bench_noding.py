@@ -0,0 +1,94 @@
+"""
+Benchmark: nodado por cubetas vs comparación de todos los pares.
+Genera calles al azar (muchas cruzadas) y compara cortes y tiempos.
+Las diagonales largas muestran el costo de anotar cada segmento solo en las
+celdas que atraviesa (y no en toda su caja envolvente).
+
+Uso:
+    python -m benchmarks.bench_noding
+"""
+
+import random
+import time
+from optimizer.noding import nodar_segmentos
+
+
+def generar_calles(n: int, extension: float, largo: float = 40.0, semilla: int = 7):
+    """Segmentos horizontales y verticales al azar dentro de un cuadrado."""
+    rnd = random.Random(semilla)
+    segmentos = []
+    for i in range(n):
+        x, y = rnd.uniform(0, extension), rnd.uniform(0, extension)
+        if i % 2:
+            segmentos.append(((x, y), (x + largo, y)))
+        else:
+            segmentos.append(((x, y), (x, y + largo)))
+    return segmentos
+
+
+def generar_diagonales(n: int, extension: float, semilla: int = 7):
+    """Calles cortas en cuadrícula más unas pocas avenidas diagonales largas."""
+    rnd = random.Random(semilla)
+    segmentos = generar_calles(n, extension, semilla=semilla)
+    for _ in range(max(n // 100, 1)):
+        x, y = rnd.uniform(0, extension / 4), rnd.uniform(0, extension / 4)
+        largo = rnd.uniform(extension / 2, extension)
+        segmentos.append(((x, y), (x + largo, y + largo * rnd.uniform(0.5, 1.0))))
+    return segmentos
+
+
+def contar_cruces_fuerza_bruta(segmentos, tolerancia: float) -> int:
+    """Referencia O(n²): cruces propios lejos de los extremos."""
+    cruces = 0
+    for i, (p1, p2) in enumerate(segmentos):
+        rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+        li = (rx * rx + ry * ry) ** 0.5
+        for q1, q2 in segmentos[i + 1 :]:
+            sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+            den = rx * sy - ry * sx
+            if den == 0:
+                continue
+            qpx, qpy = q1[0] - p1[0], q1[1] - p1[1]
+            t = (qpx * sy - qpy * sx) / den
+            u = (qpx * ry - qpy * rx) / den
+            lj = (sx * sx + sy * sy) ** 0.5
+            if (
+                0 < t < 1
+                and 0 < u < 1
+                and min(t, 1 - t) * li > tolerancia
+                and min(u, 1 - u) * lj > tolerancia
+            ):
+                cruces += 1
+    return cruces
+
+
+def ejecutar(n: int, verificar: bool, diagonales: bool = False) -> None:
+    extension = (n ** 0.5) * 20
+    generar = generar_diagonales if diagonales else generar_calles
+    segmentos = generar(n, extension)
+
+    t0 = time.perf_counter()
+    piezas, stats = nodar_segmentos(segmentos, 0.1)
+    t_cubetas = time.perf_counter() - t0
+
+    linea = (
+        f"{'diag' if diagonales else 'orto'} n={n:>7}  "
+        f"cubetas={t_cubetas * 1000:9.1f} ms  cruces={stats['cruces']:>7}  "
+        f"contactos_t={stats['contactos_t']:>5}  piezas={len(piezas):>7}"
+    )
+    if verificar:
+        t0 = time.perf_counter()
+        esperados = contar_cruces_fuerza_bruta(segmentos, 0.1)
+        t_pares = time.perf_counter() - t0
+        linea += f"  pares={t_pares * 1000:9.1f} ms  iguales={esperados == stats['cruces']}"
+    print(linea)
+
+
+if __name__ == "__main__":
+    for n in (1_000, 3_000):
+        ejecutar(n, verificar=True)
+    for n in (30_000, 100_000, 300_000):
+        ejecutar(n, verificar=False)
+    ejecutar(3_000, verificar=True, diagonales=True)
+    for n in (30_000, 100_000):
+        ejecutar(n, verificar=False, diagonales=True)
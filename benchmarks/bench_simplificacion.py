@@ -0,0 +1,71 @@
+"""
+Benchmark: grafo compilado con y sin simplificación de cadenas.
+Red en cuadrícula donde cada calle está dibujada en varios tramos cortos
+(como las capas reales hechas de muchos AcDbLine).
+
+Uso:
+    python -m benchmarks.bench_simplificacion
+"""
+
+import random
+import time
+from optimizer.acad_geometry import NetworkGraph
+from optimizer.graph_csr import CompactGraph
+
+
+def generar_red_tramos(lado: int, tramos: int, espaciado: float = 60.0) -> NetworkGraph:
+    """Cuadrícula lado x lado con cada cuadra partida en 'tramos' líneas."""
+    grafo = NetworkGraph(tolerance=0.1)
+    segmentos = []
+    for i in range(lado):
+        for j in range(lado):
+            for di, dj in ((1, 0), (0, 1)):
+                if i + di >= lado or j + dj >= lado:
+                    continue
+                puntos = [
+                    ((i + di * k / tramos) * espaciado, (j + dj * k / tramos) * espaciado)
+                    for k in range(tramos + 1)
+                ]
+                segmentos.extend(zip(puntos, puntos[1:]))
+    grafo.add_lines(segmentos, nodar=False)
+    return grafo
+
+
+def ejecutar(lado: int, tramos: int, consultas: int = 50) -> None:
+    grafo = generar_red_tramos(lado, tramos)
+    t0 = time.perf_counter()
+    plano = CompactGraph.desde_adyacencia(grafo.nodes, grafo.adj, simplificar=False)
+    t_plano = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    simple = CompactGraph.desde_adyacencia(grafo.nodes, grafo.adj)
+    t_simple = time.perf_counter() - t0
+
+    rnd = random.Random(2)
+    claves = list(grafo.nodes)
+    pares = [(rnd.choice(claves), rnd.choice(claves)) for _ in range(consultas)]
+
+    resultados = {}
+    for nombre, csr in (("plano", plano), ("simple", simple)):
+        t0 = time.perf_counter()
+        res = [csr.ruta(a, b) for a, b in pares]
+        resultados[nombre] = (time.perf_counter() - t0, res)
+
+    (t_p, res_p), (t_s, res_s) = resultados["plano"], resultados["simple"]
+    iguales = all(
+        abs(p[0] - s[0]) < 1e-6 and p[1][0] == s[1][0] and p[1][-1] == s[1][-1]
+        for p, s in zip(res_p, res_s)
+    )
+    asentados_p = sum(r[2] for r in res_p) / consultas
+    asentados_s = sum(r[2] for r in res_s) / consultas
+    print(
+        f"nodos={plano.num_nodos:>7} núcleo={simple.num_nodos_nucleo:>6} "
+        f"aristas {plano.num_aristas:>7}->{simple.num_aristas:>6} | "
+        f"compilar {t_plano:5.2f}s/{t_simple:5.2f}s | "
+        f"consulta {t_p / consultas * 1000:7.1f}ms -> {t_s / consultas * 1000:6.1f}ms "
+        f"asentados {asentados_p:8.0f} -> {asentados_s:6.0f} iguales={iguales}"
+    )
+
+
+if __name__ == "__main__":
+    for lado, tramos in ((30, 4), (60, 6), (100, 8)):
+        ejecutar(lado, tramos)
@@ -2,17 +2,27 @@ import threading
 import os
 import json
 import logging
-import pythoncom
-from typing import TYPE_CHECKING, Tuple, List, Dict, Any, Optional
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Tuple, List, Dict, Any, Optional, Union
 
 from optimizer import (
-    extract_specific_blocks,
     NetworkGraph,
+    ColaDibujo,
+    ColaDXF,
+    CapasDXF,
+    salida_en_dxf,
+    InstantaneaModelo,
+    TramoCAD,
+    capturar_segun_config,
+    invalidar_cache,
     get_acad_com,
+    inicializar_com,
     seleccionar_cable,
     dibujar_debug_offset,
     dibujar_circulo_error,
-    calcular_ruta_completa,
+    calcular_rutas_lote,
+    construir_grafo_red,
+    IndiceEquipos,
     insertar_etiqueta_reserva,
     insertar_etiqueta_tramo,
     get_config,
@@ -23,7 +33,10 @@ from optimizer import (
     herramienta_asociar_hubs,
     herramienta_analizar_fat,
     herramienta_dibujar_grafo_vial,
-    garantizar_capa_existente,
+    RegistroCapas,
+    registro_capas,
+    sesion_edicion,
+    medidor_com,
     ASI,
     SysLayers,
     logger,
@@ -62,6 +75,9 @@ class FiberController:
         self._setup_logging()
         self.cargar_preferencias()
         self._stop_requested = False
+        # Grafo vial de la corrida anterior: (documento, grafo), para
+        # actualizar solo las líneas editadas en vez de reconstruirlo
+        self._grafo_previo: Optional[Tuple[str, NetworkGraph]] = None
 
     def cargar_preferencias(self):
         """Lee el JSON y actualiza los checkboxes de la vista."""
@@ -131,7 +147,7 @@ class FiberController:
         """
 
         def _task():
-            pythoncom.CoInitialize()
+            inicializar_com()
             try:
                 self.view.update_status(f"Ejecutando {tipo}...", 0.2)
 
@@ -182,33 +198,48 @@ class FiberController:
     def _proceso_worker(self) -> None:
         """Lógica central de optimización."""
         self._stop_requested = False
-        pythoncom.CoInitialize()
+        inicializar_com()
+        # Mediciones COM de esta corrida (solo si 'cad.instrumentar_com')
+        medidor_com.reiniciar()
+        etapa = medidor_com.etapa
         try:
             # Conexion
-            acad, doc, msp = self._conectar_autocad()
-            if not acad:
-                return
+            with etapa("preparacion"):
+                acad, doc, msp = self._conectar_autocad()
+                if not acad:
+                    return
 
-            opts = self._obtener_opciones_vista()
-            logger.info(" INICIANDO OPTIMIZACIÓN ")
+                opts = self._obtener_opciones_vista()
+                logger.info(" INICIANDO OPTIMIZACIÓN ")
 
-            # Preparar capas
-            self._preparar_capas(doc, opts)
+                # Preparar capas
+                capas = self._preparar_capas(doc, opts)
 
-            # Construir grafo y equipos
-            self.view.update_status("Analizando Grafo...", 0.1)
-            grafo = self._construir_grafo(msp, opts)
-
-            self.view.update_status("Buscando Bloques...", 0.2)
-            bloques = self._obtener_catalogo_bloques()
+            # Leer el dibujo una sola vez (red, tramos y equipos)
+            with etapa("lectura_dibujo"):
+                self.view.update_status("Leyendo dibujo...", 0.09)
+                modelo = capturar_segun_config(msp)
 
-            # Procesar tramos
-            datos_reporte, exitos = self._procesar_tramos_red(
-                msp, doc, grafo, bloques, opts
-            )
+            # Construir grafo y equipos
+            with etapa("construccion_grafo"):
+                self.view.update_status("Analizando Grafo...", 0.1)
+                grafo = self._construir_grafo(doc, modelo, opts)
+
+            with etapa("extraccion_bloques"):
+                self.view.update_status("Buscando Bloques...", 0.2)
+                bloques = self._obtener_catalogo_bloques(modelo)
+
+            # Procesar tramos (una sola sesión de edición / marca de deshacer;
+            # con salida a DXF no se escribe en el dibujo abierto)
+            sesion = nullcontext() if salida_en_dxf() else sesion_edicion(doc)
+            with etapa("procesamiento_tramos"), sesion:
+                datos_reporte, exitos = self._procesar_tramos_red(
+                    msp, capas, grafo, bloques, modelo.tramos, opts
+                )
 
             # Exportar resultados
-            self._exportar_resultados(datos_reporte, opts)
+            with etapa("exportacion"):
+                self._exportar_resultados(datos_reporte, opts)
 
             # Finalizar
             self.view.update_status("Finalizado.", 1.0)
@@ -218,6 +249,8 @@ class FiberController:
             logger.critical(f"Error Fatal: {e}")
             self.view.show_error("Error Fatal", str(e))
         finally:
+            if get_config("cad.instrumentar_com", False):
+                medidor_com.reportar()
             self.view.toggle_run_button(True)
 
     # Metodos Privados para organizar el proceso
@@ -244,105 +277,172 @@ class FiberController:
             "csv": self.view.var_csv.get(),
         }
 
-    def _preparar_capas(self, doc: Any, opts: Dict[str, Any]) -> None:
-        """Asegura que existan las capas necesarias."""
+    def _preparar_capas(
+        self, doc: Any, opts: Dict[str, Any]
+    ) -> Union[RegistroCapas, CapasDXF]:
+        """
+        Asegura que existan las capas necesarias (creadas en un solo lote).
+        Con salida a DXF se declaran en la tabla del archivo."""
         self.view.update_status("Verificando capas...", 0.08)
 
-        garantizar_capa_existente(doc, SysLayers.DEBUG_NODOS, color_id=ASI.CYAN)
-        garantizar_capa_existente(doc, SysLayers.DEBUG_ARISTAS, color_id=ASI.GRIS)
+        if salida_en_dxf():
+            capas = CapasDXF()
+        else:
+            # La tabla de capas se relee en cada corrida (pudo editarse a mano)
+            capas = registro_capas(doc, recargar=True)
+        capas.solicitar(SysLayers.DEBUG_NODOS, color_id=ASI.CYAN)
+        capas.solicitar(SysLayers.DEBUG_ARISTAS, color_id=ASI.GRIS)
 
         if opts["errores"]:
-            garantizar_capa_existente(doc, SysLayers.ERRORES, color_id=ASI.ROJO)
+            capas.solicitar(SysLayers.ERRORES, color_id=ASI.ROJO)
 
         if opts["ruta_debug"]:
-            garantizar_capa_existente(doc, SysLayers.DEBUG_RUTAS, color_id=ASI.MAGENTA)
+            capas.solicitar(SysLayers.DEBUG_RUTAS, color_id=ASI.MAGENTA)
 
         if opts["etiquetas"]:
-            garantizar_capa_existente(doc, SysLayers.TEXTO_TRAMOS, color_id=ASI.AZUL)
-            garantizar_capa_existente(doc, SysLayers.TEXTO_RESERVAS, color_id=ASI.CYAN)
+            capas.solicitar(SysLayers.TEXTO_TRAMOS, color_id=ASI.AZUL)
+            capas.solicitar(SysLayers.TEXTO_RESERVAS, color_id=ASI.CYAN)
+
+        capas.crear_pendientes()
+        return capas
 
-    def _construir_grafo(self, msp: Any, opts: Dict[str, Any]) -> NetworkGraph:
+    def _construir_grafo(
+        self, doc: Any, modelo: InstantaneaModelo, opts: Dict[str, Any]
+    ) -> NetworkGraph:
         """Digitaliza la red vial y construye el grafo en memoria."""
         self.view.update_status("Analizando Red...", 0.1)
 
-        CAPA_RED = get_config("rutas.capa_red_vial")
         TOLERANCIA = get_config("tolerancias.snap_grafo_vial", 0.1)
-        grafo = NetworkGraph(tolerance=TOLERANCIA)
+        NODAR = get_config("ruteo.nodar_intersecciones", True)
 
-        count_lines = 0
-        for i in range(msp.Count):
-            try:
-                obj = msp.Item(i)
-                if obj.ObjectName == "AcDbLine" and obj.Layer.upper() == CAPA_RED:
-                    grafo.add_line(obj.StartPoint[:2], obj.EndPoint[:2])
-                    count_lines += 1
-            except Exception:
-                pass
+        segmentos = modelo.lineas
+
+        documento = doc.FullName or doc.Name
+        previo = None
+        if self._grafo_previo is not None and self._grafo_previo[0] == documento:
+            previo = self._grafo_previo[1]
+
+        grafo, nodado = construir_grafo_red(
+            segmentos,
+            TOLERANCIA,
+            nodar=NODAR,
+            usar_cache=get_config("ruteo.cache_grafo", True),
+            previo=previo,
+        )
+        self._grafo_previo = (documento, grafo)
+        if NODAR and not nodado["incremental"]:
+            logger.info(
+                f"Noding: {nodado['cruces']} cruce(s) y {nodado['contactos_t']} "
+                f"contacto(s) en T conectados."
+            )
+        if nodado["fusiones_cercanas"]:
+            logger.info(
+                f"Snap: {nodado['fusiones_cercanas']} extremo(s) casi coincidente(s) "
+                f"fusionado(s) (tolerancia {TOLERANCIA}m)."
+            )
 
         logger.info(
-            f"Grafo construido: {count_lines} linea(s), {len(grafo.nodes)} nodo(s)."
+            f"Grafo construido: {len(segmentos)} linea(s), {len(grafo.nodes)} nodo(s), "
+            f"{grafo.component_stats()['componentes']} isla(s)."
         )
         return grafo
 
-    def _obtener_catalogo_bloques(self) -> List[Dict[str, Any]]:
-        """Carga y busca los bloques de equipos configurados."""
+    def _obtener_catalogo_bloques(self, modelo: InstantaneaModelo) -> IndiceEquipos:
+        """Indexa espacialmente los bloques de equipos de la instantánea."""
         self.view.update_status("Buscando Equipos...", 0.3)
-        dic_equipos = get_config("equipos", {})
-        lista_todos = [item for sublist in dic_equipos.values() for item in sublist]
-        bloques = extract_specific_blocks(lista_todos)
+        bloques = modelo.bloques
         logger.info(f"Equipos encontrados: {len(bloques)} bloque(s).")
 
-        return bloques
+        return IndiceEquipos(bloques)
 
     def _procesar_tramos_red(
-        self, msp: Any, doc: Any, grafo: NetworkGraph, bloques: List[Dict], opts: Dict
+        self,
+        msp: Any,
+        capas: Union[RegistroCapas, CapasDXF],
+        grafo: NetworkGraph,
+        bloques: IndiceEquipos,
+        tramos: List[TramoCAD],
+        opts: Dict,
     ) -> Tuple[List[Dict[str, Any]], int]:
         """Itera sobre los tramos y calcula la lógica de negocio."""
         self.view.update_status("Calculando Rutas...", 0.4)
 
-        CAPA_TRAMO = get_config("rutas.capa_tramos_logicos")
-        tramos = [
-            msp.Item(i)
-            for i in range(msp.Count)
-            if getattr(msp.Item(i), "ObjectName", "") == "AcDbPolyline"
-            and getattr(msp.Item(i), "Layer", "").upper() == CAPA_TRAMO
-        ]
+        # Rutear por lotes (un árbol por origen): progreso entre 40% y 80%,
+        # avisando a la vista solo cuando sube al menos un punto
+        extremos = [tramo.extremos for tramo in tramos]
+        validos = [ext for ext in extremos if ext is not None]
+        reconstruir = opts["ruta_debug"] or opts["etiquetas"]
+        avisado = -1
+
+        def progreso_ruteo(hechos: int, total_rutas: int) -> None:
+            nonlocal avisado
+            pct = 0.4 + (hechos / total_rutas) * 0.4
+            if int(pct * 100) > avisado:
+                avisado = int(pct * 100)
+                self.view.update_status(
+                    f"Calculando Rutas... {hechos}/{total_rutas}", pct
+                )
+
+        rutas = iter(
+            calcular_rutas_lote(
+                validos, grafo, bloques, reconstruir, progreso=progreso_ruteo
+            )
+        )
 
         total = len(tramos)
         datos_reporte = []
         exitos = 0
-
-        for idx, obj in enumerate(tramos):
-            pct = 0.3 + int((idx / total) * 0.6)  # Progreso entre 30% y 90%
+        # Los dibujos y cambios de capa se encolan y se escriben al final
+        # (en AutoCAD o en un DXF de superposición)
+        if isinstance(capas, CapasDXF):
+            geometrias = {tramo.handle: tramo.coords for tramo in tramos}
+            cola = ColaDXF(capas=capas, geometrias=geometrias)
+        else:
+            cola = ColaDibujo(msp)
+
+        for idx, (tramo, ext) in enumerate(zip(tramos, extremos)):
+            pct = 0.8 + (idx / total) * 0.1  # Progreso entre 80% y 90%
             self.view.update_status(f"Tramo {idx + 1}/{total}", pct)
 
-            resultado = self._procesar_un_tramo(msp, doc, obj, grafo, bloques, opts)
+            if ext is None:
+                continue
+
+            resultado = self._procesar_un_tramo(
+                cola, capas, tramo, ext[0], next(rutas), opts
+            )
             if result_data := resultado:
                 datos_reporte.append(result_data)
                 if result_data.get("estado") == "OK":
                     exitos += 1
 
+        if len(cola):
+            self.view.update_status("Dibujando resultados...", 0.92)
+            # Capas de resultado nuevas: todas juntas antes de asignarlas
+            capas.crear_pendientes()
+            pendientes = len(cola)
+            hechos = cola.vaciar()
+            # Lo dibujado también llega como eventos; sin eventos no hay caché
+            invalidar_cache()
+            logger.info(
+                f"Dibujo: {hechos}/{pendientes} entidad(es) y cambio(s) de capa."
+            )
+
         return datos_reporte, exitos
 
     def _procesar_un_tramo(
         self,
-        msp: Any,
-        doc: Any,
-        obj: Any,
-        grafo: NetworkGraph,
-        bloques: List[Dict],
+        cola: ColaDibujo,
+        capas: Union[RegistroCapas, CapasDXF],
+        tramo: TramoCAD,
+        p_start: Tuple[float, float],
+        ruta_calculada: Tuple[Optional[float], List, Any],
         opts: Dict,
     ) -> Optional[Dict[str, Any]]:
-        """Lógica unitaria para un solo tramo."""
+        """
+        Lógica unitaria para un solo tramo (con su ruta ya calculada).
+        Solo encola dibujos en 'cola': no escribe en AutoCAD."""
         try:
-            coords = obj.Coordinates
-            if len(coords) < 4:
-                return None
-
-            p_start = (coords[0], coords[1])
-            p_end = (coords[-2], coords[-1])
-
-            dist, ruta, meta = calcular_ruta_completa(p_start, p_end, grafo, bloques)
+            dist, ruta, meta = ruta_calculada
 
             if not dist:
                 msg = (
@@ -350,30 +450,30 @@ class FiberController:
                     if isinstance(meta, str)
                     else meta.get("error", "Error desconocido")
                 )
-                logger.warning(f"Tramo {obj.Handle}: {msg}")
+                logger.warning(f"Tramo {tramo.handle}: {msg}")
                 if opts["errores"]:
-                    dibujar_circulo_error(msp, p_start)
-                return {"handle": obj.Handle, "estado": f"ERROR: {msg}"}
+                    dibujar_circulo_error(cola, p_start)
+                return {"handle": tramo.handle, "estado": f"ERROR: {msg}"}
 
             cable, res, tipo = seleccionar_cable(dist, meta["origen"], meta["destino"])
 
             if opts["ruta_debug"]:
-                dibujar_debug_offset(msp, ruta)
+                dibujar_debug_offset(cola, ruta)
 
             if opts["etiquetas"]:
                 txt_tramo = f"{tipo} {int(cable)}m"
                 insertar_etiqueta_tramo(
-                    msp, ruta, txt_tramo, capa=SysLayers.TEXTO_TRAMOS
+                    cola, ruta, txt_tramo, capa=SysLayers.TEXTO_TRAMOS
                 )
                 insertar_etiqueta_reserva(
-                    msp, ruta[-1], res, capa=SysLayers.TEXTO_RESERVAS
+                    cola, ruta[-1], res, capa=SysLayers.TEXTO_RESERVAS
                 )
 
             if opts["capas"]:
-                self._aplicar_cambio_capa(doc, obj, tipo, cable)
+                self._aplicar_cambio_capa(capas, cola, tramo, tipo, cable)
 
             return {
-                "handle": obj.Handle,
+                "handle": tramo.handle,
                 "origen": meta["origen"],
                 "destino": meta["destino"],
                 "longitud_real": dist,
@@ -384,25 +484,37 @@ class FiberController:
             }
 
         except Exception as e:
-            logger.error(f"Excepción en tramo {getattr(obj, 'Handle', '?')}: {e}")
+            logger.error(f"Excepción en tramo {tramo.handle}: {e}")
             return None
 
-    def _aplicar_cambio_capa(self, doc: Any, obj: Any, tipo: str, cable: float) -> None:
+    def _aplicar_cambio_capa(
+        self,
+        capas: Union[RegistroCapas, CapasDXF],
+        cola: ColaDibujo,
+        tramo: TramoCAD,
+        tipo: str,
+        cable: float,
+    ) -> None:
         """
-        Intenta cambiar la capa del objeto según reglas de negocio."""
+        Intenta cambiar la capa del tramo según reglas de negocio.
+        El cambio se encola y se aplica por handle al vaciar la cola; la capa
+        se solicita al registro y se crea junto con las demás antes de eso."""
         try:
             prefijo = get_config("capas_resultado.prefijo_capa", "CABLE PRECONECT")
             # CABLE PRECONECT + 2H SM + (100M)
             nombre_capa = f"{prefijo} {tipo} ({int(cable)}M)"
 
-            if garantizar_capa_existente(doc, nombre_capa):
-                obj.Layer = nombre_capa
-                # Configurable: ancho de línea y escala para destacar visualmente
-                obj.ConstantWidth = 0.5
-                obj.LinetypeScale = 4
+            capas.solicitar(nombre_capa)
+            # Configurable: ancho de línea y escala para destacar visualmente
+            cola.modificar(
+                tramo.handle,
+                Layer=nombre_capa,
+                ConstantWidth=0.5,
+                LinetypeScale=4,
+            )
 
         except Exception as e:
-            logger.warning(f"No se pudo cambiar capa en {obj.Handle}: {e}")
+            logger.warning(f"No se pudo cambiar capa en {tramo.handle}: {e}")
 
     def _exportar_resultados(self, datos: List[Dict], opts: Dict) -> None:
         """General el archivo CSV con los resultados."""
@@ -3,17 +3,40 @@ Optimizador de Fibra Óptica para AutoCAD
 """
 
 from .acad_block_reader import extract_specific_blocks
+from .acad_snapshot import (
+    InstantaneaModelo,
+    TramoCAD,
+    TextoCAD,
+    capturar_modelo,
+    capturar_segun_config,
+    parametros_segun_config,
+)
+from .acad_cache import capturar_en_cache, invalidar_cache
+from .acad_capas import RegistroCapas, registro_capas
+from .acad_cola_dibujo import ColaDibujo, ComandoDibujo
+from .escritor_dxf import CapasDXF, ColaDXF, salida_en_dxf
+from .acad_sesion import sesion_edicion
 from .acad_drawer import (
     dibujar_debug_offset,
     dibujar_circulo_error,
     dibujar_grafo_completo,
 )
 from .acad_geometry import NetworkGraph
-from .acad_interface import get_acad_com
+from .acad_instrumentacion import instrumentar, medidor_com
+from .acad_interface import (
+    BackendCAD,
+    BackendCOM,
+    get_acad_com,
+    inicializar_com,
+    usar_backend,
+)
+from .acad_memoria import AplicacionMemoria, BackendMemoria
+from .cache_grafo import construir_grafo_red
 from .acad_labeler import insertar_etiqueta_reserva, insertar_etiqueta_tramo
 from .cable_rules import seleccionar_cable
+from .lector_dxf import leer_dxf, capturar_dxf_segun_config
 from .config_loader import get_config, load_config, validar_configuracion
-from .constants import ASI, SysLayers, Geometry
+from .constants import ASI, SysLayers, Geometry, Busqueda
 from .feedback_logger import logger
 from .report_generator import exportar_csv
 from .security import verificar_entorno, FECHA_EXPIRACION
@@ -25,20 +48,45 @@ from .tools import (
     garantizar_capa_existente,
     herramienta_dibujar_grafo_vial,
 )
-from .topology import calcular_ruta_completa
+from .topology import calcular_ruta_completa, calcular_rutas_lote, IndiceEquipos
 
 __all__ = [
     extract_specific_blocks,
+    InstantaneaModelo,
+    TramoCAD,
+    TextoCAD,
+    capturar_modelo,
+    capturar_segun_config,
+    parametros_segun_config,
+    capturar_en_cache,
+    invalidar_cache,
+    leer_dxf,
+    capturar_dxf_segun_config,
     NetworkGraph,
+    construir_grafo_red,
     seleccionar_cable,
     get_config,
     load_config,
     validar_configuracion,
     get_acad_com,
+    inicializar_com,
+    usar_backend,
+    BackendCAD,
+    BackendCOM,
+    BackendMemoria,
+    AplicacionMemoria,
+    instrumentar,
+    medidor_com,
     logger,
     dibujar_debug_offset,
     dibujar_circulo_error,
     dibujar_grafo_completo,
+    ColaDibujo,
+    ComandoDibujo,
+    ColaDXF,
+    CapasDXF,
+    salida_en_dxf,
+    sesion_edicion,
     exportar_csv,
     verificar_entorno,
     FECHA_EXPIRACION,
@@ -46,12 +94,17 @@ __all__ = [
     herramienta_inventario_rapido,
     herramienta_dibujar_grafo_vial,
     calcular_ruta_completa,
+    calcular_rutas_lote,
+    IndiceEquipos,
     insertar_etiqueta_reserva,
     insertar_etiqueta_tramo,
     herramienta_analizar_fat,
     garantizar_capa_existente,
+    RegistroCapas,
+    registro_capas,
     herramienta_asociar_hubs,
     ASI,
     SysLayers,
     Geometry,
+    Busqueda,
 ]
@@ -3,40 +3,222 @@ Lector de bloques avanzado usando win32com
 Permite leer atributos y propiedades dinámicas.
 """
 
-from typing import List, Dict, Any
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 from .acad_interface import get_acad_com
+from .acad_query import seleccionar_entidades
+from .config_loader import get_config
+from .feedback_logger import logger
 
 
 def get_block_attributes(obj: Any) -> Dict[str, str]:
     """Extrae los atributos (Tags/Values) de un bloque."""
-    attrs: Dict[str, str] = {}
     try:
-        if obj.HasAttributes:
-            # GetAttributes devuelve una tupla de objetos
-            for att in obj.GetAttributes():
-                attrs[att.TagString] = att.TextString
+        return _leer_atributos(obj)
     except Exception:
-        pass
-    return attrs
+        return {}
 
 
 def get_dynamic_props(obj: Any) -> Dict[str, Any]:
     """
     Extrae propiedades dinámicas (ej. Visibilidad, Rotación, Flip).
     """
-    props: Dict[str, Any] = {}
     try:
-        if obj.IsDynamicBlock:
-            for prop in obj.GetDynamicBlockProperties():
-                props[prop.PropertyName] = prop.Value
+        return _leer_dinamicas(obj)
     except Exception:
-        pass
+        return {}
+
+
+def _leer_atributos(obj: Any) -> Dict[str, str]:
+    attrs: Dict[str, str] = {}
+    if obj.HasAttributes:
+        # GetAttributes devuelve una tupla de objetos
+        for att in obj.GetAttributes():
+            attrs[att.TagString] = att.TextString
+    return attrs
+
+
+def _leer_dinamicas(obj: Any) -> Dict[str, Any]:
+    props: Dict[str, Any] = {}
+    if obj.IsDynamicBlock:
+        for prop in obj.GetDynamicBlockProperties():
+            props[prop.PropertyName] = prop.Value
     return props
 
 
+# Campos que cuestan varios viajes COM por bloque: se leen al pedirlos
+_PEREZOSOS: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "attributes": _leer_atributos,
+    "dynamic_props": _leer_dinamicas,
+}
+
+# Documentos ya resueltos en cada hilo, por nombre (cada herramienta corre en
+# su propio hilo y apartamento COM)
+_por_hilo = threading.local()
+
+
+def nombre_documento(doc: Any) -> Optional[str]:
+    """Ruta completa del documento (o su nombre si aún no se guardó)."""
+    try:
+        return doc.FullName or doc.Name
+    except Exception:
+        return None
+
+
+def _documento_del_hilo(nombre: Optional[str]) -> Any:
+    """Documento 'nombre' (None = el activo) visto desde el hilo actual."""
+    documentos = getattr(_por_hilo, "documentos", None)
+    if documentos is None:
+        documentos = _por_hilo.documentos = {}
+    doc = documentos.get(nombre)
+    if doc is None:
+        acad = get_acad_com()
+        if not acad:
+            raise RuntimeError("Sin conexión con AutoCAD")
+        doc = acad.ActiveDocument
+        if nombre is not None and nombre_documento(doc) != nombre:
+            abiertos = acad.Documents
+            for i in range(abiertos.Count):
+                doc = abiertos.Item(i)
+                if nombre_documento(doc) == nombre:
+                    break
+            else:
+                raise RuntimeError(f"El documento '{nombre}' ya no está abierto")
+        documentos[nombre] = doc
+    return doc
+
+
+class BloqueCAD(dict):
+    """
+    Registro de bloque con 'attributes' y 'dynamic_props' diferidos: se leen
+    por COM en el primer acceso (b["attributes"], b.get(...)) y quedan
+    guardados. El ruteo solo usa 'name' y 'xyz' y no paga esas lecturas.
+    Compararlo, iterarlo o copiarlo carga todos los campos.
+
+    El objeto COM solo sirve en el hilo que lo leyó (cada herramienta tiene
+    su propio apartamento COM y los registros se comparten por la caché de
+    la sesión): desde otro hilo, o si el objeto ya no responde, el bloque se
+    vuelve a buscar por su handle en el documento del que salió ('documento',
+    ver nombre_documento), aunque el activo ya sea otro.
+    """
+
+    def __init__(self, item: Any, documento: Optional[str] = None, **campos: Any):
+        super().__init__(**campos)
+        self._item = item
+        self._documento = documento
+        self._hilo = threading.get_ident()
+        self._pendiente = True
+
+    def _objeto(self) -> Any:
+        """Objeto COM del bloque usable en el hilo actual."""
+        if self._item is not None and self._hilo == threading.get_ident():
+            return self._item
+        handle = dict.__getitem__(self, "handle")
+        self._item = _documento_del_hilo(self._documento).HandleToObject(handle)
+        self._hilo = threading.get_ident()
+        return self._item
+
+    def __missing__(self, clave: str) -> Dict[str, Any]:
+        lector = _PEREZOSOS.get(clave)
+        if lector is None or not self._pendiente:
+            raise KeyError(clave)
+        try:
+            valor = lector(self._objeto())
+        except Exception:
+            # Referencia vencida (otro hilo o documento): de nuevo por handle
+            self._item = None
+            getattr(_por_hilo, "documentos", {}).pop(self._documento, None)
+            try:
+                valor = lector(self._objeto())
+            except Exception as e:
+                logger.warning(
+                    f"No se pudo leer '{clave}' del bloque "
+                    f"{dict.get(self, 'handle')}: {e}"
+                )
+                return {}  # Sin guardar: se reintenta en el próximo acceso
+        self[clave] = valor
+        if all(dict.__contains__(self, c) for c in _PEREZOSOS):
+            # Todo leído: se suelta la referencia COM
+            self._item = None
+            self._pendiente = False
+        return valor
+
+    def get(self, clave: str, defecto: Any = None) -> Any:
+        try:
+            return self[clave]
+        except KeyError:
+            return defecto
+
+    def __contains__(self, clave: object) -> bool:
+        if dict.__contains__(self, clave):
+            return True
+        return self._pendiente and clave in _PEREZOSOS
+
+    def cargar(self) -> "BloqueCAD":
+        """Lee ya los campos diferidos que falten."""
+        for clave in _PEREZOSOS:
+            if clave in self:
+                self[clave]
+        return self
+
+    def __eq__(self, otro: object) -> bool:
+        if isinstance(otro, BloqueCAD):
+            otro.cargar()
+        return dict.__eq__(self.cargar(), otro)
+
+    def __ne__(self, otro: object) -> bool:
+        igual = self.__eq__(otro)
+        return igual if igual is NotImplemented else not igual
+
+    def __iter__(self):
+        return dict.__iter__(self.cargar())
+
+    def __len__(self) -> int:
+        # Sin cargar: 'if bloque:' aparece en el camino del ruteo
+        pendientes = 0
+        if self._pendiente:
+            pendientes = sum(1 for c in _PEREZOSOS if not dict.__contains__(self, c))
+        return dict.__len__(self) + pendientes
+
+    def __repr__(self) -> str:
+        return dict.__repr__(self.cargar())
+
+    def keys(self):
+        return dict.keys(self.cargar())
+
+    def values(self):
+        return dict.values(self.cargar())
+
+    def items(self):
+        return dict.items(self.cargar())
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+def leer_bloque(
+    item: Any, nombre: str, documento: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Registro de una referencia de bloque (ver extract_specific_blocks).
+    Atributos y propiedades dinámicas se leen recién al pedirlos (BloqueCAD),
+    en 'documento' (ver nombre_documento; None = el activo en ese momento).
+    """
+    return BloqueCAD(
+        item,
+        documento,
+        name=nombre,
+        handle=item.Handle,
+        layer=item.Layer,
+        xyz=item.InsertionPoint,
+    )
+
+
 def extract_specific_blocks(target_names: List[str]) -> List[Dict[str, Any]]:
     """
     Busca bloques específicos y extrae toda su data.
+    'attributes' y 'dynamic_props' se leen por COM recién al accederlos
+    (ver BloqueCAD): quien solo usa 'name' y 'xyz' no paga esos viajes.
     Args:
         target_names (list): Lista de nombres de bloques a buscar (ej. ['X_BOX_P']).
     Returns:
@@ -58,31 +240,45 @@ def extract_specific_blocks(target_names: List[str]) -> List[Dict[str, Any]]:
 
     doc = acad.ActiveDocument
     msp = doc.ModelSpace
+    documento = nombre_documento(doc)
     found_blocks: List[Dict[str, Any]] = []
 
-    # Iteración eficiente sobre ModelSpace
+    # Preferir que AutoCAD filtre por tipo y nombre (conjunto de selección)
+    candidatos: Optional[Iterable[Any]] = None
+    if get_config("cad.conjuntos_seleccion", True):
+        candidatos = seleccionar_entidades(
+            msp, ("AcDbBlockReference",), nombres_bloques=target_names
+        )
+    if candidatos is None:
+        candidatos = _referencias_de_bloque(msp)
+
+    for item in candidatos:
+        try:
+            real_name = nombre_efectivo(item)
+            if real_name in target_names:
+                found_blocks.append(leer_bloque(item, real_name, documento))
+        except Exception:
+            continue
+
+    return found_blocks
+
+
+def nombre_efectivo(item: Any) -> str:
+    """Nombre real del bloque (incluye dinámicos anónimos que empiezan con *U)."""
+    try:
+        return item.EffectiveName
+    except Exception:
+        return item.Name
+
+
+def _referencias_de_bloque(msp: Any) -> Iterator[Any]:
+    """Iteración completa sobre ModelSpace quedándose con los bloques."""
     count = msp.Count
     for i in range(count):
         try:
             item = msp.Item(i)
             # Verificar si es un Bloque (AcDbBlockReference)
             if item.ObjectName == "AcDbBlockReference":
-                # Manejo de nombres (incluyendo bloques dinámicos anónimos que empiezan con *U)
-                real_name = (
-                    item.EffectiveName if hasattr(item, "EffectiveName") else item.Name
-                )
-
-                if real_name in target_names:
-                    data = {
-                        "name": real_name,
-                        "handle": item.Handle,
-                        "layer": item.Layer,
-                        "xyz": item.InsertionPoint,
-                        "attributes": get_block_attributes(item),
-                        "dynamic_props": get_dynamic_props(item),
-                    }
-                    found_blocks.append(data)
+                yield item
         except Exception:
             continue
-
-    return found_blocks
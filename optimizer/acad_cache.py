@@ -0,0 +1,163 @@
+"""
+Caché de entidades de la sesión.
+Las herramientas de inventario, análisis de FAT y asociación de hubs piden
+al ModelSpace bloques de equipos y textos que se solapan. Los registros ya
+leídos por COM se guardan por documento y handle, agrupados por lo que se
+pidió (nombre de bloque, capa de textos), y solo se vuelve a AutoCAD por
+lo que falta.
+
+La caché solo se usa si el backend avisa de los cambios del documento
+(eventos ObjectAdded / ObjectErased / ObjectModified, ver
+BackendCAD.vigilar): cualquier entidad agregada, borrada o editada en el
+lugar (un bloque movido, un atributo cambiado) la descarta. Sin eventos
+cada pedido se lee de nuevo: ni Count ni HANDSEED cambian al editar una
+entidad existente, así que no alcanzan para detectar esos cambios.
+La geometría de la red (líneas viales y tramos) no pasa por esta caché:
+la corrida principal y el grafo vial la leen siempre del dibujo.
+"""
+
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .acad_interface import backend_activo, get_acad_com, mismo_documento
+from .acad_snapshot import InstantaneaModelo, capturar_modelo
+from .config_loader import get_config
+from .feedback_logger import logger
+
+Clave = Tuple[str, Optional[str]]  # (categoría, nombre de bloque o capa)
+
+
+class CacheEntidades:
+    """Registros ya leídos de un documento: {clave: {handle: registro}}."""
+
+    def __init__(self, doc: Any):
+        self.doc = doc
+        self._registros: Dict[Clave, Dict[str, Any]] = {}
+        self._cambiado = False
+        self._detener: Optional[Callable[[], None]] = None
+        try:
+            self._detener = backend_activo().vigilar(doc, self.marcar_cambio)
+        except Exception as e:
+            logger.debug(f"Sin eventos del documento ({e}); caché desactivada.")
+
+    @property
+    def vigilada(self) -> bool:
+        """True si el documento avisa de sus cambios (si no, no se guarda nada)."""
+        return self._detener is not None
+
+    def __contains__(self, clave: Clave) -> bool:
+        return clave in self._registros
+
+    def marcar_cambio(self) -> None:
+        """Evento del documento (puede llegar desde el hilo de eventos)."""
+        self._cambiado = True
+
+    def validar(self) -> None:
+        """Descarta todo si el documento cambió desde la última lectura."""
+        if self._cambiado:
+            self._cambiado = False
+            if self._registros:
+                logger.debug("Caché de entidades descartada (el dibujo cambió).")
+            self._registros.clear()
+
+    def invalidar(self) -> None:
+        self._registros.clear()
+
+    def cerrar(self) -> None:
+        """Deja de escuchar los eventos del documento."""
+        if self._detener is not None:
+            self._detener()
+            self._detener = None
+        self._registros.clear()
+
+    def guardar(
+        self, clave: Clave, registros: Iterable[Any], handle: Callable[[Any], str]
+    ) -> None:
+        self._registros[clave] = {handle(r): r for r in registros}
+
+    def registros(self, claves: Iterable[Clave]) -> List[Any]:
+        return [r for clave in claves for r in self._registros[clave].values()]
+
+
+_cache: Optional[CacheEntidades] = None
+
+
+def cache_entidades(doc: Any) -> CacheEntidades:
+    """Caché del documento 'doc' (se arma de nuevo al cambiar de documento)."""
+    global _cache
+    if _cache is None or not mismo_documento(_cache.doc, doc):
+        if _cache is not None:
+            _cache.cerrar()
+        _cache = CacheEntidades(doc)
+    return _cache
+
+
+def invalidar_cache() -> None:
+    """Olvida lo leído (ej. después de modificar el dibujo)."""
+    if _cache is not None:
+        _cache.invalidar()
+
+
+def capturar_en_cache(
+    msp: Any,
+    nombres_bloques: Iterable[str] = (),
+    textos: bool = False,
+    capa_textos: Optional[str] = None,
+) -> InstantaneaModelo:
+    """
+    Bloques y textos como capturar_modelo, pero leyendo por COM solo lo que
+    no está en la caché de la sesión. 'entidades' cuenta solo las leídas en
+    esta llamada.
+    """
+    nombres = list(dict.fromkeys(nombres_bloques))
+    cache = None
+    if get_config("cad.cache_entidades", True):
+        cache = cache_entidades(msp.Document)
+    if cache is None or not cache.vigilada:
+        return capturar_modelo(
+            msp, nombres_bloques=nombres, textos=textos, capa_textos=capa_textos
+        )
+
+    cache.validar()
+    claves_bloques = [("bloques", nombre) for nombre in nombres]
+    clave_textos = ("textos", capa_textos.upper() if capa_textos else None)
+
+    # Solo se pide a AutoCAD lo que falta
+    pedir_bloques = [n for n, c in zip(nombres, claves_bloques) if c not in cache]
+    pedir_textos = textos and clave_textos not in cache
+
+    leidas = 0
+    if pedir_bloques or pedir_textos:
+        nuevo = capturar_modelo(
+            msp,
+            nombres_bloques=pedir_bloques,
+            textos=pedir_textos,
+            capa_textos=capa_textos,
+        )
+        leidas = nuevo.entidades
+        por_nombre: Dict[str, List[Dict[str, Any]]] = {n: [] for n in pedir_bloques}
+        for bloque in nuevo.bloques:
+            por_nombre[bloque["name"]].append(bloque)
+        for nombre, bloques in por_nombre.items():
+            cache.guardar(("bloques", nombre), bloques, itemgetter("handle"))
+        if pedir_textos:
+            cache.guardar(clave_textos, nuevo.textos, attrgetter("handle"))
+    else:
+        logger.debug("Bloques y textos servidos desde la caché de entidades.")
+
+    return InstantaneaModelo(
+        [],
+        [],
+        cache.registros(claves_bloques),
+        cache.registros([clave_textos]) if textos else [],
+        leidas,
+    )
+
+
+def bloques_en_cache(target_names: List[str]) -> List[Dict[str, Any]]:
+    """Como extract_specific_blocks, reutilizando la caché de la sesión."""
+    acad = get_acad_com()
+    if not acad:
+        return []
+    return capturar_en_cache(
+        acad.ActiveDocument.ModelSpace, nombres_bloques=target_names
+    ).bloques
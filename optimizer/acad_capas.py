@@ -0,0 +1,86 @@
+"""
+Registro de Capas.
+Lee la tabla de capas del documento una sola vez y responde desde memoria si
+una capa existe. Las capas faltantes se crean al momento o se acumulan para
+crearlas todas juntas. El registro se descarta al cambiar de documento.
+"""
+
+from typing import Any, Dict, Optional, Set, Tuple
+from .acad_interface import mismo_documento
+from .constants import ASI
+from .feedback_logger import logger
+
+
+class RegistroCapas:
+    """Capas existentes de un documento (AutoCAD no distingue mayúsculas)."""
+
+    def __init__(self, doc: Any):
+        self.doc = doc
+        self._capas: Set[str] = set()
+        self._pendientes: Dict[str, Tuple[str, int]] = {}
+        self.recargar()
+
+    def recargar(self) -> None:
+        """Vuelve a leer la tabla de capas (por si se editó fuera del programa)."""
+        self._capas.clear()
+        try:
+            capas = self.doc.Layers
+            for i in range(capas.Count):
+                try:
+                    self._capas.add(capas.Item(i).Name.upper())
+                except Exception:
+                    continue
+        except Exception as e:
+            logger.warning(f"No se pudo leer la tabla de capas: {e}")
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre.upper() in self._capas
+
+    def garantizar(self, nombre: str, color_id: int = ASI.BLANCO) -> Optional[str]:
+        """Nombre de la capa, creándola ya si no existe (None si falló)."""
+        if nombre in self:
+            return nombre
+        try:
+            nueva_capa = self.doc.Layers.Add(nombre)
+            nueva_capa.Color = color_id
+        except Exception as e:
+            logger.error(f"No se pudo crear la capa '{nombre}': {e}")
+            return None
+        self._capas.add(nombre.upper())
+        self._pendientes.pop(nombre.upper(), None)
+        return nombre
+
+    def solicitar(self, nombre: str, color_id: int = ASI.BLANCO) -> str:
+        """Anota la capa para crearla luego con crear_pendientes()."""
+        clave = nombre.upper()
+        if clave not in self._capas:
+            self._pendientes.setdefault(clave, (nombre, color_id))
+        return nombre
+
+    def crear_pendientes(self) -> int:
+        """
+        Crea de una vez todas las capas solicitadas que faltan.
+        Returns:
+            int: Cantidad de capas creadas.
+        """
+        pendientes = list(self._pendientes.values())
+        self._pendientes.clear()
+        return sum(
+            1 for nombre, color in pendientes if self.garantizar(nombre, color)
+        )
+
+
+_registro: Optional[RegistroCapas] = None
+
+
+def registro_capas(doc: Any, recargar: bool = False) -> RegistroCapas:
+    """
+    Registro del documento 'doc'. Se reutiliza mientras el documento activo
+    sea el mismo y se arma de nuevo si cambió.
+    """
+    global _registro
+    if _registro is None or not mismo_documento(_registro.doc, doc):
+        _registro = RegistroCapas(doc)
+    elif recargar:
+        _registro.recargar()
+    return _registro
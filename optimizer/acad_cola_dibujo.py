@@ -0,0 +1,207 @@
+"""
+Cola de Dibujo.
+Los módulos de dibujo y etiquetado encolan comandos abstractos (líneas,
+círculos, polilíneas, textos y cambios de propiedades) en vez de hablar con
+COM en cada tramo. Al vaciar la cola las entidades se crean en bloque,
+agrupadas por capa y color: cada grupo fija una sola vez la capa y el color
+actuales (CLAYER / CECOLOR) y las entidades nuevas los heredan, ahorrando
+las asignaciones Layer / Color de cada objeto.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from .acad_interface import arreglo_com
+from .feedback_logger import logger
+
+Point2D = Tuple[float, float]
+
+
+class ComandoDibujo(NamedTuple):
+    """Entidad pendiente de crear (o propiedades pendientes de aplicar)."""
+
+    tipo: str  # "linea" | "circulo" | "polilinea" | "texto" | "modificar"
+    capa: Optional[str]
+    color: Optional[int]
+    datos: Tuple[Any, ...]
+
+
+def _punto3d(p: Sequence[float]) -> Any:
+    return arreglo_com((p[0], p[1], 0.0))
+
+
+def _vertices(puntos: Sequence[Point2D]) -> Any:
+    return arreglo_com([c for p in puntos for c in (p[0], p[1])])
+
+
+class ColaDibujo:
+    """
+    Acumula comandos de dibujo y los ejecuta en bloque con vaciar().
+    Usable como contexto: al salir del 'with' se vacía la cola.
+    """
+
+    def __init__(self, msp: Any):
+        self.msp = msp
+        self._grupos: Dict[Tuple[Any, Any], List[ComandoDibujo]] = {}
+        self._modificaciones: List[ComandoDibujo] = []
+
+    def __len__(self) -> int:
+        return sum(len(c) for c in self._grupos.values()) + len(self._modificaciones)
+
+    def __enter__(self) -> "ColaDibujo":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.vaciar()
+
+    #  ENCOLAR
+
+    def agregar(self, comando: ComandoDibujo) -> None:
+        if comando.tipo == "modificar":
+            self._modificaciones.append(comando)
+        else:
+            self._grupos.setdefault((comando.capa, comando.color), []).append(comando)
+
+    def linea(self, p1: Point2D, p2: Point2D, capa: str, color: int) -> None:
+        self.agregar(ComandoDibujo("linea", capa, color, (p1, p2)))
+
+    def circulo(self, centro: Point2D, radio: float, capa: str, color: int) -> None:
+        self.agregar(ComandoDibujo("circulo", capa, color, (centro, radio)))
+
+    def polilinea(self, puntos: Sequence[Point2D], capa: str, color: int) -> None:
+        self.agregar(ComandoDibujo("polilinea", capa, color, (tuple(puntos),)))
+
+    def texto(
+        self,
+        texto: str,
+        punto: Point2D,
+        altura: float,
+        capa: str,
+        color: int,
+        rotacion: Optional[float] = None,
+        alineacion: Optional[int] = None,
+    ) -> None:
+        """Texto simple; con 'alineacion' se usa 'punto' como punto de alineación."""
+        self.agregar(
+            ComandoDibujo(
+                "texto", capa, color, (texto, punto, altura, rotacion, alineacion)
+            )
+        )
+
+    def modificar(self, handle: str, **propiedades: Any) -> None:
+        """Asigna propiedades a una entidad existente (se busca por handle)."""
+        self.agregar(
+            ComandoDibujo("modificar", None, None, (handle, tuple(propiedades.items())))
+        )
+
+    #  EJECUTAR
+
+    def vaciar(self) -> int:
+        """
+        Crea todas las entidades encoladas y aplica las modificaciones.
+        Returns:
+            int: Cantidad de comandos ejecutados con éxito.
+        """
+        if not self._grupos and not self._modificaciones:
+            return 0
+
+        grupos, self._grupos = self._grupos, {}
+        modificaciones, self._modificaciones = self._modificaciones, []
+
+        try:
+            doc = self.msp.Document
+        except Exception:
+            doc = None
+        estado = _leer_estado(doc) if doc is not None else None
+
+        hechos = 0
+        try:
+            for (capa, color), comandos in grupos.items():
+                heredan = estado is not None and _activar(doc, capa, color)
+                for cmd in comandos:
+                    try:
+                        obj = _crear(self.msp, cmd)
+                        if not heredan:
+                            obj.Layer = capa
+                            obj.Color = color
+                        hechos += 1
+                    except Exception as e:
+                        logger.warning(f"Error al dibujar {cmd.tipo}: {e}")
+        finally:
+            if estado is not None:
+                _restaurar(doc, estado)
+
+        for cmd in modificaciones:
+            handle, propiedades = cmd.datos
+            try:
+                obj = doc.HandleToObject(handle)
+                for nombre, valor in propiedades:
+                    setattr(obj, nombre, valor)
+                hechos += 1
+            except Exception as e:
+                logger.warning(f"No se pudo modificar {handle}: {e}")
+
+        return hechos
+
+
+@contextmanager
+def en_cola(destino: Any) -> Iterator[ColaDibujo]:
+    """
+    Cola donde encolar dibujos: la misma si 'destino' ya es una ColaDibujo
+    (la vacía quien la creó) o una nueva sobre el ModelSpace que se vacía al
+    salir del bloque.
+    """
+    if isinstance(destino, ColaDibujo):
+        yield destino
+        return
+    with ColaDibujo(destino) as cola:
+        yield cola
+
+
+def _crear(msp: Any, cmd: ComandoDibujo) -> Any:
+    """Una entidad por comando, con el mínimo de llamadas COM."""
+    if cmd.tipo == "linea":
+        p1, p2 = cmd.datos
+        return msp.AddLine(_punto3d(p1), _punto3d(p2))
+    if cmd.tipo == "circulo":
+        centro, radio = cmd.datos
+        return msp.AddCircle(_punto3d(centro), radio)
+    if cmd.tipo == "polilinea":
+        return msp.AddLightWeightPolyline(_vertices(cmd.datos[0]))
+    if cmd.tipo == "texto":
+        texto, punto, altura, rotacion, alineacion = cmd.datos
+        ins_pt = _punto3d(punto)
+        obj = msp.AddText(texto, ins_pt, altura)
+        if rotacion:
+            obj.Rotation = rotacion
+        if alineacion is not None:
+            obj.Alignment = alineacion
+            obj.TextAlignmentPoint = ins_pt
+        return obj
+    raise ValueError(f"Comando de dibujo desconocido: {cmd.tipo}")
+
+
+def _leer_estado(doc: Any) -> Optional[Tuple[Any, Any]]:
+    """Capa y color actuales, para restaurarlos al terminar."""
+    try:
+        return doc.ActiveLayer, doc.GetVariable("CECOLOR")
+    except Exception:
+        return None
+
+
+def _activar(doc: Any, capa: str, color: int) -> bool:
+    """Fija capa y color actuales; False si no se pudo (se asignan por objeto)."""
+    try:
+        doc.ActiveLayer = doc.Layers.Item(capa)
+        doc.SetVariable("CECOLOR", str(color))
+        return True
+    except Exception:
+        return False
+
+
+def _restaurar(doc: Any, estado: Tuple[Any, Any]) -> None:
+    capa, color = estado
+    try:
+        doc.ActiveLayer = capa
+        doc.SetVariable("CECOLOR", color)
+    except Exception as e:
+        logger.debug(f"No se pudo restaurar capa/color actuales: {e}")
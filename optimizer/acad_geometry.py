@@ -4,30 +4,71 @@ Gestiona la estructura de datos espacial (Grafo) de la red vial.
 Realiza cálculos de ruta (Pathfinding) y snaps geométricos.
 """
 
-from typing import Tuple, List, Dict, Optional, Any
+import gc
+import os
+from array import array
+from contextlib import contextmanager
+from typing import Tuple, List, Dict, Optional, Any, Iterable, Iterator, Set, NamedTuple, Union
 from .utils_math import distancia_euclidiana
-from .feedback_logger import logger
-from .constants import Geometry
+from .feedback_logger import logger, get_base_path
+from .constants import Geometry, Busqueda
+from .spatial_index import IndiceEspacial, IndiceSegmentos
+from .graph_csr import CompactGraph, INF, CAMPOS_CADENA, Ubicacion
+from .contraction import ContractionHierarchy
+from .config_loader import get_config
+from .serializacion import marcar_uso, podar_archivos
+from .componentes import ComponentesDinamicas
+from .noding import nodar_con_origen, distancia_segmentos, tamano_celda
+from .clustering import agrupar_vertices, celda_entera, CELDAS_VECINAS
 
 Point2D = Tuple[float, float]
+Segmento = Tuple[Point2D, Point2D]
+Arista = Tuple[int, int, float]
 
 
-def point_to_key(point: Point2D, tolerance: float) -> Tuple[float, float]:
+@contextmanager
+def _gc_pausado() -> Iterator[None]:
     """
-    Normaliza una coordenada aplicando un redondeo (snap) basado en tolerancia.
-    Permite que puntos infinitesimalmente cercanos se consideren el mismo nodo.
+    El GC cíclico recorre todos los objetos vivos en cada pasada y vuelve
+    cuadrática la carga de capas grandes; al editar el grafo no se crean ciclos.
     """
-    if tolerance == 0:
-        return point
-    x = round(point[0] / tolerance) * tolerance
-    y = round(point[1] / tolerance) * tolerance
-    return (x, y)
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if activo:
+            gc.enable()
+
+
+def _normalizar(p1: Point2D, p2: Point2D) -> Segmento:
+    return (float(p1[0]), float(p1[1])), (float(p2[0]), float(p2[1]))
+
+
+class PuntoAcceso(NamedTuple):
+    """
+    Nodo virtual: proyección de un punto sobre la arista nodo_a-nodo_b.
+    Parte la arista solo para la consulta que lo usa; el grafo no cambia.
+    """
+
+    punto: Point2D
+    nodo_a: int
+    nodo_b: int
+    hasta_a: float  # Distancia por la arista hasta nodo_a
+    hasta_b: float
 
 
 class NetworkGraph:
     """
     Grafo no dirigido que representa la linea de red existente.
     Usa listas de adyacencia para almacenar conexiones y pesos (distancias).
+
+    Funciona como constructor: para rutear se compila (y memoriza) una
+    versión compacta CSR con identificadores enteros (ver CompactGraph).
+
+    Las líneas insertadas con handle (entidad de origen en el dibujo) se
+    pueden quitar o reemplazar después (remove_lines, update_lines,
+    sincronizar) tocando solo la zona editada.
     """
 
     def __init__(self, tolerance: float = 0.1):
@@ -37,13 +78,182 @@ class NetworkGraph:
         Args:
             tolerance (float): Distancia mínima para fusionar nodos (metros).
         """
-        self.adj: Dict[
-            Tuple[float, float], List[Tuple[Tuple[float, float], float]]
-        ] = {}
-        self.nodes: Dict[Tuple[float, float], Point2D] = {}
+        # Nodos con id entero estable (orden de creación; no se reutilizan)
+        self._adj: Dict[int, List[Tuple[int, float]]] = {}
+        self.nodes: Dict[int, Point2D] = {}
+        self._siguiente_nodo = 0
         self.tolerance = tolerance
+        # Si las líneas se nodaron al insertarlas (None: aún no hay líneas)
+        self.nodado: Optional[bool] = None
+        # Fusiones de extremos distintos pero a <= tolerancia (near-miss)
+        self.fusiones_cercanas = 0
+        # Extremos vistos -> nodo (exactos y por celda entera de lado tolerancia).
+        # Pueden apuntar a nodos ya borrados: se descartan al consultarlos
+        self._vertices: Dict[Point2D, int] = {}
+        self._celdas_vertices: Dict[Tuple[int, int], List[Tuple[Point2D, int]]] = {}
+        # Índice espacial de nodos (se mantiene al día en add_line)
+        self._indice = IndiceEspacial(Geometry.CELDA_INDICE_ESPACIAL)
+        # Versión CSR congelada; se invalida al modificar el grafo
+        self._compilado: Optional[CompactGraph] = None
+        # Sube con cada nodo o arista agregado o quitado: quien memoriza
+        # consultas fuera del grafo (ej. IndiceEquipos) la compara
+        self.version = 0
+        # Componentes conexas, al día al insertar y al quitar aristas
+        self._componentes = ComponentesDinamicas()
+        # Líneas con handle: geometría original y aristas (piezas) que generó
+        self._lineas: Dict[str, Segmento] = {}
+        self._aristas_de: Dict[str, List[Arista]] = {}
+        # Rejilla sobre las líneas con handle (se arma al primer cambio)
+        self._indice_lineas: Optional[IndiceSegmentos] = None
+        # Rejilla sobre las aristas, para el acceso por proyección (se arma
+        # en la primera consulta y luego se mantiene al día)
+        self._indice_aristas: Optional[IndiceSegmentos] = None
+        # Jerarquía de contracción opcional (ver preparar_jerarquia)
+        self._jerarquia: Optional[ContractionHierarchy] = None
+        # Estadísticas de la última búsqueda (estrategia, nodos asentados)
+        self.ultima_busqueda: Dict[str, Any] = {}
+        # Cargado desde caché: adyacencia/extremos e índice se arman al usarlos
+        self._diferido: Optional[Dict[str, array]] = None
+        self._indice_pendiente = False
         logger.debug(f"Inicializando Grafo con tolerancia: {tolerance}m")
 
+    @property
+    def adj(self) -> Dict[int, List[Tuple[int, float]]]:
+        """Adyacencia: nodo -> [(vecino, distancia)]."""
+        self._materializar()
+        return self._adj
+
+    def _indice_listo(self) -> IndiceEspacial:
+        if self._indice_pendiente:
+            self._indice_pendiente = False
+            self._indice.insertar_lote(self.nodes.items())
+        return self._indice
+
+    def _materializar(self) -> None:
+        """Convierte lo que quedó en arreglos al cargar la caché (ver importar)."""
+        self._indice_listo()
+        arreglos = self._diferido
+        if arreglos is None:
+            return
+        self._diferido = None
+        claves = arreglos["nodos_id"]
+        off, vec, pes = (
+            arreglos["ady_offsets"],
+            arreglos["ady_vecinos"],
+            arreglos["ady_pesos"],
+        )
+        self._adj = {
+            k: list(zip(vec[off[u] : off[u + 1]], pes[off[u] : off[u + 1]]))
+            for u, k in enumerate(claves)
+        }
+        for punto, node in zip(
+            zip(arreglos["vertices_x"], arreglos["vertices_y"]), arreglos["vertices_nodo"]
+        ):
+            self._registrar_vertice(punto, node)
+
+        handles = bytes(arreglos["lineas_handles"]).decode("utf-8")
+        xy = arreglos["lineas_xy"]
+        off, nodos, pes = (
+            arreglos["aristas_offsets"],
+            arreglos["aristas_nodos"],
+            arreglos["aristas_pesos"],
+        )
+        for i, handle in enumerate(handles.split("\n") if handles else ()):
+            self._lineas[handle] = (xy[4 * i], xy[4 * i + 1]), (xy[4 * i + 2], xy[4 * i + 3])
+            self._aristas_de[handle] = [
+                (nodos[2 * e], nodos[2 * e + 1], pes[e]) for e in range(off[i], off[i + 1])
+            ]
+
+    def _registrar_vertice(self, punto: Point2D, node: int) -> None:
+        """Asocia un extremo (coordenada exacta) a un nodo existente."""
+        self._vertices[punto] = node
+        if self.tolerance > 0:
+            celda = celda_entera(punto, self.tolerance)
+            self._celdas_vertices.setdefault(celda, []).append((punto, node))
+
+    def _ubicar_vertice(self, point: Point2D) -> int:
+        """
+        Nodo para un extremo: el mismo si ya se vio la coordenada, el del
+        extremo registrado más cercano a <= tolerancia (celdas vecinas), o
+        uno nuevo. Reemplaza al antiguo redondeo a cuadrícula (point_to_key),
+        que separaba puntos cercanos a ambos lados de un borde de celda.
+        """
+        punto = (float(point[0]), float(point[1]))
+        node = self._vertices.get(punto)
+        if node is not None and node in self.nodes:
+            return node
+
+        if self.tolerance > 0:
+            cx, cy = celda_entera(punto, self.tolerance)
+            mejor = None
+            for dx, dy in CELDAS_VECINAS:
+                for q, n in self._celdas_vertices.get((cx + dx, cy + dy), ()):
+                    if n not in self.nodes:
+                        continue
+                    d = distancia_euclidiana(punto, q)
+                    if d <= self.tolerance and (mejor is None or d < mejor[0]):
+                        mejor = (d, n)
+            if mejor is not None:
+                self.fusiones_cercanas += 1
+                self._registrar_vertice(punto, mejor[1])
+                return mejor[1]
+
+        return self._crear_nodo(punto)
+
+    def _crear_nodo(self, punto: Point2D) -> int:
+        """Nodo nuevo (guarda la primera coordenada que llega)."""
+        node = self._siguiente_nodo
+        self._siguiente_nodo += 1
+        self.version += 1
+        self.nodes[node] = punto
+        self._adj[node] = []
+        self._indice.insertar(node, punto)
+        self._componentes.agregar(node)
+        self._registrar_vertice(punto, node)
+        return node
+
+    def _quitar_nodo(self, node: int) -> None:
+        """Borra un nodo que quedó sin aristas."""
+        punto = self.nodes.pop(node)
+        del self._adj[node]
+        self.version += 1
+        self._indice_listo().eliminar(node)
+        self._componentes.quitar(node)
+        if self._vertices.get(punto) == node:
+            del self._vertices[punto]
+
+    def _vecinos(self, node: int) -> Iterator[int]:
+        return (vecino for vecino, _ in self._adj[node])
+
+    def _agregar_arista(
+        self, k1: int, k2: int, dist: float, handle: Optional[str] = None
+    ) -> None:
+        """Conexión bidireccional (calle doble sentido) entre dos nodos."""
+        if k1 == k2:
+            return  # Línea más corta que la tolerancia: colapsa en un nodo
+        self._compilado = None
+        self._jerarquia = None
+        self.version += 1
+        self._componentes.unir(k1, k2)
+        self._adj[k1].append((k2, dist))
+        self._adj[k2].append((k1, dist))
+        if self._indice_aristas is not None:
+            clave = (k1, k2, dist) if k1 < k2 else (k2, k1, dist)
+            self._indice_aristas.insertar(clave, self.nodes[clave[0]], self.nodes[clave[1]])
+        if handle is not None:
+            self._aristas_de[handle].append((k1, k2, dist))
+
+    def _quitar_arista(self, k1: int, k2: int, dist: float) -> None:
+        """Inversa de _agregar_arista; separa la componente si se partió."""
+        self._compilado = None
+        self._jerarquia = None
+        self.version += 1
+        self._adj[k1].remove((k2, dist))
+        self._adj[k2].remove((k1, dist))
+        if self._indice_aristas is not None and (k2, dist) not in self._adj[k1]:
+            self._indice_aristas.eliminar((k1, k2, dist) if k1 < k2 else (k2, k1, dist))
+        self._componentes.separar(k1, k2, self._vecinos)
+
     def add_line(self, p1: Point2D, p2: Point2D) -> None:
         """
         Inserta una línea física al grafo, creando nodos y aristas.
@@ -53,101 +263,643 @@ class NetworkGraph:
         if dist < 1e-6:
             return
 
-        # Obtener claves únicas (con Snap)
-        k1 = point_to_key(p1, self.tolerance)
-        k2 = point_to_key(p2, self.tolerance)
+        self._materializar()
+        k1 = self._ubicar_vertice(p1)
+        k2 = self._ubicar_vertice(p2)
+        self._agregar_arista(k1, k2, dist)
+
+    def add_lines(
+        self,
+        segmentos: List[Segmento],
+        nodar: bool = True,
+        handles: Optional[List[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Inserta un lote de líneas. Con 'nodar' las parte primero en cruces
+        y contactos en T (ver noding.nodar_segmentos), para que se conecten
+        aunque no compartan extremos.
+
+        Los extremos del lote se agrupan con agrupar_vertices (fusión
+        transitiva a <= tolerancia), así el resultado no depende del orden
+        de las líneas como sí ocurre insertando de a una.
+
+        Args:
+            handles (Optional[List[str]]): Handle de cada línea, para poder
+                quitarla o reemplazarla después. Deben ser nuevos en el grafo.
+
+        Returns:
+            Dict: Estadísticas del nodado (si nodar) y "fusiones_cercanas".
+        """
+        self._materializar()
+        if self.nodado is None:
+            self.nodado = nodar
+        with _gc_pausado():
+            return self._add_lines(segmentos, nodar, handles)
+
+    def _add_lines(
+        self,
+        segmentos: List[Segmento],
+        nodar: bool,
+        handles: Optional[List[str]] = None,
+        contexto: List[Segmento] = (),
+    ) -> Dict[str, int]:
+        """
+        Núcleo de add_lines. Las líneas de 'contexto' (ya presentes en el
+        grafo) solo se usan para nodar contra ellas; sus piezas se descartan.
+        """
+        if handles is not None:
+            for handle, (p1, p2) in zip(handles, segmentos):
+                self._lineas[handle] = _normalizar(p1, p2)
+                self._aristas_de[handle] = []
+                if self._indice_lineas is not None:
+                    self._indice_lineas.insertar(handle, p1, p2)
+
+        stats: Dict[str, int] = {}
+        origen = range(len(segmentos))
+        if nodar:
+            n = len(segmentos)
+            piezas, origen, stats = nodar_con_origen(
+                list(segmentos) + list(contexto), self.tolerance
+            )
+            if contexto:
+                propias = [i for i, o in enumerate(origen) if o < n]
+                piezas = [piezas[i] for i in propias]
+                origen = [origen[i] for i in propias]
+            segmentos = piezas
+
+        largas = [
+            i for i, (p1, p2) in enumerate(segmentos)
+            if distancia_euclidiana(p1, p2) >= 1e-6
+        ]
+        segmentos = [segmentos[i] for i in largas]
+        origen = [origen[i] for i in largas]
+        extremos = [p for seg in segmentos for p in seg]
+        grupos, fusiones = agrupar_vertices(extremos, self.tolerance)
+
+        # Cada grupo se resuelve a un nodo por su primer extremo (en un grafo
+        # vacío no hay nodos previos con los que fusionar: se crean directo)
+        ubicar = self._ubicar_vertice if self._vertices else self._crear_nodo
+        fusiones_previas = self.fusiones_cercanas
+        nodo_de_grupo: Dict[int, int] = {}
+        for p, g in zip(extremos, grupos):
+            punto = (float(p[0]), float(p[1]))
+            node = nodo_de_grupo.get(g)
+            if node is None:
+                nodo_de_grupo[g] = ubicar(punto)
+            elif self._vertices.get(punto) not in self.nodes:
+                self._registrar_vertice(punto, node)
+        self.fusiones_cercanas += fusiones
+        stats["fusiones_cercanas"] = self.fusiones_cercanas - fusiones_previas
+
+        for i, (p1, p2) in enumerate(segmentos):
+            k1 = nodo_de_grupo[grupos[2 * i]]
+            k2 = nodo_de_grupo[grupos[2 * i + 1]]
+            handle = handles[origen[i]] if handles is not None else None
+            self._agregar_arista(k1, k2, distancia_euclidiana(p1, p2), handle)
+        return stats
+
+    def remove_lines(self, handles: Iterable[str]) -> Dict[str, int]:
+        """
+        Quita las líneas (y todas sus piezas) insertadas con esos handles.
+        Los handles desconocidos se ignoran.
+
+        Returns:
+            Dict: Estadísticas de update_lines.
+        """
+        return self.update_lines({}, quitar=handles)
+
+    def update_lines(
+        self, lineas: Dict[str, Segmento], quitar: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """
+        Agrega o reemplaza líneas por handle y quita las de 'quitar'.
+
+        Si el grafo se nodó, las líneas existentes que tocan una línea
+        editada (antes o después del cambio) se vuelven a nodar, contra sus
+        propias vecinas, para que cruces y contactos en T queden igual que
+        al construir todo de nuevo. El costo depende del tamaño del cambio,
+        no de la red: solo se revisa la zona editada (rejilla de líneas) y
+        las componentes conexas se unen o separan localmente. La versión
+        compilada (CSR) sí se vuelve a generar completa al rutear.
+
+        Las líneas insertadas sin handle no se tocan.
+
+        Returns:
+            Dict: Estadísticas del nodado, "fusiones_cercanas" y
+            "lineas_renodadas" (vecinas que se volvieron a nodar).
+        """
+        self._materializar()
+        with _gc_pausado():
+            return self._aplicar_cambios(
+                {h: _normalizar(p1, p2) for h, (p1, p2) in lineas.items()},
+                {h for h in quitar if h in self._lineas},
+            )
+
+    def sincronizar(
+        self, segmentos: Iterable[Tuple[str, Point2D, Point2D]], nodar: Optional[bool] = None
+    ) -> Dict[str, int]:
+        """
+        Lleva el grafo al estado de la capa vial actual: compara handles y
+        coordenadas con las líneas ya insertadas y aplica solo la diferencia
+        (ver update_lines).
+
+        Args:
+            segmentos: Líneas de la capa (handle, inicio, fin).
+            nodar (Optional[bool]): Por defecto, el modo con que se construyó
+                el grafo (True si está vacío).
+
+        Returns:
+            Dict: Estadísticas de update_lines más "lineas_agregadas",
+            "lineas_modificadas" y "lineas_quitadas".
+        """
+        self._materializar()
+        if nodar is None:
+            nodar = True if self.nodado is None else self.nodado
+        if self._lineas and nodar != self.nodado:
+            raise ValueError("El grafo se construyó con otro modo de nodado.")
+        self.nodado = nodar
+
+        # Recorrido lineal pero barato: solo se normalizan las líneas que cambian
+        lineas = self._lineas
+        presentes: Set[str] = set()
+        cambios: Dict[str, Segmento] = {}
+        for h, p1, p2 in segmentos:
+            presentes.add(h)
+            if lineas.get(h) != (tuple(p1), tuple(p2)):
+                cambios[h] = _normalizar(p1, p2)
+        quitar = lineas.keys() - presentes
+        modificadas = sum(1 for h in cambios if h in lineas)
 
-        # Guardar coordenadas reales (promedio o la primera que llegue)
-        if k1 not in self.nodes:
-            self.nodes[k1] = p1
-        if k2 not in self.nodes:
-            self.nodes[k2] = p2
+        with _gc_pausado():
+            stats = self._aplicar_cambios(cambios, quitar)
+        stats["lineas_agregadas"] = len(cambios) - modificadas
+        stats["lineas_modificadas"] = modificadas
+        stats["lineas_quitadas"] = len(quitar)
+        return stats
 
-        # Inicializar listas
-        if k1 not in self.adj:
-            self.adj[k1] = []
-        if k2 not in self.adj:
-            self.adj[k2] = []
+    def _indice_de_lineas(self) -> IndiceSegmentos:
+        if self._indice_lineas is None:
+            lineas = list(self._lineas.values())
+            self._indice_lineas = IndiceSegmentos(tamano_celda(lineas, self.tolerance))
+            for handle, (p1, p2) in self._lineas.items():
+                self._indice_lineas.insertar(handle, p1, p2)
+        return self._indice_lineas
 
-        # Crear conexión bidireccional (calle doble sentido)
-        self.adj[k1].append((k2, dist))
-        self.adj[k2].append((k1, dist))
+    def _lineas_cercanas(
+        self, segmentos: Iterable[Segmento], excluir: Set[str]
+    ) -> Set[str]:
+        """Handles de las líneas a <= tolerancia de alguno de los segmentos."""
+        indice = self._indice_de_lineas()
+        tol = self.tolerance
+        cercanas: Set[str] = set()
+        for a, b in segmentos:
+            candidatas = indice.en_caja(
+                min(a[0], b[0]) - tol,
+                min(a[1], b[1]) - tol,
+                max(a[0], b[0]) + tol,
+                max(a[1], b[1]) + tol,
+            )
+            for handle in candidatas:
+                if handle in excluir or handle in cercanas:
+                    continue
+                c, d = indice.segmento(handle)
+                if distancia_segmentos(a, b, c, d) <= tol:
+                    cercanas.add(handle)
+        return cercanas
+
+    def _aplicar_cambios(
+        self, agregar: Dict[str, Segmento], quitar: Set[str]
+    ) -> Dict[str, int]:
+        nodar = bool(self.nodado)
+        quitar = quitar | {h for h in agregar if h in self._lineas}
+        renodar: Set[str] = set()
+        if nodar and self._lineas and (quitar or agregar):
+            zona = [self._lineas[h] for h in quitar] + list(agregar.values())
+            renodar = self._lineas_cercanas(zona, quitar | agregar.keys())
+            agregar = dict(agregar)
+            for handle in renodar:
+                agregar[handle] = self._lineas[handle]
+            quitar |= renodar
+
+        # 1. Quitar aristas (las componentes se separan a medida)
+        sueltos: Set[int] = set()
+        for handle in quitar:
+            for k1, k2, dist in self._aristas_de.pop(handle):
+                self._quitar_arista(k1, k2, dist)
+                sueltos.add(k1)
+                sueltos.add(k2)
+            del self._lineas[handle]
+            if self._indice_lineas is not None:
+                self._indice_lineas.eliminar(handle)
+
+        # 2. Reinsertar, nodando contra las líneas vecinas que quedan
+        contexto: List[Segmento] = []
+        if nodar and agregar and self._lineas:
+            contexto = [
+                self._lineas[h]
+                for h in self._lineas_cercanas(agregar.values(), set(agregar))
+            ]
+        handles = list(agregar)
+        stats = self._add_lines([agregar[h] for h in handles], nodar, handles, contexto)
+        stats["lineas_renodadas"] = len(renodar)
+
+        # 3. Nodos que quedaron sin aristas (no reutilizados al reinsertar)
+        for node in sueltos:
+            if node in self._adj and not self._adj[node]:
+                self._quitar_nodo(node)
+        return stats
 
     def find_nearest_node(
         self, point: Point2D, max_radius: float = Geometry.RADIO_SNAP_DEFECTO
-    ) -> Tuple[Optional[Tuple[float, float]], Optional[float]]:
+    ) -> Tuple[Optional[int], Optional[float]]:
         """
         Encuentra el nodo del grafo más cercano a un punto dado (ej. un Equipo).
 
         Returns:
             Tuple(NodeKey, Distancia): Retorna None, None si no encuentra nada en el radio.
         """
-        best_node = None
-        min_dist = float("inf")
-
-        # Búsqueda lineal optimizada con caja delimitadora simple
-        for key, coords in self.nodes.items():
-            if abs(point[0] - coords[0]) > max_radius:
-                continue
-            if abs(point[1] - coords[1]) > max_radius:
-                continue
-
-            d = distancia_euclidiana(point, coords)
-            if d < min_dist:
-                min_dist = d
-                best_node = key
+        best_node, min_dist = self._indice_listo().mas_cercano(point, max_radius)
 
         # Solo logueamos si NO encuentra nada, para depurar
-        if best_node is None and min_dist > max_radius:
+        if best_node is None:
             logger.debug(f"No se encontró nodo cercano a {point} en radio {max_radius}")
-            pass
 
-        if min_dist <= max_radius:
-            return best_node, min_dist
-        return None, None
+        return best_node, min_dist
+
+    def find_k_nearest_nodes(
+        self, point: Point2D, k: int, max_radius: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Encuentra los 'k' nodos más cercanos a un punto.
+
+        Returns:
+            List[(NodeKey, Distancia)]: Ordenada de menor a mayor distancia.
+        """
+        return self._indice_listo().k_mas_cercanos(point, k, max_radius)
+
+    def find_nodes_in_radius(
+        self, point: Point2D, radius: float
+    ) -> List[Tuple[int, float]]:
+        """
+        Lista todos los nodos a una distancia <= radius del punto.
+
+        Returns:
+            List[(NodeKey, Distancia)]: Ordenada de menor a mayor distancia.
+        """
+        return self._indice_listo().en_radio(point, radius)
+
+    def _indice_de_aristas(self) -> IndiceSegmentos:
+        if self._indice_aristas is None:
+            aristas = {
+                (u, v, peso): (self.nodes[u], self.nodes[v])
+                for u, vecinos in self.adj.items()
+                for v, peso in vecinos
+                if u < v
+            }
+            indice = IndiceSegmentos(tamano_celda(list(aristas.values()), self.tolerance))
+            for clave, (p1, p2) in aristas.items():
+                indice.insertar(clave, p1, p2)
+            self._indice_aristas = indice
+        return self._indice_aristas
+
+    def find_nearest_access(
+        self, point: Point2D, max_radius: float = Geometry.RADIO_SNAP_DEFECTO
+    ) -> Tuple[Optional[Union[int, PuntoAcceso]], Optional[float]]:
+        """
+        Acceso a la red por el punto más cercano de cualquier arista, no solo
+        de sus vértices: un equipo junto a la mitad de una calle larga entra
+        por la perpendicular y no por el vértice más próximo.
+
+        Returns:
+            Tuple(Acceso, Distancia): Acceso es un nodo si la proyección cae a
+            <= tolerancia de un vértice, o un PuntoAcceso (nodo virtual que
+            aceptan get_path_length, get_path_lengths_from y same_component).
+            (None, None) si no hay red en el radio.
+        """
+        clave, dist, t = self._indice_de_aristas().mas_cercano(point, max_radius)
+        if clave is None:
+            return self.find_nearest_node(point, max_radius)  # Nodos sin aristas
+
+        u, v, peso = clave
+        (x1, y1), (x2, y2) = self.nodes[u], self.nodes[v]
+        if t * peso <= self.tolerance:
+            return u, distancia_euclidiana(point, (x1, y1))
+        if (1 - t) * peso <= self.tolerance:
+            return v, distancia_euclidiana(point, (x2, y2))
+        punto = (x1 + t * (x2 - x1), y1 + t * (y2 - y1))
+        return PuntoAcceso(punto, u, v, t * peso, (1 - t) * peso), dist
+
+    def component_id(self, node: Any) -> Optional[int]:
+        """Identificador entero de la componente conexa (isla) del nodo."""
+        if isinstance(node, PuntoAcceso):
+            node = node.nodo_a
+        if node not in self._componentes:
+            return None
+        return self._componentes.id_conjunto(node)
+
+    def same_component(self, node_a: Any, node_b: Any) -> bool:
+        """True si existe algún camino entre ambos nodos (O(1) amortizado)."""
+        if isinstance(node_a, PuntoAcceso):
+            node_a = node_a.nodo_a
+        if isinstance(node_b, PuntoAcceso):
+            node_b = node_b.nodo_a
+        if node_a not in self._componentes or node_b not in self._componentes:
+            return False
+        return self._componentes.conectados(node_a, node_b)
+
+    def component_stats(self) -> Dict[str, Any]:
+        """
+        Resumen de islas de la red vial.
+
+        Returns:
+            Dict: {"componentes": int, "tamanos": [nodos por componente, desc]}
+        """
+        return {
+            "componentes": self._componentes.num_conjuntos,
+            "tamanos": self._componentes.tamanos(),
+        }
+
+    def compilar(self) -> CompactGraph:
+        """
+        Congela el grafo en formato CSR (arreglos contiguos e ids enteros).
+        Colapsa cadenas de grado 2 y aristas paralelas (ver CompactGraph).
+        Se memoriza hasta la próxima modificación del grafo.
+        """
+        if self._compilado is None:
+            self._compilado = CompactGraph.desde_adyacencia(self.nodes, self.adj)
+            logger.debug(
+                f"Grafo compilado (CSR): {self._compilado.num_nodos} nodo(s), "
+                f"{self._compilado.num_nodos_nucleo} en el núcleo, "
+                f"{self._compilado.num_aristas} arista(s), "
+                f"{self._compilado.num_cadenas} cadena(s) colapsada(s), "
+                f"{self._compilado.memoria_bytes() / 1024:.0f} KB"
+            )
+        return self._compilado
+
+    def exportar(self) -> Dict[str, array]:
+        """
+        Estado completo en arreglos (nodos, adyacencia, extremos registrados,
+        componentes, líneas por handle y versión compilada), para guardarlo
+        con serializacion.
+        """
+        self._materializar()
+        csr = self.compilar()
+        ady_offsets = array("q", [0])
+        ady_vecinos = array("q")
+        ady_pesos = array("d")
+        for node in self.nodes:
+            for vecino, peso in self.adj[node]:
+                ady_vecinos.append(vecino)
+                ady_pesos.append(peso)
+            ady_offsets.append(len(ady_vecinos))
+        vertices = [(p, n) for p, n in self._vertices.items() if n in self.nodes]
+
+        lineas_xy = array("d")
+        aristas_offsets = array("q", [0])
+        aristas_nodos = array("q")
+        aristas_pesos = array("d")
+        for handle, (p1, p2) in self._lineas.items():
+            lineas_xy.extend((p1[0], p1[1], p2[0], p2[1]))
+            for k1, k2, dist in self._aristas_de[handle]:
+                aristas_nodos.extend((k1, k2))
+                aristas_pesos.append(dist)
+            aristas_offsets.append(len(aristas_pesos))
+
+        nodado = -1 if self.nodado is None else int(self.nodado)
+        arreglos = {
+            "meta": array(
+                "d",
+                [
+                    self.tolerance,
+                    self.fusiones_cercanas,
+                    csr.factor_heuristica,
+                    nodado,
+                    self._siguiente_nodo,
+                ],
+            ),
+            "nodos_id": array("q", self.nodes),
+            "xs": csr.xs,
+            "ys": csr.ys,
+            "ady_offsets": ady_offsets,
+            "ady_vecinos": ady_vecinos,
+            "ady_pesos": ady_pesos,
+            "vertices_x": array("d", (p[0] for p, _ in vertices)),
+            "vertices_y": array("d", (p[1] for p, _ in vertices)),
+            "vertices_nodo": array("q", (n for _, n in vertices)),
+            "componentes": array("q", self._componentes.etiquetas(self.nodes)),
+            "lineas_handles": array("B", "\n".join(self._lineas).encode("utf-8")),
+            "lineas_xy": lineas_xy,
+            "aristas_offsets": aristas_offsets,
+            "aristas_nodos": aristas_nodos,
+            "aristas_pesos": aristas_pesos,
+        }
+        for campo, arr in csr.arreglos().items():
+            if campo not in ("xs", "ys"):
+                arreglos[f"csr_{campo}"] = arr
+        return arreglos
+
+    @classmethod
+    def importar(cls, arreglos: Dict[str, array]) -> "NetworkGraph":
+        """
+        Reconstruye un grafo desde lo producido por exportar, listo para
+        rutear sin recompilar. El índice espacial, la adyacencia, el registro
+        de extremos y las líneas por handle se arman recién cuando se usan.
+        """
+        meta = arreglos["meta"]
+        grafo = cls(tolerance=meta[0])
+        grafo.fusiones_cercanas = int(meta[1])
+        grafo.nodado = None if meta[3] < 0 else bool(meta[3])
+        grafo._siguiente_nodo = int(meta[4])
+
+        claves = list(arreglos["nodos_id"])
+        xs, ys = arreglos["xs"], arreglos["ys"]
+        grafo.nodes = dict(zip(claves, zip(xs, ys)))
+        grafo._componentes = ComponentesDinamicas.desde_etiquetas(
+            claves, arreglos["componentes"]
+        )
+        # Lo que solo hace falta para consultar cercanía o seguir editando
+        grafo._diferido = arreglos
+        grafo._indice_pendiente = True
+
+        grafo._compilado = CompactGraph(
+            claves,
+            xs,
+            ys,
+            arreglos["csr_offsets"],
+            arreglos["csr_vecinos"],
+            arreglos["csr_pesos"],
+            cadenas={campo: arreglos[f"csr_{campo}"] for campo in CAMPOS_CADENA},
+            factor_heuristica=meta[2],
+        )
+        return grafo
+
+    def preparar_jerarquia(
+        self, ruta_cache: Optional[str] = None
+    ) -> ContractionHierarchy:
+        """
+        Prepara la jerarquía de contracción para consultas repetidas.
+        Reutiliza el índice guardado en disco si corresponde a esta misma red;
+        si no, lo construye y lo guarda.
+
+        Args:
+            ruta_cache (Optional[str]): Archivo del índice. Por defecto
+                'cache/jerarquia_<huella>.ch' en la carpeta del proyecto.
+        """
+        if self._jerarquia is not None:
+            return self._jerarquia
+
+        csr = self.compilar()
+        huella = csr.huella()
+        por_defecto = ruta_cache is None
+        if por_defecto:
+            ruta_cache = os.path.join(
+                get_base_path(), "cache", f"jerarquia_{huella[:16]}.ch"
+            )
+
+        ch = ContractionHierarchy.cargar(ruta_cache, huella_esperada=huella)
+        if ch is not None:
+            logger.info(f"Jerarquía de contracción cargada desde {ruta_cache}.")
+            marcar_uso(ruta_cache)
+        else:
+            ch = ContractionHierarchy.construir(csr)
+            try:
+                ch.guardar(ruta_cache)
+                if por_defecto:
+                    # Una versión por huella: se podan las más viejas
+                    podar_archivos(ruta_cache, get_config("ruteo.cache_versiones", 3))
+            except Exception as e:
+                logger.warning(f"No se pudo guardar la jerarquía: {e}")
+
+        self._jerarquia = ch
+        return ch
 
     def get_path_length(
-        self, start_node: Any, end_node: Any
+        self,
+        start_node: Any,
+        end_node: Any,
+        strategy: str = Busqueda.DIJKSTRA,
+        max_length: Optional[float] = None,
     ) -> Tuple[Optional[float], List[Point2D]]:
         """
-        Ejecuta el algoritmo de Dijkstra para encontrar la ruta más corta.
+        Calcula la ruta más corta entre dos nodos sobre la versión compilada (CSR).
+
+        Args:
+            start_node: Nodo de inicio (o PuntoAcceso, ver find_nearest_access).
+            end_node: Nodo de fin (o PuntoAcceso).
+            strategy (str): Búsqueda a usar (ver constants.Busqueda): Dijkstra,
+                A* con heurística euclidiana, sus variantes bidireccionales o
+                la jerarquía de contracción. Todas devuelven la misma distancia.
+            max_length (Optional[float]): Cota de distancia. Si el frente de
+                búsqueda la supera, se abandona sin recorrer toda la red.
+                Una ruta igual a la cota se acepta (con holgura de redondeo,
+                ver graph_csr.HOLGURA_LIMITE).
 
         Returns:
-            Tuple(DistanciaTotal, ListaDePuntos): (None, []) si no hay camino.
+            Tuple(DistanciaTotal, ListaDePuntos). Sin ruta hay dos casos:
+                (None, []): no hay camino; los nodos están en componentes
+                    distintas o alguno no pertenece al grafo.
+                (inf, []): hay camino pero es más largo que max_length; la
+                    búsqueda se cortó antes de medirlo y
+                    self.ultima_busqueda["excede_limite"] queda en True.
+            Los nodos asentados quedan en self.ultima_busqueda.
         """
-        import heapq
+        csr = self.compilar()
+        origen = self._ubicacion(csr, start_node)
+        destino = self._ubicacion(csr, end_node)
+        if origen is None or destino is None:
+            return None, []  # Nodo fuera del grafo
+
+        limite = INF if max_length is None else max_length
+        if strategy == Busqueda.CONTRACCION:
+            ch = self.preparar_jerarquia()
+            dist, camino, asentados = ch.ruta(csr, origen, destino, limite)
+        else:
+            dist, camino, asentados = csr.ruta(origen, destino, strategy, limite)
+        if dist == INF and not self.same_component(start_node, end_node):
+            dist = None  # Cortada por la cota antes de ver que son islas
+        self.ultima_busqueda = {
+            "estrategia": strategy,
+            "nodos_asentados": asentados,
+            "excede_limite": dist == INF,
+        }
+        if dist is None:
+            return None, []  # No hay camino (islas separadas)
+        if dist == INF:
+            return INF, []  # Más largo que la cota pedida
 
-        # Cola de prioridad: (distancia_acumulada, nodo_actual)
-        queue = [(0, start_node)]
-        visited = {}  # Diccionario: nodo -> (distancia, nodo_padre)
+        # Coordenadas reales de cada nodo, en orden Inicio->Fin
+        return dist, self._coordenadas_ruta(csr, start_node, camino, end_node)
 
-        visited[start_node] = (0, None)  # distancia, nodo_previo
+    @staticmethod
+    def _ubicacion(csr: CompactGraph, nodo: Any) -> Optional[Ubicacion]:
+        """Nodo o nodo virtual en términos de ids enteros del CSR."""
+        if not isinstance(nodo, PuntoAcceso):
+            return csr.nodo_de(nodo)
+        a, b = csr.nodo_de(nodo.nodo_a), csr.nodo_de(nodo.nodo_b)
+        if a is None or b is None:
+            return None
+        return ((a, nodo.hasta_a), (b, nodo.hasta_b))
 
-        while queue:
-            current_dist, current_node = heapq.heappop(queue)
+    @staticmethod
+    def _coordenadas_ruta(
+        csr: CompactGraph, inicio: Any, camino: List[int], fin: Any
+    ) -> List[Point2D]:
+        path = [csr.coordenadas(n) for n in camino]
+        if isinstance(inicio, PuntoAcceso):
+            path.insert(0, inicio.punto)
+        if isinstance(fin, PuntoAcceso):
+            path.append(fin.punto)
+        return path
 
-            if current_node == end_node:
-                # Reconstruir camino hacia atrás
-                path = []
-                curr = end_node
-                while curr is not None:
-                    path.append(self.nodes[curr])
-                    _, parent = visited[curr]
-                    curr = parent
-                return current_dist, path[
-                    ::-1
-                ]  # Se invierte para tener orden Inicio->Fin
+    def get_path_lengths_from(
+        self,
+        start_node: Any,
+        end_nodes: Iterable[Any],
+        reconstruct: bool = True,
+        max_length: Optional[float] = None,
+    ) -> Dict[Any, Tuple[float, List[Point2D]]]:
+        """
+        Rutas más cortas desde un nodo hacia varios destinos con una sola búsqueda.
+        Todas comparten el árbol de predecesores del origen.
 
-            # Si encontramos un camino más largo al que ya conocemos, ignorar
-            if current_dist > visited[current_node][0]:
-                continue
+        Args:
+            start_node: Nodo de origen (o PuntoAcceso).
+            end_nodes: Nodos de destino (o PuntoAcceso).
+            reconstruct (bool): Si es False solo se calculan distancias (ruta vacía).
+            max_length (Optional[float]): Cota de distancia para cortar la búsqueda.
+
+        Returns:
+            Dict[Nodo, (Distancia, ListaDePuntos)]: Los destinos sin camino no
+            aparecen; los que superan max_length quedan como (inf, []).
+        """
+        csr = self.compilar()
+        origen = self._ubicacion(csr, start_node)
+        if origen is None:
+            return {}
 
-            if current_node in self.adj:
-                for neighbor, weight in self.adj[current_node]:
-                    new_dist = current_dist + weight
+        destinos = {}
+        for nodo in end_nodes:
+            nid = self._ubicacion(csr, nodo)
+            if nid is not None:
+                destinos[nid] = nodo
 
-                    if neighbor not in visited or new_dist < visited[neighbor][0]:
-                        visited[neighbor] = (new_dist, current_node)
-                        heapq.heappush(queue, (new_dist, neighbor))
+        limite = INF if max_length is None else max_length
+        rutas, asentados = csr.arbol_caminos(origen, destinos, limite, reconstruct)
+        for nid in [n for n, (dist, _) in rutas.items() if dist == INF]:
+            if not self.same_component(start_node, destinos[nid]):
+                del rutas[nid]  # Islas: la cota cortó la búsqueda antes
+        self.ultima_busqueda = {
+            "estrategia": Busqueda.DIJKSTRA,
+            "nodos_asentados": asentados,
+            "excede_limite": any(dist == INF for dist, _ in rutas.values()),
+        }
 
-        return None  # No hay camino (islas separadas)
+        return {
+            destinos[nid]: (
+                dist,
+                self._coordenadas_ruta(csr, start_node, camino, destinos[nid])
+                if reconstruct and dist != INF
+                else [],
+            )
+            for nid, (dist, camino) in rutas.items()
+        }
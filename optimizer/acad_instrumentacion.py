@@ -0,0 +1,225 @@
+"""
+Instrumentación de COM (opcional).
+Envuelve la aplicación de AutoCAD en un proxy que cuenta y cronometra cada
+método o propiedad COM (histograma de latencias por miembro), separado por
+etapa del proceso. Al final de la corrida deja un resumen ordenado en el log
+y en un JSON en 'logs/', para saber si el tiempo se va en el ruteo o en COM.
+Se activa con 'cad.instrumentar_com: true' en config.yaml.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .feedback_logger import logger, get_base_path
+
+# Límites superiores (ms) de los casilleros del histograma; el último es abierto
+LIMITES_MS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+
+SIN_ETAPA = "sin_etapa"
+
+
+class EstadisticaLlamada:
+    """Conteo, tiempo total/máximo e histograma de un miembro COM."""
+
+    __slots__ = ("llamadas", "total", "maximo", "histograma")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.histograma = [0] * (len(LIMITES_MS) + 1)
+
+    def registrar(self, segundos: float) -> None:
+        self.llamadas += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        self.histograma[bisect_left(LIMITES_MS, segundos * 1000.0)] += 1
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "llamadas": self.llamadas,
+            "total_ms": round(self.total * 1000.0, 3),
+            "media_ms": round(self.total * 1000.0 / max(self.llamadas, 1), 4),
+            "maximo_ms": round(self.maximo * 1000.0, 3),
+            "histograma": self.histograma,
+        }
+
+
+class MedidorCOM:
+    """Acumula las mediciones de los proxies, por etapa del proceso."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self._etapas: Dict[str, Dict[str, EstadisticaLlamada]] = {}
+        self._duracion: Dict[str, float] = {}
+        self._etapa = SIN_ETAPA
+
+    @contextmanager
+    def etapa(self, nombre: str) -> Iterator[None]:
+        """Atribuye a 'nombre' las llamadas COM y el tiempo del bloque."""
+        previa, self._etapa = self._etapa, nombre
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self._duracion[nombre] = self._duracion.get(nombre, 0.0) + (
+                perf_counter() - t0
+            )
+            self._etapa = previa
+
+    def registrar(self, miembro: str, segundos: float) -> None:
+        por_miembro = self._etapas.setdefault(self._etapa, {})
+        est = por_miembro.get(miembro)
+        if est is None:
+            est = por_miembro[miembro] = EstadisticaLlamada()
+        est.registrar(segundos)
+
+    def resumen(self) -> Dict[str, Any]:
+        """Etapas con su duración, tiempo en COM y miembros ordenados por costo."""
+        etapas = {}
+        nombres = list(self._duracion) + [
+            e for e in self._etapas if e not in self._duracion
+        ]
+        for nombre in nombres:
+            miembros = sorted(
+                self._etapas.get(nombre, {}).items(),
+                key=lambda kv: kv[1].total,
+                reverse=True,
+            )
+            etapas[nombre] = {
+                "duracion_ms": round(self._duracion.get(nombre, 0.0) * 1000.0, 3),
+                "com_ms": round(sum(e.total for _, e in miembros) * 1000.0, 3),
+                "llamadas": sum(e.llamadas for _, e in miembros),
+                "miembros": {m: e.como_dict() for m, e in miembros},
+            }
+        return {"limites_ms": list(LIMITES_MS), "etapas": etapas}
+
+    def reportar(self, ruta: Optional[str] = None, top: int = 10) -> Optional[str]:
+        """
+        Escribe el resumen en el log (los 'top' miembros más costosos por
+        etapa) y en un JSON.
+        Returns:
+            str: Ruta del JSON, o None si no se pudo escribir.
+        """
+        resumen = self.resumen()
+        for nombre, etapa in resumen["etapas"].items():
+            logger.info(
+                f"[COM] {nombre}: {etapa['llamadas']} llamada(s), "
+                f"{etapa['com_ms']:.0f} ms en COM de {etapa['duracion_ms']:.0f} ms."
+            )
+            for miembro, est in list(etapa["miembros"].items())[:top]:
+                logger.info(
+                    f"[COM]   {miembro}: {est['llamadas']} x {est['media_ms']:.3f} ms "
+                    f"= {est['total_ms']:.0f} ms (máx {est['maximo_ms']:.1f} ms)"
+                )
+
+        if ruta is None:
+            log_dir = os.path.join(get_base_path(), "logs")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            ruta = os.path.join(log_dir, f"com_{timestamp}.json")
+        try:
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(resumen, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el resumen COM: {e}")
+            return None
+        logger.info(f"[COM] Resumen guardado en {ruta}")
+        return ruta
+
+
+medidor_com = MedidorCOM()
+
+
+class ProxyCOM:
+    """
+    Envoltorio de un objeto COM que mide cada propiedad leída o asignada y
+    cada método llamado. Los objetos COM que devuelve quedan envueltos también.
+    """
+
+    __slots__ = ("_obj", "_etiqueta", "_medidor")
+
+    def __init__(self, obj: Any, etiqueta: str, medidor: MedidorCOM):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_etiqueta", etiqueta)
+        object.__setattr__(self, "_medidor", medidor)
+
+    def __getattr__(self, nombre: str) -> Any:
+        t0 = perf_counter()
+        valor = getattr(self._obj, nombre)
+        dt = perf_counter() - t0
+        if callable(valor) and not _es_com(valor):
+            return _MetodoMedido(valor, self._etiqueta, nombre, self._medidor)
+        self._medidor.registrar(f"{self._etiqueta}.{nombre}", dt)
+        return _envolver(valor, nombre, self._medidor)
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        valor = desenvolver(valor)
+        t0 = perf_counter()
+        setattr(self._obj, nombre, valor)
+        self._medidor.registrar(f"{self._etiqueta}.{nombre}=", perf_counter() - t0)
+
+    def __eq__(self, otro: Any) -> bool:
+        return self._obj == desenvolver(otro)
+
+    def __hash__(self) -> int:
+        return hash(self._obj)
+
+    def __repr__(self) -> str:
+        return f"<ProxyCOM {self._etiqueta}: {self._obj!r}>"
+
+
+class _MetodoMedido:
+    __slots__ = ("_metodo", "_miembro", "_nombre", "_medidor")
+
+    def __init__(self, metodo: Any, etiqueta: str, nombre: str, medidor: MedidorCOM):
+        self._metodo = metodo
+        self._miembro = f"{etiqueta}.{nombre}()"
+        self._nombre = nombre
+        self._medidor = medidor
+
+    def __call__(self, *args: Any) -> Any:
+        args = tuple(desenvolver(a) for a in args)
+        t0 = perf_counter()
+        try:
+            res = self._metodo(*args)
+        finally:
+            self._medidor.registrar(self._miembro, perf_counter() - t0)
+        return _envolver(res, self._nombre, self._medidor)
+
+
+def _es_com(valor: Any) -> bool:
+    return isinstance(valor, ProxyCOM) or hasattr(valor, "_oleobj_")
+
+
+def _envolver(valor: Any, etiqueta: str, medidor: MedidorCOM) -> Any:
+    if isinstance(valor, ProxyCOM):
+        return valor
+    if hasattr(valor, "_oleobj_"):
+        return ProxyCOM(valor, etiqueta, medidor)
+    if isinstance(valor, tuple) and any(hasattr(v, "_oleobj_") for v in valor):
+        # Ej.: GetAttributes() u Offset() devuelven tuplas de objetos
+        return tuple(_envolver(v, etiqueta, medidor) for v in valor)
+    return valor
+
+
+def desenvolver(valor: Any) -> Any:
+    """Objeto COM real detrás de un proxy (o el valor tal cual)."""
+    if isinstance(valor, ProxyCOM):
+        return object.__getattribute__(valor, "_obj")
+    return valor
+
+
+def instrumentar(
+    obj: Any, etiqueta: str = "Application", medidor: Optional[MedidorCOM] = None
+) -> ProxyCOM:
+    """Envuelve 'obj' (normalmente la aplicación de AutoCAD) para medirlo."""
+    return ProxyCOM(desenvolver(obj), etiqueta, medidor or medidor_com)
+
@@ -1,23 +1,238 @@
 """
 Módulo de interfaz con AutoCAD.
-Gestiona la conexión COM con la aplicación activa.
+Gestiona la conexión con la aplicación activa a través de un backend
+intercambiable: COM (AutoCAD real, solo Windows) o un modelo en memoria
+(ver acad_memoria) para correr, perfilar y medir el pipeline sin AutoCAD.
 """
 
-import win32com.client
+import threading
+import time
+from abc import ABC, abstractmethod
+from .acad_instrumentacion import desenvolver, instrumentar
+from .config_loader import get_config
 from .feedback_logger import logger
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict, Sequence
+
+
+class BackendCAD(ABC):
+    """
+    Origen del objeto 'Application' que usa todo el paquete.
+    El objeto devuelto debe exponer el subconjunto de la API ActiveX de
+    AutoCAD que consumen los módulos:
+      - Escaneo: ActiveDocument.ModelSpace (Count, Item) y SelectionSets
+        (Add, Item, Select con filtros DXF, Delete).
+      - Bloques: EffectiveName / Name, InsertionPoint, GetAttributes(),
+        GetDynamicBlockProperties().
+      - Dibujo: AddLine, AddCircle, AddLightWeightPolyline, AddText,
+        HandleToObject, ActiveLayer y Get/SetVariable.
+      - Capas: Layers (Count, Item, Add).
+    """
+
+    nombre = "base"
+
+    @abstractmethod
+    def aplicacion(self) -> Any:
+        """Objeto 'Application' (lanza excepción si no hay conexión)."""
+
+    def inicializar_hilo(self) -> None:
+        """Preparación necesaria en cada hilo que use el backend."""
+
+    def vigilar(
+        self, doc: Any, al_cambiar: Callable[[], None]
+    ) -> Optional[Callable[[], None]]:
+        """
+        Llama a 'al_cambiar' cada vez que se agrega, borra o modifica una
+        entidad de 'doc' (eventos ObjectAdded / ObjectErased /
+        ObjectModified del documento). Devuelve la función que deja de
+        vigilar, o None si el backend no ofrece eventos.
+        """
+        return None
+
+
+class BackendCOM(BackendCAD):
+    """AutoCAD real vía win32com (importado recién al conectar)."""
+
+    nombre = "com"
+
+    def aplicacion(self) -> Any:
+        import win32com.client
+
+        return win32com.client.Dispatch("AutoCAD.Application")
+
+    def inicializar_hilo(self) -> None:
+        import pythoncom
+
+        pythoncom.CoInitialize()
+
+    def vigilar(
+        self, doc: Any, al_cambiar: Callable[[], None]
+    ) -> Optional[Callable[[], None]]:
+        """
+        Los eventos COM llegan al hilo que los conectó y solo mientras ese
+        hilo procesa mensajes; las herramientas usan hilos de corta vida,
+        así que la conexión vive en un hilo propio que bombea mensajes.
+        """
+        try:
+            import pythoncom
+        except ImportError:
+            return None
+        try:
+            flujo = pythoncom.CoMarshalInterThreadInterfaceInStream(
+                pythoncom.IID_IDispatch, desenvolver(doc)._oleobj_
+            )
+        except Exception as e:
+            logger.debug(f"No se pudo pasar el documento al hilo de eventos: {e}")
+            return None
+
+        estado: Dict[str, bool] = {}
+        listo = threading.Event()
+        hilo = threading.Thread(
+            target=_bombear_eventos,
+            args=(flujo, al_cambiar, estado, listo),
+            name="EventosCAD",
+            daemon=True,
+        )
+        hilo.start()
+        listo.wait(10.0)
+        if not estado.get("conectado"):
+            estado["detener"] = True
+            return None
+        return lambda: estado.__setitem__("detener", True)
+
+
+def _bombear_eventos(
+    flujo: Any,
+    al_cambiar: Callable[[], None],
+    estado: Dict[str, bool],
+    listo: threading.Event,
+) -> None:
+    """Hilo de eventos del documento (ver BackendCOM.vigilar)."""
+    import pythoncom
+    import win32com.client
+
+    class _Eventos:
+        def OnObjectAdded(self, *args):
+            al_cambiar()
+
+        def OnObjectErased(self, *args):
+            al_cambiar()
+
+        def OnObjectModified(self, *args):
+            al_cambiar()
+
+    pythoncom.CoInitialize()
+    try:
+        try:
+            doc = win32com.client.Dispatch(
+                pythoncom.CoGetInterfaceAndReleaseStream(
+                    flujo, pythoncom.IID_IDispatch
+                )
+            )
+            eventos = win32com.client.WithEvents(doc, _Eventos)
+            estado["conectado"] = True
+        except Exception as e:
+            logger.debug(f"El documento no ofrece eventos: {e}")
+            return
+        finally:
+            listo.set()
+        while not estado.get("detener"):
+            pythoncom.PumpWaitingMessages()
+            time.sleep(0.05)
+        del eventos
+    finally:
+        pythoncom.CoUninitialize()
+
+
+_backend: Optional[BackendCAD] = None
+
+
+def backend_activo() -> BackendCAD:
+    """
+    Backend en uso. Si no se fijó con usar_backend() se elige según
+    'cad.backend' ("com" | "memoria") de config.yaml.
+    """
+    global _backend
+    if _backend is None:
+        if get_config("cad.backend", "com") == "memoria":
+            from .acad_memoria import BackendMemoria
+
+            _backend = BackendMemoria(
+                latencia_ms=get_config("cad.latencia_memoria_ms", 0.0)
+            )
+        else:
+            _backend = BackendCOM()
+    return _backend
+
+
+def usar_backend(backend: Optional[BackendCAD]) -> Optional[BackendCAD]:
+    """
+    Fija el backend (None = volver a elegirlo desde config.yaml).
+    Returns:
+        El backend fijado anteriormente, para poder restaurarlo.
+    """
+    global _backend
+    anterior, _backend = _backend, backend
+    return anterior
+
+
+def inicializar_com() -> None:
+    """Inicializa el hilo actual para el backend (CoInitialize en COM)."""
+    try:
+        backend_activo().inicializar_hilo()
+    except Exception as e:
+        logger.warning(f"No se pudo inicializar el hilo para CAD: {e}")
 
 
 def get_acad_com() -> Optional[Any]:
     """
-    Devuelve la instancia COM de AutoCAD activa mediante COM.
+    Devuelve la instancia de AutoCAD activa según el backend (COM o memoria).
+    Con 'cad.instrumentar_com' activo se devuelve envuelto en un ProxyCOM
+    que mide cada llamada (ver acad_instrumentacion).
     Returns:
         Optional[Any]: Objeto 'AutoCAD.Application' si la conexión es exitosa,
                        None si falla o AutoCAD no está abierto.
     """
     try:
-        acad = win32com.client.Dispatch("AutoCAD.Application")
+        acad = backend_activo().aplicacion()
+        if get_config("cad.instrumentar_com", False):
+            acad = instrumentar(acad, "Application")
         return acad
     except Exception as e:
         logger.critical(f"Error critico conectando con COM: {e}")
         return None
+
+
+def arreglo_com(valores: Sequence[Any], tipo: str = "R8") -> Any:
+    """
+    Arreglo tipado como lo espera COM (VARIANT de VT_ARRAY | VT_<tipo>).
+    Sin win32com (backend en memoria fuera de Windows) se devuelve la tupla.
+    """
+    try:
+        import pythoncom
+        import win32com.client
+    except ImportError:
+        return tuple(valores)
+    vt = pythoncom.VT_ARRAY | getattr(pythoncom, f"VT_{tipo}")
+    return win32com.client.VARIANT(vt, tuple(valores))
+
+
+def variante_vacia() -> Any:
+    """
+    Argumento opcional omitido (VARIANT VT_EMPTY): con enlace tardío no
+    todas las versiones de pywin32 aceptan None en su lugar.
+    Sin win32com se devuelve None.
+    """
+    try:
+        import pythoncom
+        import win32com.client
+    except ImportError:
+        return None
+    return win32com.client.VARIANT(pythoncom.VT_EMPTY, None)
+
+
+def mismo_documento(a: Any, b: Any) -> bool:
+    """Compara referencias COM (mismo objeto subyacente) sin ir a AutoCAD."""
+    try:
+        return a is b or a == b
+    except Exception:
+        return False
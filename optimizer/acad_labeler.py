@@ -2,13 +2,12 @@
 Módulo de Etiquetado (Labeler).
 Encargado de insertar textos inteligentes (Smart Labels) en el plano.
 Maneja la rotación y posición automática basada en la geometría del tramo.
+Las etiquetas se encolan si se recibe una ColaDibujo en lugar del ModelSpace.
 """
 
 from typing import Optional, Tuple, Any, List
-import win32com.client
-import pythoncom
+from .acad_cola_dibujo import en_cola
 from .constants import ASI, Geometry, SysLayers
-from .feedback_logger import logger
 from .utils_math import (
     obtener_angulo_legible,
     obtener_punto_medio,
@@ -43,27 +42,20 @@ def insertar_etiqueta_tramo(
     vec_off = obtener_vectores_offset(p1, p2, offset)
     angulo = obtener_angulo_legible(p1, p2)
 
-    # Posición final (X, Y, Z=0)
-    pos_final = (mid_pt[0] + vec_off[0], mid_pt[1] + vec_off[1], 0.0)
-
-    try:
-        ins_pt = win32com.client.VARIANT(
-            pythoncom.VT_ARRAY | pythoncom.VT_R8, pos_final
+    # Posición final (X, Y)
+    pos_final = (mid_pt[0] + vec_off[0], mid_pt[1] + vec_off[1])
+
+    with en_cola(msp) as cola:
+        cola.texto(
+            texto,
+            pos_final,
+            Geometry.TEXT_HEIGHT,
+            capa,
+            ASI.MAGENTA,
+            rotacion=angulo,
+            alineacion=Geometry.TEXT_ALIGNMENT_CENTER,
         )
 
-        # Crear texto
-        txt_obj = msp.AddText(texto, ins_pt, Geometry.TEXT_HEIGHT)
-        txt_obj.Rotation = angulo
-        txt_obj.Alignment = Geometry.TEXT_ALIGNMENT_CENTER
-        txt_obj.TextAlignmentPoint = ins_pt
-
-        # Asignar propiedades
-        txt_obj.Layer = capa
-        txt_obj.Color = ASI.MAGENTA
-
-    except Exception as e:
-        logger.error(f"Error al etiquetar tramo: {e}")
-
 
 def insertar_etiqueta_reserva(
     msp: Any,
@@ -87,15 +79,7 @@ def insertar_etiqueta_reserva(
     pos = (
         punto_destino[0] + desplazamiento_x,
         punto_destino[1] + desplazamiento_y,
-        0.0,
     )
 
-    try:
-        ins_pt = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, pos)
-
-        txt_obj = msp.AddText(texto, ins_pt, 0.8)
-        txt_obj.Color = ASI.CYAN
-        txt_obj.Layer = capa
-
-    except Exception as e:
-        logger.error(f"Error al etiquetar reserva: {e}")
+    with en_cola(msp) as cola:
+        cola.texto(texto, pos, 0.8, capa, ASI.CYAN)
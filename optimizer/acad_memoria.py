@@ -0,0 +1,595 @@
+"""
+Backend CAD en memoria.
+Reproduce, sin AutoCAD ni win32com, el subconjunto de la API ActiveX que usa
+el paquete (ModelSpace, conjuntos de selección con filtros DXF, capas,
+creación de entidades, variables de sistema y marcas de deshacer), para
+correr y medir el pipeline completo en cualquier plataforma.
+
+Cada acceso a un miembro COM (nombres en PascalCase: propiedades leídas o
+asignadas y métodos) cuenta como un viaje y puede demorarse una latencia
+configurable, para simular la velocidad real de AutoCAD. Los ayudantes en
+minúsculas (agregar, insertar_bloque, ...) sirven para poblar el dibujo y
+no cuentan.
+"""
+
+import re
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .acad_instrumentacion import desenvolver
+from .acad_interface import BackendCAD
+from .acad_query import TIPOS_DXF
+
+_DXF = {**TIPOS_DXF, "AcDbCircle": "CIRCLE"}
+_POR_CAPA = 256  # acByLayer
+_SELECCIONAR_TODO = 5  # acSelectionSetAll
+_CODIGOS_FILTRO = (0, 2, 8, 410)
+
+
+class _Contexto:
+    """Latencia simulada y contador de viajes, compartidos por un dibujo."""
+
+    __slots__ = ("latencia", "llamadas")
+
+    def __init__(self, latencia_ms: float):
+        self.latencia = max(latencia_ms, 0.0) / 1000.0
+        self.llamadas = 0
+
+    def viaje(self) -> None:
+        self.llamadas += 1
+        if self.latencia > 0:
+            # Espera activa: time.sleep no respeta fracciones de milisegundo
+            fin = perf_counter() + self.latencia
+            while perf_counter() < fin:
+                pass
+
+
+def _es_miembro_com(nombre: str) -> bool:
+    return nombre[:1].isupper()
+
+
+class _ObjetoMemoria:
+    """Base: cuenta (y demora) cada acceso a un miembro en PascalCase."""
+
+    # Lo marca como objeto COM para acad_instrumentacion
+    _oleobj_ = None
+
+    def __init__(self, ctx: _Contexto, **propiedades: Any):
+        object.__setattr__(self, "_ctx", ctx)
+        for nombre, valor in propiedades.items():
+            object.__setattr__(self, nombre, valor)
+
+    def __getattribute__(self, nombre: str) -> Any:
+        if _es_miembro_com(nombre):
+            object.__getattribute__(self, "_ctx").viaje()
+        return object.__getattribute__(self, nombre)
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        if _es_miembro_com(nombre):
+            self._ctx.viaje()
+        object.__setattr__(self, nombre, valor)
+
+    def _leer(self, nombre: str) -> Any:
+        """Valor de un miembro sin contar el viaje (uso interno)."""
+        return object.__getattribute__(self, nombre)
+
+
+def _valores(arreglo: Any) -> Tuple[Any, ...]:
+    """Contenido de un VARIANT de win32com o de una secuencia Python."""
+    return tuple(getattr(arreglo, "value", arreglo))
+
+
+def _punto(arreglo: Any) -> Tuple[float, float, float]:
+    v = _valores(arreglo)
+    return (float(v[0]), float(v[1]), float(v[2]) if len(v) > 2 else 0.0)
+
+
+#  ENTIDADES
+
+
+class EntidadMemoria(_ObjetoMemoria):
+    """Entidad del ModelSpace (las propiedades dependen de ObjectName)."""
+
+    def __init__(self, doc: "DocumentoMemoria", object_name: str, **props: Any):
+        capa, color = doc._propiedades_actuales()
+        props.setdefault("Layer", capa)
+        props.setdefault("Color", color)
+        super().__init__(
+            doc._ctx, ObjectName=object_name, Handle=doc._nuevo_handle(), **props
+        )
+        object.__setattr__(self, "_doc", doc)
+        object.__setattr__(self, "_atributos", ())
+        object.__setattr__(self, "_dinamicas", ())
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        super().__setattr__(nombre, valor)
+        if _es_miembro_com(nombre):
+            self._doc._notificar()  # ObjectModified
+
+    def Delete(self) -> None:
+        self._doc._eliminar(self)
+
+    def GetAttributes(self) -> Tuple["_ObjetoMemoria", ...]:
+        return self._atributos
+
+    def GetDynamicBlockProperties(self) -> Tuple["_ObjetoMemoria", ...]:
+        return self._dinamicas
+
+    def __repr__(self) -> str:
+        return f"<{self._leer('ObjectName')} {self._leer('Handle')}>"
+
+
+class ModelSpaceMemoria(_ObjetoMemoria):
+    """Colección de entidades del dibujo, en orden de creación."""
+
+    def __init__(self, doc: "DocumentoMemoria"):
+        super().__init__(doc._ctx)
+        object.__setattr__(self, "_doc", doc)
+        object.__setattr__(self, "_entidades", [])
+
+    @property
+    def Count(self) -> int:
+        return len(self._entidades)
+
+    @property
+    def Document(self) -> "DocumentoMemoria":
+        return self._doc
+
+    def Item(self, indice: int) -> EntidadMemoria:
+        return self._entidades[indice]
+
+    def AddLine(self, p1: Any, p2: Any) -> EntidadMemoria:
+        return self._nueva(
+            "AcDbLine", StartPoint=_punto(p1), EndPoint=_punto(p2), LinetypeScale=1.0
+        )
+
+    def AddCircle(self, centro: Any, radio: float) -> EntidadMemoria:
+        return self._nueva("AcDbCircle", Center=_punto(centro), Radius=float(radio))
+
+    def AddLightWeightPolyline(self, vertices: Any) -> EntidadMemoria:
+        return self._nueva(
+            "AcDbPolyline",
+            Coordinates=tuple(float(c) for c in _valores(vertices)),
+            ConstantWidth=0.0,
+            LinetypeScale=1.0,
+        )
+
+    def AddText(self, texto: str, punto: Any, altura: float) -> EntidadMemoria:
+        return self._nueva(
+            "AcDbText",
+            TextString=texto,
+            InsertionPoint=_punto(punto),
+            Height=float(altura),
+            Rotation=0.0,
+            Alignment=0,
+            TextAlignmentPoint=(0.0, 0.0, 0.0),
+        )
+
+    def AddMText(self, punto: Any, ancho: float, texto: str) -> EntidadMemoria:
+        return self._nueva(
+            "AcDbMText", TextString=texto, InsertionPoint=_punto(punto), Width=ancho
+        )
+
+    def InsertBlock(
+        self,
+        punto: Any,
+        nombre: str,
+        escala_x: float = 1.0,
+        escala_y: float = 1.0,
+        escala_z: float = 1.0,
+        rotacion: float = 0.0,
+    ) -> EntidadMemoria:
+        return self._nueva(
+            "AcDbBlockReference",
+            Name=nombre,
+            EffectiveName=nombre,
+            InsertionPoint=_punto(punto),
+            XScaleFactor=escala_x,
+            YScaleFactor=escala_y,
+            ZScaleFactor=escala_z,
+            Rotation=rotacion,
+            HasAttributes=False,
+            IsDynamicBlock=False,
+        )
+
+    #  AYUDANTES PARA POBLAR EL DIBUJO (sin viajes)
+
+    def agregar(
+        self, object_name: str, capa: Optional[str] = None, **props: Any
+    ) -> EntidadMemoria:
+        """Entidad con las propiedades dadas tal cual (capa '0' por defecto)."""
+        self._doc._leer("Layers")._asegurar(capa or "0")
+        return self._nueva(object_name, Layer=capa or "0", **props)
+
+    def linea(
+        self, p1: Sequence[float], p2: Sequence[float], capa: str
+    ) -> EntidadMemoria:
+        return self.agregar(
+            "AcDbLine", capa, StartPoint=_punto(p1), EndPoint=_punto(p2)
+        )
+
+    def polilinea(
+        self, puntos: Iterable[Sequence[float]], capa: str
+    ) -> EntidadMemoria:
+        coords = tuple(float(c) for p in puntos for c in (p[0], p[1]))
+        return self.agregar(
+            "AcDbPolyline",
+            capa,
+            Coordinates=coords,
+            ConstantWidth=0.0,
+            LinetypeScale=1.0,
+        )
+
+    def texto(self, texto: str, punto: Sequence[float], capa: str) -> EntidadMemoria:
+        return self.agregar(
+            "AcDbText", capa, TextString=texto, InsertionPoint=_punto(punto)
+        )
+
+    def insertar_bloque(
+        self,
+        nombre: str,
+        punto: Sequence[float],
+        capa: Optional[str] = None,
+        atributos: Optional[Dict[str, str]] = None,
+        dinamicas: Optional[Dict[str, Any]] = None,
+    ) -> EntidadMemoria:
+        """
+        Referencia de bloque. Con 'dinamicas' se inserta como AutoCAD inserta
+        un bloque dinámico modificado: anónimo ('*U<n>') con EffectiveName real.
+        """
+        ctx = self._ctx
+        anonimo = f"*U{len(self._entidades)}" if dinamicas else nombre
+        ref = self.agregar(
+            "AcDbBlockReference",
+            capa,
+            Name=anonimo,
+            EffectiveName=nombre,
+            InsertionPoint=_punto(punto),
+            HasAttributes=bool(atributos),
+            IsDynamicBlock=bool(dinamicas),
+        )
+        object.__setattr__(
+            ref,
+            "_atributos",
+            tuple(
+                _ObjetoMemoria(ctx, TagString=tag, TextString=valor)
+                for tag, valor in (atributos or {}).items()
+            ),
+        )
+        object.__setattr__(
+            ref,
+            "_dinamicas",
+            tuple(
+                _ObjetoMemoria(ctx, PropertyName=prop, Value=valor)
+                for prop, valor in (dinamicas or {}).items()
+            ),
+        )
+        return ref
+
+    def _nueva(self, object_name: str, **props: Any) -> EntidadMemoria:
+        ent = EntidadMemoria(self._doc, object_name, **props)
+        self._entidades.append(ent)
+        self._doc._por_handle[ent._leer("Handle")] = ent
+        self._doc._notificar()  # ObjectAdded
+        return ent
+
+
+#  CAPAS
+
+
+class CapasMemoria(_ObjetoMemoria):
+    """Tabla de capas (AutoCAD no distingue mayúsculas en los nombres)."""
+
+    def __init__(self, ctx: _Contexto):
+        super().__init__(ctx)
+        object.__setattr__(self, "_capas", {})
+        self._asegurar("0")
+
+    @property
+    def Count(self) -> int:
+        return len(self._capas)
+
+    def Item(self, indice: Any) -> _ObjetoMemoria:
+        if isinstance(indice, int):
+            return list(self._capas.values())[indice]
+        return self._capas[str(indice).upper()]
+
+    def Add(self, nombre: str) -> _ObjetoMemoria:
+        # Como en AutoCAD: si ya existe se devuelve la existente
+        return self._asegurar(nombre)
+
+    def _asegurar(self, nombre: str) -> _ObjetoMemoria:
+        clave = nombre.upper()
+        if clave not in self._capas:
+            self._capas[clave] = _ObjetoMemoria(self._ctx, Name=nombre, Color=7)
+        return self._capas[clave]
+
+
+#  CONJUNTOS DE SELECCIÓN
+
+
+class ConjuntoMemoria(_ObjetoMemoria):
+    """SelectionSet: el filtro se resuelve del lado del 'servidor' (sin viajes)."""
+
+    def __init__(self, doc: "DocumentoMemoria", nombre: str):
+        super().__init__(doc._ctx, Name=nombre)
+        object.__setattr__(self, "_doc", doc)
+        object.__setattr__(self, "_seleccion", [])
+
+    @property
+    def Count(self) -> int:
+        return len(self._seleccion)
+
+    def Item(self, indice: int) -> EntidadMemoria:
+        return self._seleccion[indice]
+
+    def Select(
+        self,
+        modo: int,
+        p1: Any = None,
+        p2: Any = None,
+        tipos: Any = None,
+        datos: Any = None,
+    ) -> None:
+        if modo != _SELECCIONAR_TODO:
+            raise ValueError(f"Modo de selección no soportado: {modo}")
+        filtro = list(zip(_valores(tipos), _valores(datos))) if tipos else []
+        for codigo, _ in filtro:
+            if codigo not in _CODIGOS_FILTRO:
+                raise ValueError(f"Código DXF de filtro no soportado: {codigo}")
+        self._seleccion[:] = [
+            ent
+            for ent in self._doc._leer("ModelSpace")._entidades
+            if all(_cumple(ent, codigo, patron) for codigo, patron in filtro)
+        ]
+
+    def Delete(self) -> None:
+        conjuntos = self._doc._leer("SelectionSets")._conjuntos
+        conjuntos.pop(self._leer("Name").upper(), None)
+
+
+class ConjuntosMemoria(_ObjetoMemoria):
+    def __init__(self, doc: "DocumentoMemoria"):
+        super().__init__(doc._ctx)
+        object.__setattr__(self, "_doc", doc)
+        object.__setattr__(self, "_conjuntos", {})
+
+    @property
+    def Count(self) -> int:
+        return len(self._conjuntos)
+
+    def Item(self, nombre: str) -> ConjuntoMemoria:
+        return self._conjuntos[nombre.upper()]
+
+    def Add(self, nombre: str) -> ConjuntoMemoria:
+        if nombre.upper() in self._conjuntos:
+            raise ValueError(f"El conjunto '{nombre}' ya existe")
+        conjunto = ConjuntoMemoria(self._doc, nombre)
+        self._conjuntos[nombre.upper()] = conjunto
+        return conjunto
+
+
+def _cumple(ent: EntidadMemoria, codigo: int, patron: str) -> bool:
+    """Una condición (código DXF, patrón) del filtro sobre una entidad."""
+    if codigo == 410:
+        return coincide_comodin("Model", patron)
+    if codigo == 0:
+        valor = _DXF.get(ent._leer("ObjectName"), "")
+    elif codigo == 8:
+        valor = ent._leer("Layer")
+    else:
+        try:
+            valor = ent._leer("Name")
+        except AttributeError:
+            return False
+    return coincide_comodin(valor, patron)
+
+
+def coincide_comodin(texto: str, patron: str) -> bool:
+    """
+    Equivalente a wcmatch de AutoCAD: patrones separados por coma, con
+    # (dígito), @ (letra), . (no alfanumérico), * , ?, ~ (negación),
+    [...] y ` (escape). No distingue mayúsculas.
+    """
+    return any(regla(texto) for regla in _reglas(patron))
+
+
+@lru_cache(maxsize=256)
+def _reglas(patron: str) -> Tuple[Any, ...]:
+    reglas = []
+    for parte in _partir_comas(patron):
+        negar = parte.startswith("~")
+        regex = re.compile(_traducir(parte[1:] if negar else parte), re.I | re.S)
+        if negar:
+            reglas.append(lambda t, r=regex: r.fullmatch(t) is None)
+        else:
+            reglas.append(lambda t, r=regex: r.fullmatch(t) is not None)
+    return tuple(reglas)
+
+
+def _partir_comas(patron: str) -> List[str]:
+    partes, actual, escapado = [], [], False
+    for c in patron:
+        if escapado:
+            actual.append("`" + c)
+            escapado = False
+        elif c == "`":
+            escapado = True
+        elif c == ",":
+            partes.append("".join(actual))
+            actual = []
+        else:
+            actual.append(c)
+    partes.append("".join(actual))
+    return partes
+
+
+def _traducir(patron: str) -> str:
+    equivalentes = {
+        "#": "[0-9]",
+        "@": "[A-Za-z]",
+        ".": "[^A-Za-z0-9]",
+        "*": ".*",
+        "?": ".",
+    }
+    salida, i = [], 0
+    while i < len(patron):
+        c = patron[i]
+        if c == "`" and i + 1 < len(patron):
+            salida.append(re.escape(patron[i + 1]))
+            i += 2
+            continue
+        if c == "[":
+            fin = patron.find("]", i + 1)
+            if fin > i:
+                clase = patron[i + 1 : fin]
+                negar = clase.startswith("~")
+                clase = re.escape(clase[1:] if negar else clase).replace("\\-", "-")
+                salida.append(f"[{'^' if negar else ''}{clase}]")
+                i = fin + 1
+                continue
+        salida.append(equivalentes.get(c, re.escape(c)))
+        i += 1
+    return "".join(salida)
+
+
+#  DOCUMENTO Y APLICACIÓN
+
+
+class DocumentoMemoria(_ObjetoMemoria):
+    """Documento activo: ModelSpace, capas, conjuntos y variables de sistema."""
+
+    def __init__(self, ctx: _Contexto, nombre: str = "Memoria.dwg"):
+        super().__init__(ctx, Name=nombre, FullName=nombre)
+        object.__setattr__(self, "_siguiente_handle", 0x100)
+        object.__setattr__(self, "_por_handle", {})
+        object.__setattr__(self, "_variables", {"CECOLOR": "BYLAYER", "REGENMODE": 1})
+        object.__setattr__(self, "_marcas_deshacer", 0)
+        object.__setattr__(self, "_regeneraciones", 0)
+        object.__setattr__(self, "_oyentes", [])
+        capas = CapasMemoria(ctx)
+        object.__setattr__(self, "Layers", capas)
+        object.__setattr__(self, "_capa_activa", capas._asegurar("0"))
+        object.__setattr__(self, "ModelSpace", ModelSpaceMemoria(self))
+        object.__setattr__(self, "SelectionSets", ConjuntosMemoria(self))
+
+    @property
+    def ActiveLayer(self) -> _ObjetoMemoria:
+        return self._capa_activa
+
+    @ActiveLayer.setter
+    def ActiveLayer(self, capa: _ObjetoMemoria) -> None:
+        object.__setattr__(self, "_capa_activa", capa)
+
+    def GetVariable(self, nombre: str) -> Any:
+        if nombre.upper() == "HANDSEED":  # Próximo handle a asignar
+            return format(self._siguiente_handle, "X")
+        return self._variables.get(nombre.upper(), 0)
+
+    def SetVariable(self, nombre: str, valor: Any) -> None:
+        self._variables[nombre.upper()] = valor
+
+    def StartUndoMark(self) -> None:
+        object.__setattr__(self, "_marcas_deshacer", self._marcas_deshacer + 1)
+
+    def EndUndoMark(self) -> None:
+        pass
+
+    def Regen(self, ventanas: int) -> None:
+        object.__setattr__(self, "_regeneraciones", self._regeneraciones + 1)
+
+    def HandleToObject(self, handle: str) -> EntidadMemoria:
+        return self._por_handle[handle]
+
+    def _nuevo_handle(self) -> str:
+        h = self._siguiente_handle
+        object.__setattr__(self, "_siguiente_handle", h + 1)
+        return format(h, "X")
+
+    def _propiedades_actuales(self) -> Tuple[str, int]:
+        """Capa y color que heredan las entidades nuevas (CLAYER / CECOLOR)."""
+        color = str(self._variables.get("CECOLOR", "BYLAYER"))
+        capa = self._capa_activa._leer("Name")
+        return capa, int(color) if color.isdigit() else _POR_CAPA
+
+    def _eliminar(self, ent: EntidadMemoria) -> None:
+        self._leer("ModelSpace")._entidades.remove(ent)
+        self._por_handle.pop(ent._leer("Handle"), None)
+        self._notificar()  # ObjectErased
+
+    def _suscribir(self, al_cambiar: Callable[[], None]) -> Callable[[], None]:
+        """Eventos de entidades agregadas, borradas o modificadas."""
+        self._oyentes.append(al_cambiar)
+        return lambda: self._oyentes.remove(al_cambiar)
+
+    def _notificar(self) -> None:
+        for oyente in list(self._oyentes):
+            oyente()
+
+
+class DocumentosMemoria(_ObjetoMemoria):
+    """Documentos abiertos, en orden de apertura."""
+
+    def __init__(self, ctx: _Contexto):
+        super().__init__(ctx)
+        object.__setattr__(self, "_documentos", [])
+
+    @property
+    def Count(self) -> int:
+        return len(self._documentos)
+
+    def Item(self, indice: int) -> DocumentoMemoria:
+        return self._documentos[indice]
+
+
+class AplicacionMemoria(_ObjetoMemoria):
+    """'AutoCAD.Application' simulada: documentos abiertos y el activo."""
+
+    def __init__(self, latencia_ms: float = 0.0, nombre: str = "Memoria.dwg"):
+        ctx = _Contexto(latencia_ms)
+        super().__init__(ctx, Documents=DocumentosMemoria(ctx))
+        self.abrir(nombre)
+
+    def abrir(self, nombre: str) -> DocumentoMemoria:
+        """Abre un documento nuevo y lo deja activo (no cuenta como viaje)."""
+        doc = DocumentoMemoria(self._ctx, nombre)
+        self._leer("Documents")._documentos.append(doc)
+        object.__setattr__(self, "ActiveDocument", doc)
+        return doc
+
+    @property
+    def llamadas(self) -> int:
+        """Viajes 'COM' realizados desde la creación o el último reinicio."""
+        return self._ctx.llamadas
+
+    @property
+    def latencia_ms(self) -> float:
+        return self._ctx.latencia * 1000.0
+
+    @latencia_ms.setter
+    def latencia_ms(self, valor: float) -> None:
+        self._ctx.latencia = max(valor, 0.0) / 1000.0
+
+    def reiniciar_contador(self) -> None:
+        self._ctx.llamadas = 0
+
+
+class BackendMemoria(BackendCAD):
+    """Backend sin AutoCAD: siempre la misma AplicacionMemoria."""
+
+    nombre = "memoria"
+
+    def __init__(
+        self, aplicacion: Optional[AplicacionMemoria] = None, latencia_ms: float = 0.0
+    ):
+        if aplicacion is None:
+            aplicacion = AplicacionMemoria(latencia_ms)
+        self.app = aplicacion
+
+    def aplicacion(self) -> AplicacionMemoria:
+        return self.app
+
+    def vigilar(
+        self, doc: Any, al_cambiar: Callable[[], None]
+    ) -> Optional[Callable[[], None]]:
+        return desenvolver(doc)._suscribir(al_cambiar)
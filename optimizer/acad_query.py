@@ -0,0 +1,100 @@
+"""
+Consultas de entidades filtradas del lado de AutoCAD.
+Arma conjuntos de selección (SelectionSets) filtrados por tipo, capa y nombre
+de bloque para que AutoCAD devuelva solo los objetos relevantes, en vez de
+recorrer y filtrar todo el ModelSpace en Python. Si el documento no admite
+filtros se devuelve None y el llamador recorre el ModelSpace completo.
+"""
+
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from .acad_interface import arreglo_com, variante_vacia
+from .feedback_logger import logger
+
+# ObjectName (COM) -> tipo DXF (código de grupo 0 del filtro)
+TIPOS_DXF = {
+    "AcDbLine": "LINE",
+    "AcDbPolyline": "LWPOLYLINE",
+    "AcDbBlockReference": "INSERT",
+    "AcDbText": "TEXT",
+    "AcDbMText": "MTEXT",
+}
+
+_NOMBRE_CONJUNTO = "FO_CONSULTA"
+_SELECCIONAR_TODO = 5  # acSelectionSetAll
+_COMODINES = set("#@.*?~[]-`,")
+# Los bloques dinámicos modificados se insertan como anónimos '*U...': el
+# filtro los deja pasar y el nombre efectivo se verifica al leerlos
+_ANONIMOS = "`*U*"
+
+
+def escapar_comodines(texto: str) -> str:
+    """Escapa los caracteres comodín de los filtros de AutoCAD (prefijo `)."""
+    return "".join("`" + c if c in _COMODINES else c for c in texto)
+
+
+def armar_filtro(
+    tipos: Sequence[str],
+    capa: Optional[str] = None,
+    nombres_bloques: Optional[Iterable[str]] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Pares (código DXF, valor) del filtro: tipo (0), espacio (410),
+    capa (8) y nombre de bloque (2).
+    """
+    filtro = [(0, ",".join(TIPOS_DXF[t] for t in tipos)), (410, "Model")]
+    if capa:
+        filtro.append((8, escapar_comodines(capa)))
+    if nombres_bloques:
+        patrones = [escapar_comodines(n) for n in sorted(set(nombres_bloques))]
+        filtro.append((2, ",".join(patrones + [_ANONIMOS])))
+    return filtro
+
+
+def _variantes(filtro: List[Tuple[int, str]]) -> Tuple[Any, Any]:
+    """Arreglos FilterType / FilterData tipados como los espera COM."""
+    codigos, valores = zip(*filtro)
+    return arreglo_com(codigos, "I2"), arreglo_com(valores, "VARIANT")
+
+
+def seleccionar_entidades(
+    msp: Any,
+    tipos: Sequence[str],
+    capa: Optional[str] = None,
+    nombres_bloques: Optional[Iterable[str]] = None,
+) -> Optional[List[Any]]:
+    """
+    Entidades del ModelSpace que cumplen el filtro, seleccionadas por AutoCAD.
+    Args:
+        msp: ModelSpace (COM) del documento.
+        tipos: ObjectNames buscados (claves de TIPOS_DXF).
+        capa: Capa exacta (AutoCAD no distingue mayúsculas), None = cualquiera.
+        nombres_bloques: Nombres efectivos de bloque (solo para referencias).
+    Returns:
+        Lista de objetos, o None si el documento no admite conjuntos filtrados
+        (el llamador debe recorrer el ModelSpace completo).
+    """
+    filtro = armar_filtro(tipos, capa, nombres_bloques)
+    try:
+        conjuntos = msp.Document.SelectionSets
+        try:
+            conjuntos.Item(_NOMBRE_CONJUNTO).Delete()
+        except Exception:
+            pass
+        conjunto = conjuntos.Add(_NOMBRE_CONJUNTO)
+    except Exception as e:
+        logger.debug(f"Sin conjuntos de selección ({e}); se recorre el ModelSpace.")
+        return None
+
+    try:
+        # Point1/Point2 no aplican a acSelectionSetAll: van como VT_EMPTY
+        vacio = variante_vacia()
+        conjunto.Select(_SELECCIONAR_TODO, vacio, vacio, *_variantes(filtro))
+        return [conjunto.Item(i) for i in range(conjunto.Count)]
+    except Exception as e:
+        logger.debug(f"Filtro no admitido ({e}); se recorre el ModelSpace.")
+        return None
+    finally:
+        try:
+            conjunto.Delete()
+        except Exception:
+            pass
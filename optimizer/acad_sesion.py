@@ -0,0 +1,75 @@
+"""
+Sesión de Edición Masiva.
+Envuelve las escrituras en bloque (miles de textos, círculos y cambios de
+capa): desactiva la regeneración automática y otras variables de sistema
+costosas, agrupa todo en una sola marca de deshacer y, al salir (aun con
+error), restaura las variables y regenera la vista una única vez.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from .acad_interface import mismo_documento
+from .config_loader import get_config
+from .feedback_logger import logger
+
+# Variables de sistema y el valor que toman durante la sesión
+VARIABLES_SILENCIADAS: Dict[str, Any] = {
+    "REGENMODE": 0,  # Sin regeneración automática tras cada cambio
+    "LAYEREVALCTL": 0,  # Sin evaluar/notificar capas nuevas
+    "SELECTIONPREVIEW": 0,  # Sin resaltado de selección al pasar el cursor
+    "HIGHLIGHT": 0,
+    "CMDECHO": 0,
+}
+
+_ACTIVAS: List[Any] = []  # Documentos con sesión abierta (para anidar)
+_TODAS_LAS_VENTANAS = 1  # acAllViewports
+
+
+@contextmanager
+def sesion_edicion(doc: Any) -> Iterator[None]:
+    """
+    Contexto de edición masiva sobre 'doc'. Las sesiones anidadas sobre el
+    mismo documento no hacen nada (manda la más externa). Se puede desactivar
+    con 'cad.sesion_edicion: false' en config.yaml.
+    """
+    if not get_config("cad.sesion_edicion", True) or any(
+        mismo_documento(d, doc) for d in _ACTIVAS
+    ):
+        yield
+        return
+
+    _ACTIVAS.append(doc)
+    originales: List[Tuple[str, Any]] = []
+    marca = False
+    try:
+        try:
+            doc.StartUndoMark()
+            marca = True
+        except Exception as e:
+            logger.debug(f"Sin marca de deshacer: {e}")
+
+        for nombre, valor in VARIABLES_SILENCIADAS.items():
+            try:
+                original = doc.GetVariable(nombre)
+                doc.SetVariable(nombre, valor)
+                originales.append((nombre, original))
+            except Exception as e:
+                logger.debug(f"No se pudo ajustar {nombre}: {e}")
+
+        yield
+    finally:
+        for nombre, original in reversed(originales):
+            try:
+                doc.SetVariable(nombre, original)
+            except Exception as e:
+                logger.warning(f"No se pudo restaurar {nombre}={original}: {e}")
+        if marca:
+            try:
+                doc.EndUndoMark()
+            except Exception as e:
+                logger.warning(f"No se pudo cerrar la marca de deshacer: {e}")
+        try:
+            doc.Regen(_TODAS_LAS_VENTANAS)
+        except Exception as e:
+            logger.debug(f"No se pudo regenerar: {e}")
+        _ACTIVAS[:] = [d for d in _ACTIVAS if d is not doc]
@@ -0,0 +1,269 @@
+"""
+Instantánea del ModelSpace en una sola pasada.
+Cada entidad se lee una única vez vía COM (idealmente solo las que devuelven
+los conjuntos de selección filtrados) y se clasifica en registros
+Python planos (líneas viales, tramos, bloques de equipos y textos de hubs)
+que consumen el controlador y las herramientas sin volver a tocar COM.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from .acad_block_reader import leer_bloque, nombre_documento, nombre_efectivo
+from .acad_query import seleccionar_entidades
+from .config_loader import get_config
+from .feedback_logger import logger
+
+Point2D = Tuple[float, float]
+Segmento = Tuple[Any, Point2D, Point2D]
+
+_TIPOS_TEXTO = ("AcDbText", "AcDbMText")
+
+
+class TramoCAD(NamedTuple):
+    """Polilínea de la capa de tramos lógicos."""
+
+    handle: str
+    layer: str
+    coords: Tuple[float, ...]  # Vértices 2D aplanados (x0, y0, x1, y1, ...)
+
+    @property
+    def extremos(self) -> Optional[Tuple[Point2D, Point2D]]:
+        """Puntos inicial y final, o None si la polilínea es degenerada."""
+        c = self.coords
+        if len(c) < 4:
+            return None
+        return (c[0], c[1]), (c[-2], c[-1])
+
+
+class TextoCAD(NamedTuple):
+    """Texto (simple o MText) candidato a nombrar un hub."""
+
+    handle: str
+    layer: str
+    punto: Point2D
+    texto: str
+
+
+class InstantaneaModelo(NamedTuple):
+    """Resultado del escaneo: registros planos clasificados por tipo."""
+
+    lineas: List[Segmento]  # (handle, p1, p2), formato de construir_grafo_red
+    tramos: List[TramoCAD]
+    bloques: List[Dict[str, Any]]  # Mismo formato que extract_specific_blocks
+    textos: List[TextoCAD]
+    # Entidades leídas: todo el ModelSpace en el recorrido completo; solo las
+    # que pasaron el filtro con conjuntos de selección o al leer un DXF
+    entidades: int
+
+
+def _leer_linea(obj: Any) -> Segmento:
+    return (obj.Handle, obj.StartPoint[:2], obj.EndPoint[:2])
+
+
+def _documento_de(msp: Any) -> Optional[str]:
+    try:
+        return nombre_documento(msp.Document)
+    except Exception:
+        return None  # Se usará el documento activo
+
+
+def _leer_tramo(obj: Any, capa: str) -> TramoCAD:
+    return TramoCAD(obj.Handle, capa, tuple(obj.Coordinates))
+
+
+def _leer_texto(obj: Any, capa: str) -> TextoCAD:
+    ins = obj.InsertionPoint
+    return TextoCAD(obj.Handle, capa, (ins[0], ins[1]), obj.TextString)
+
+
+def capturar_modelo(
+    msp: Any,
+    capa_red: Optional[str] = None,
+    capa_tramos: Optional[str] = None,
+    nombres_bloques: Iterable[str] = (),
+    textos: bool = False,
+    capa_textos: Optional[str] = None,
+    filtrar: Optional[bool] = None,
+) -> InstantaneaModelo:
+    """
+    Lee el ModelSpace una sola vez y clasifica sus entidades.
+    Args:
+        msp: ModelSpace (COM) del documento.
+        capa_red: Capa de las líneas viales (None = no leerlas).
+        capa_tramos: Capa de las polilíneas de tramos (None = no leerlas).
+        nombres_bloques: Nombres efectivos de bloques a extraer.
+        textos: Si se deben recolectar textos de hubs.
+        capa_textos: Capa de los textos (None = cualquier capa).
+        filtrar: Pedir a AutoCAD conjuntos de selección filtrados; si no
+                 los admite se recorre el ModelSpace completo
+                 (None = 'cad.conjuntos_seleccion' de config.yaml).
+    Returns:
+        InstantaneaModelo con las listas de registros. Los tramos (y los
+        textos, si se pidió una capa) llevan la capa tal como se pidió:
+        AutoCAD no distingue mayúsculas y así no se lee Layer por entidad.
+    """
+    if filtrar is None:
+        filtrar = get_config("cad.conjuntos_seleccion", True)
+    buscados = set(nombres_bloques)
+    modelo = None
+    if filtrar:
+        modelo = _capturar_filtrado(
+            msp, capa_red, capa_tramos, buscados, textos, capa_textos
+        )
+    if modelo is None:
+        modelo = _capturar_completo(
+            msp, capa_red, capa_tramos, buscados, textos, capa_textos
+        )
+
+    logger.debug(
+        f"Instantánea: {modelo.entidades} entidad(es) leída(s) -> "
+        f"{len(modelo.lineas)} línea(s), {len(modelo.tramos)} tramo(s), "
+        f"{len(modelo.bloques)} bloque(s), {len(modelo.textos)} texto(s)."
+    )
+    return modelo
+
+
+def _capturar_filtrado(
+    msp: Any,
+    capa_red: Optional[str],
+    capa_tramos: Optional[str],
+    buscados: Set[str],
+    textos: bool,
+    capa_textos: Optional[str],
+) -> Optional[InstantaneaModelo]:
+    """Un conjunto de selección por categoría; None si no hay filtros."""
+    consultas = {}
+    if capa_red:
+        consultas["lineas"] = (("AcDbLine",), capa_red, None)
+    if capa_tramos:
+        consultas["tramos"] = (("AcDbPolyline",), capa_tramos, None)
+    if buscados:
+        consultas["bloques"] = (("AcDbBlockReference",), None, buscados)
+    if textos:
+        consultas["textos"] = (_TIPOS_TEXTO, capa_textos, None)
+
+    selecciones: Dict[str, List[Any]] = {}
+    for categoria, (tipos, capa, nombres) in consultas.items():
+        objetos = seleccionar_entidades(msp, tipos, capa, nombres)
+        if objetos is None:
+            return None
+        selecciones[categoria] = objetos
+
+    lineas: List[Segmento] = []
+    tramos: List[TramoCAD] = []
+    bloques: List[Dict[str, Any]] = []
+    hallados_txt: List[TextoCAD] = []
+
+    # El filtro ya garantiza tipo y capa: solo se leen los datos (la capa
+    # se toma del pedido, sin otro viaje COM por entidad)
+    for obj in selecciones.get("lineas", ()):
+        try:
+            lineas.append(_leer_linea(obj))
+        except Exception:
+            continue
+    for obj in selecciones.get("tramos", ()):
+        try:
+            tramos.append(_leer_tramo(obj, capa_tramos))
+        except Exception:
+            continue
+    # Cada bloque recuerda su documento (sus atributos se leen más tarde)
+    documento = _documento_de(msp) if selecciones.get("bloques") else None
+    for obj in selecciones.get("bloques", ()):
+        try:
+            nombre = nombre_efectivo(obj)
+            if nombre in buscados:
+                bloques.append(leer_bloque(obj, nombre, documento))
+        except Exception:
+            continue
+    for obj in selecciones.get("textos", ()):
+        try:
+            hallados_txt.append(_leer_texto(obj, capa_textos or obj.Layer))
+        except Exception:
+            continue
+
+    leidas = sum(len(objetos) for objetos in selecciones.values())
+    return InstantaneaModelo(lineas, tramos, bloques, hallados_txt, leidas)
+
+
+def _capturar_completo(
+    msp: Any,
+    capa_red: Optional[str],
+    capa_tramos: Optional[str],
+    buscados: Set[str],
+    textos: bool,
+    capa_textos: Optional[str],
+) -> InstantaneaModelo:
+    """Recorrido completo del ModelSpace filtrando en Python."""
+    red = capa_red.upper() if capa_red else None
+    tramo = capa_tramos.upper() if capa_tramos else None
+    capa_txt = capa_textos.upper() if capa_textos else None
+
+    lineas: List[Segmento] = []
+    tramos: List[TramoCAD] = []
+    bloques: List[Dict[str, Any]] = []
+    hallados_txt: List[TextoCAD] = []
+
+    # Cada propiedad leída es un viaje COM: ObjectName primero y el resto
+    # solo para las entidades de un tipo que interesa
+    count = msp.Count
+    documento = _documento_de(msp) if buscados else None
+    for i in range(count):
+        try:
+            obj = msp.Item(i)
+            tipo = obj.ObjectName
+
+            if tipo == "AcDbLine":
+                if red is None:
+                    continue
+                if obj.Layer.upper() == red:
+                    lineas.append(_leer_linea(obj))
+
+            elif tipo == "AcDbPolyline":
+                if tramo is None:
+                    continue
+                capa = obj.Layer
+                if capa.upper() == tramo:
+                    tramos.append(_leer_tramo(obj, capa_tramos))
+
+            elif tipo == "AcDbBlockReference":
+                if not buscados:
+                    continue
+                nombre = nombre_efectivo(obj)
+                if nombre in buscados:
+                    bloques.append(leer_bloque(obj, nombre, documento))
+
+            elif tipo in _TIPOS_TEXTO:
+                if not textos:
+                    continue
+                capa = obj.Layer
+                if capa_txt is None or capa.upper() == capa_txt:
+                    hallados_txt.append(_leer_texto(obj, capa_textos or capa))
+        except Exception:
+            continue
+
+    return InstantaneaModelo(lineas, tramos, bloques, hallados_txt, count)
+
+
+def nombres_equipos() -> List[str]:
+    """Todos los nombres de bloque de la sección 'equipos' de config.yaml."""
+    dic_equipos: Dict[str, List[str]] = get_config("equipos", {}) or {}
+    return [nombre for lista in dic_equipos.values() for nombre in lista]
+
+
+def parametros_segun_config(textos: bool = False) -> Dict[str, Any]:
+    """
+    Capas y equipos definidos en config.yaml (red vial, tramos, todos los
+    bloques de 'equipos' y, opcionalmente, los textos de hubs), como
+    argumentos de capturar_modelo.
+    """
+    return dict(
+        capa_red=get_config("rutas.capa_red_vial"),
+        capa_tramos=get_config("rutas.capa_tramos_logicos", "TRAMO"),
+        nombres_bloques=nombres_equipos(),
+        textos=textos,
+        capa_textos=get_config("rutas.capa_textos_hubs", "HUB_BOX_3.5_P"),
+    )
+
+
+def capturar_segun_config(msp: Any, textos: bool = False) -> InstantaneaModelo:
+    """Instantánea con las capas y equipos definidos en config.yaml."""
+    return capturar_modelo(msp, **parametros_segun_config(textos))
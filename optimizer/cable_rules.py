@@ -43,6 +43,24 @@ def buscar_regla_topologica(nombre_origen: str, nombre_destino: str) -> Optional
     return None
 
 
+def longitud_maxima_cable(nombre_origen: str, nombre_destino: str) -> Optional[float]:
+    """
+    Longitud del cable más largo disponible para el par Origen->Destino.
+    Sirve como cota de búsqueda: una ruta más larga no tiene cable en catálogo.
+
+    Returns:
+        Optional[float]: Longitud máxima en metros, o None si no hay catálogo.
+    """
+    id_producto = buscar_regla_topologica(nombre_origen, nombre_destino)
+    if not id_producto:
+        id_producto = "distribucion_std"  # Mismo default que seleccionar_cable
+
+    longitudes = get_config(f"catalogo_cables.{id_producto}.longitudes")
+    if not longitudes:
+        return None
+    return float(max(longitudes))
+
+
 def seleccionar_cable(
     longitud: float, nombre_origen: str, nombre_destino: str
 ) -> Tuple[int, float, str]:
@@ -0,0 +1,180 @@
+"""
+Módulo de Caché del Grafo Vial.
+Guarda en disco el grafo ya construido (nodado, agrupado y compilado) junto
+con su índice espacial y sus componentes, identificado por una huella de
+la capa vial. Si la red no cambió, la siguiente corrida lo carga sin
+reconstruir nada.
+"""
+
+import hashlib
+import os
+import struct
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .acad_geometry import NetworkGraph
+from .feedback_logger import logger, get_base_path
+from .config_loader import get_config
+from .serializacion import escribir_arreglos, leer_arreglos, marcar_uso, podar_archivos
+
+Point2D = Tuple[float, float]
+SegmentoVial = Tuple[str, Point2D, Point2D]  # (Handle, Inicio, Fin)
+
+_MAGIC = b"FOGR\x02"
+_COORDS = struct.Struct("<4d")
+
+# Estadísticas de construcción que se guardan junto al grafo
+_CAMPOS_STATS = ("cruces", "contactos_t", "segmentos_partidos", "fusiones_cercanas")
+
+
+def huella_red(
+    segmentos: Iterable[SegmentoVial], tolerancia: float, nodar: bool
+) -> str:
+    """
+    SHA-1 de la capa vial: handles y coordenadas de cada línea (en orden de
+    handle, así no depende del orden de lectura) más los parámetros de
+    construcción. Cualquier línea movida, agregada o borrada la cambia.
+    """
+    h = hashlib.sha1()
+    h.update(_MAGIC)
+    h.update(struct.pack("<d?", tolerancia, nodar))
+    for handle, p1, p2 in sorted(segmentos, key=lambda s: s[0]):
+        h.update(handle.encode("utf-8"))
+        h.update(_COORDS.pack(p1[0], p1[1], p2[0], p2[1]))
+    return h.hexdigest()
+
+
+def ruta_cache_grafo(huella: str) -> str:
+    """
+    Archivo de caché por defecto: 'cache/grafo_<huella>.bin'. Al guardar se
+    conservan solo las 'ruteo.cache_versiones' usadas más recientemente.
+    """
+    return os.path.join(get_base_path(), "cache", f"grafo_{huella[:16]}.bin")
+
+
+def guardar_grafo(
+    grafo: NetworkGraph, ruta: str, huella: str, stats: Dict[str, int]
+) -> None:
+    """Escribe el grafo (ver NetworkGraph.exportar) con la huella en la cabecera."""
+    dir_padre = os.path.dirname(ruta)
+    if dir_padre:
+        os.makedirs(dir_padre, exist_ok=True)
+    arreglos = grafo.exportar()
+    arreglos["stats"] = _array_stats(stats)
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(_MAGIC)
+        f.write(huella.encode("ascii"))
+        escribir_arreglos(f, arreglos)
+    os.replace(temporal, ruta)  # Nunca queda un archivo a medio escribir
+
+
+def cargar_grafo(
+    ruta: str, huella: str
+) -> Optional[Tuple[NetworkGraph, Dict[str, int]]]:
+    """
+    Lee un grafo guardado. Retorna None si no existe, está dañado o
+    corresponde a otra red (huella distinta).
+    """
+    try:
+        with open(ruta, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+            if f.read(len(huella)).decode("ascii", "replace") != huella:
+                return None
+            arreglos = leer_arreglos(f)
+        stats = {k: int(v) for k, v in zip(_CAMPOS_STATS, arreglos.pop("stats"))}
+        return NetworkGraph.importar(arreglos), stats
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Caché de grafo ilegible ({ruta}): {e}")
+        return None
+
+
+def construir_grafo_red(
+    segmentos: List[SegmentoVial],
+    tolerancia: float,
+    nodar: bool = True,
+    usar_cache: bool = True,
+    previo: Optional[NetworkGraph] = None,
+) -> Tuple[NetworkGraph, Dict[str, Any]]:
+    """
+    Grafo de la red vial: desde la caché si la capa no cambió, actualizando
+    'previo' con solo las líneas editadas si se pasa, o construido de cero.
+    Lo construido o actualizado se guarda en la caché.
+
+    Args:
+        segmentos (List[SegmentoVial]): Líneas viales (handle, inicio, fin).
+        tolerancia (float): Snap de nodos (metros).
+        nodar (bool): Partir líneas en cruces y contactos en T.
+        usar_cache (bool): Leer/escribir la caché en disco.
+        previo (Optional[NetworkGraph]): Grafo de una corrida anterior sobre
+            la misma capa. Se modifica en el lugar (ver sincronizar); se
+            ignora si se armó con otra tolerancia o modo de nodado.
+
+    Returns:
+        Tuple(Grafo, Estadisticas): Estadísticas de add_lines (o de
+        sincronizar) más "desde_cache" e "incremental" (bool).
+    """
+    if previo is not None and (
+        previo.tolerance != tolerancia or previo.nodado not in (None, nodar)
+    ):
+        previo = None
+
+    huella = ruta = None
+    if usar_cache:
+        t0 = time.perf_counter()
+        huella = huella_red(segmentos, tolerancia, nodar)
+        ruta = ruta_cache_grafo(huella)
+    if previo is not None:
+        t0 = time.perf_counter()
+        stats = previo.sincronizar(segmentos, nodar)
+        cambios = (
+            stats["lineas_agregadas"] + stats["lineas_modificadas"] + stats["lineas_quitadas"]
+        )
+        logger.info(
+            f"Grafo vial actualizado en {(time.perf_counter() - t0) * 1000:.0f} ms "
+            f"({cambios} línea(s) cambiada(s), {stats['lineas_renodadas']} vecina(s) "
+            f"vuelta(s) a nodar)."
+        )
+        if usar_cache and cambios:
+            _guardar_seguro(previo, ruta, huella, stats)
+        return previo, dict(stats, desde_cache=False, incremental=True)
+
+    if usar_cache:
+        cargado = cargar_grafo(ruta, huella)
+        if cargado is not None:
+            grafo, stats = cargado
+            marcar_uso(ruta)
+            logger.info(
+                f"Grafo vial cargado desde caché en "
+                f"{(time.perf_counter() - t0) * 1000:.0f} ms ({ruta})."
+            )
+            return grafo, dict(stats, desde_cache=True, incremental=False)
+
+    grafo = NetworkGraph(tolerance=tolerancia)
+    stats = grafo.add_lines(
+        [(p1, p2) for _, p1, p2 in segmentos],
+        nodar=nodar,
+        handles=[h for h, _, _ in segmentos],
+    )
+    if usar_cache:
+        _guardar_seguro(grafo, ruta, huella, stats)
+    return grafo, dict(stats, desde_cache=False, incremental=False)
+
+
+def _guardar_seguro(
+    grafo: NetworkGraph, ruta: str, huella: str, stats: Dict[str, int]
+) -> None:
+    try:
+        guardar_grafo(grafo, ruta, huella, stats)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar la caché del grafo: {e}")
+        return
+    # Cada edición de la red genera otra huella: solo quedan las más recientes
+    podar_archivos(ruta, get_config("ruteo.cache_versiones", 3))
+
+
+def _array_stats(stats: Dict[str, int]) -> array:
+    return array("q", (int(stats.get(k, 0)) for k in _CAMPOS_STATS))
@@ -0,0 +1,83 @@
+"""
+Módulo de Agrupamiento de Vértices.
+Fusiona extremos de línea que están a menos de la tolerancia de snap,
+aunque caigan en celdas distintas de la cuadrícula de redondeo.
+Rejilla de celdas enteras (lado = tolerancia) + Union-Find: tiempo lineal.
+"""
+
+import math
+from typing import Dict, List, Tuple
+from .union_find import UnionFind
+
+Point2D = Tuple[float, float]
+Celda = Tuple[int, int]
+
+# Desplazamientos de la celda propia y sus 8 vecinas
+CELDAS_VECINAS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def celda_entera(punto: Point2D, tolerancia: float) -> Celda:
+    """Celda de lado 'tolerancia' que contiene al punto (índices enteros)."""
+    return (math.floor(punto[0] / tolerancia), math.floor(punto[1] / tolerancia))
+
+
+def agrupar_vertices(
+    puntos: List[Point2D], tolerancia: float
+) -> Tuple[List[int], int]:
+    """
+    Agrupa puntos encadenando todo par a distancia <= tolerancia.
+
+    Los puntos idénticos se colapsan primero (diccionario exacto), así cada
+    celda solo guarda coordenadas distintas y las comparaciones se limitan
+    a las 9 celdas vecinas.
+
+    Args:
+        puntos (List[Point2D]): Extremos a agrupar.
+        tolerancia (float): Distancia máxima de fusión (0 = solo idénticos).
+
+    Returns:
+        Tuple(Ids, Fusiones): Id de grupo por punto (0..k-1, en orden de
+        primera aparición) y cantidad de fusiones cercanas (coordenadas
+        distintas absorbidas por otro grupo).
+    """
+    # 1. Coordenadas distintas (las repetidas no cuentan como fusión)
+    distintos: Dict[Point2D, int] = {}
+    indice_de: List[int] = []
+    for p in puntos:
+        clave = (float(p[0]), float(p[1]))
+        i = distintos.get(clave)
+        if i is None:
+            i = len(distintos)
+            distintos[clave] = i
+        indice_de.append(i)
+
+    coords = list(distintos)
+    uf = UnionFind()
+    for i in range(len(coords)):
+        uf.agregar(i)
+
+    # 2. Vecinos dentro de tolerancia en celdas enteras adyacentes
+    if tolerancia > 0:
+        celdas: Dict[Celda, List[int]] = {}
+        for i, (x, y) in enumerate(coords):
+            cx, cy = celda_entera((x, y), tolerancia)
+            for dx, dy in CELDAS_VECINAS:
+                for j in celdas.get((cx + dx, cy + dy), ()):
+                    qx, qy = coords[j]
+                    if math.hypot(x - qx, y - qy) <= tolerancia:
+                        uf.unir(i, j)
+            celdas.setdefault((cx, cy), []).append(i)
+
+    # 3. Ids estables: orden de primera aparición de cada grupo
+    id_grupo: Dict[int, int] = {}
+    ids: List[int] = []
+    for i in indice_de:
+        raiz = uf.buscar(i)
+        gid = id_grupo.get(raiz)
+        if gid is None:
+            gid = len(id_grupo)
+            id_grupo[raiz] = gid
+        ids.append(gid)
+
+    fusiones = len(coords) - len(id_grupo)
+    return ids, fusiones
@@ -0,0 +1,140 @@
+"""
+Módulo de Componentes Conexas Dinámicas.
+Etiqueta islas de un grafo que cambia: une etiquetas al agregar aristas y
+las separa al quitarlas, tocando solo la parte afectada (no todo el grafo).
+"""
+
+from collections import deque
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+
+class ComponentesDinamicas:
+    """
+    Etiqueta entera por nodo + miembros por etiqueta.
+
+    - unir: la componente menor adopta la etiqueta de la mayor (cada nodo
+      cambia de etiqueta O(log n) veces en total).
+    - separar: tras quitar una arista u-v, dos BFS intercaladas desde u y v;
+      si no se encuentran, la que se agota primero (la parte menor) recibe
+      una etiqueta nueva. El costo es proporcional a esa parte.
+    """
+
+    def __init__(self):
+        self._etiqueta: Dict[Hashable, int] = {}
+        self._miembros: Dict[int, Set[Hashable]] = {}
+        self._siguiente = 0
+
+    def __contains__(self, x: Hashable) -> bool:
+        return x in self._etiqueta
+
+    def __len__(self) -> int:
+        return len(self._etiqueta)
+
+    @property
+    def num_conjuntos(self) -> int:
+        return len(self._miembros)
+
+    def _nueva_etiqueta(self, miembros: Set[Hashable]) -> int:
+        etiqueta = self._siguiente
+        self._siguiente += 1
+        self._miembros[etiqueta] = miembros
+        for x in miembros:
+            self._etiqueta[x] = etiqueta
+        return etiqueta
+
+    def agregar(self, x: Hashable) -> None:
+        """Crea la componente {x} si x no existía."""
+        if x not in self._etiqueta:
+            self._nueva_etiqueta({x})
+
+    def quitar(self, x: Hashable) -> None:
+        """Elimina un nodo (debe haber quedado sin aristas)."""
+        etiqueta = self._etiqueta.pop(x, None)
+        if etiqueta is None:
+            return
+        miembros = self._miembros[etiqueta]
+        miembros.discard(x)
+        if not miembros:
+            del self._miembros[etiqueta]
+
+    def unir(self, a: Hashable, b: Hashable) -> bool:
+        """Une las componentes de a y b. Retorna False si ya eran la misma."""
+        ea, eb = self._etiqueta[a], self._etiqueta[b]
+        if ea == eb:
+            return False
+        ma, mb = self._miembros[ea], self._miembros[eb]
+        # La menor adopta la etiqueta de la mayor; a igual tamaño, la más antigua
+        if (len(ma), -ea) < (len(mb), -eb):
+            ea, eb, ma, mb = eb, ea, mb, ma
+        for x in mb:
+            self._etiqueta[x] = ea
+        ma |= mb
+        del self._miembros[eb]
+        return True
+
+    def separar(
+        self, a: Hashable, b: Hashable, vecinos: Callable[[Hashable], Iterable[Hashable]]
+    ) -> bool:
+        """
+        Revisa si a y b siguen conectados después de quitar una arista entre
+        ellos. Si no, separa la parte menor con una etiqueta nueva.
+
+        Args:
+            vecinos (Callable): Vecinos actuales de un nodo (ya sin la arista).
+
+        Returns:
+            bool: True si la componente se partió en dos.
+        """
+        if a == b or self._etiqueta[a] != self._etiqueta[b]:
+            return False
+
+        vistos = ({a}, {b})
+        colas = (deque([a]), deque([b]))
+        while True:
+            for lado in (0, 1):
+                visto, cola, otro = vistos[lado], colas[lado], vistos[1 - lado]
+                if not cola:
+                    # Este lado se agotó sin tocar al otro: es una isla aparte
+                    self._miembros[self._etiqueta[a]] -= visto
+                    self._nueva_etiqueta(visto)
+                    return True
+                x = cola.popleft()
+                for y in vecinos(x):
+                    if y in otro:
+                        return False
+                    if y not in visto:
+                        visto.add(y)
+                        cola.append(y)
+
+    def conectados(self, a: Hashable, b: Hashable) -> bool:
+        return self._etiqueta[a] == self._etiqueta[b]
+
+    def id_conjunto(self, x: Hashable) -> int:
+        """Etiqueta entera de la componente de x."""
+        return self._etiqueta[x]
+
+    def tamano(self, x: Hashable) -> int:
+        return len(self._miembros[self._etiqueta[x]])
+
+    def tamanos(self) -> List[int]:
+        """Tamaño de cada componente, de mayor a menor."""
+        return sorted((len(m) for m in self._miembros.values()), reverse=True)
+
+    def etiquetas(self, claves: Iterable[Hashable]) -> List[int]:
+        """Etiqueta de cada clave (para serializar)."""
+        return [self._etiqueta[x] for x in claves]
+
+    @classmethod
+    def desde_etiquetas(
+        cls, claves: Iterable[Hashable], etiquetas: Iterable[int]
+    ) -> "ComponentesDinamicas":
+        """Reconstruye lo serializado con etiquetas()."""
+        comp = cls()
+        maximo: Optional[int] = None
+        for x, e in zip(claves, etiquetas):
+            comp._etiqueta[x] = e
+            comp._miembros.setdefault(e, set()).add(x)
+            if maximo is None or e > maximo:
+                maximo = e
+        comp._siguiente = 0 if maximo is None else maximo + 1
+        return comp
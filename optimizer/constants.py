@@ -39,3 +39,14 @@ class Geometry:
     OFFSET_RUTAS = 0.5
     TEXT_ALIGNMENT_CENTER = 13
     TEXT_HEIGHT = 1.0
+    CELDA_INDICE_ESPACIAL = 10.0
+
+
+class Busqueda:
+    """Estrategias de búsqueda de caminos sobre el grafo vial"""
+
+    DIJKSTRA = "dijkstra"
+    ASTAR = "astar"
+    BIDIRECCIONAL = "bidireccional"
+    BIDIRECCIONAL_ASTAR = "bidireccional_astar"
+    CONTRACCION = "contraccion"  # Requiere preprocesar (jerarquía de contracción)
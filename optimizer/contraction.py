@@ -0,0 +1,365 @@
+"""
+Módulo de Jerarquía de Contracción (Contraction Hierarchies).
+Preprocesa una red vial fija agregando atajos, para que cada consulta
+punto a punto explore solo unos cientos de nodos en lugar de decenas de miles.
+El índice se puede guardar en disco y reutilizar mientras la red no cambie.
+"""
+
+import functools
+import heapq
+import os
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+from .feedback_logger import logger
+from .graph_csr import CompactGraph, INF, Ubicacion
+from .serializacion import escribir_arreglos, leer_arreglos
+
+_MAGIC = b"FOCH\x01"
+
+# Límite de nodos asentados en cada búsqueda de testigos al contraer
+LIMITE_TESTIGOS = 60
+
+
+class ContractionHierarchy:
+    """
+    Jerarquía de contracción sobre un CompactGraph congelado.
+
+    - rango[v]: orden de contracción (mayor rango = nodo más "importante").
+    - Grafo ascendente (CSR): para cada v, aristas hacia vecinos de mayor
+      rango; 'medios' guarda el nodo contraído de cada atajo (-1 si es original).
+    """
+
+    def __init__(
+        self,
+        huella: str,
+        rango: array,
+        offsets: array,
+        vecinos: array,
+        pesos: array,
+        medios: array,
+    ):
+        self.huella = huella
+        self.rango = rango
+        self.offsets = offsets
+        self.vecinos = vecinos
+        self.pesos = pesos
+        self.medios = medios
+
+    @property
+    def num_atajos(self) -> int:
+        return sum(1 for m in self.medios if m != -1)
+
+    def memoria_bytes(self) -> int:
+        return sum(
+            a.itemsize * len(a)
+            for a in (self.rango, self.offsets, self.vecinos, self.pesos, self.medios)
+        )
+
+    # CONSTRUCCIÓN
+    # ------------
+
+    @classmethod
+    def construir(cls, csr: CompactGraph) -> "ContractionHierarchy":
+        """
+        Contrae todos los nodos en orden de importancia (diferencia de aristas
+        + vecinos ya contraídos), agregando atajos donde no hay camino testigo.
+        """
+        t0 = time.perf_counter()
+        n = csr.num_nodos
+
+        # Grafo de trabajo: solo nodos sin contraer, aristas paralelas fusionadas
+        adj: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        for u in range(n):
+            for e in range(csr.offsets[u], csr.offsets[u + 1]):
+                v, w = csr.vecinos[e], csr.pesos[e]
+                if u != v and w < adj[u].get(v, (INF, -1))[0]:
+                    adj[u][v] = (w, -1)
+
+        contraidos_vecinos = [0] * n
+        rango = array("q", [0] * n)
+        subida: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+
+        def atajos_necesarios(v: int) -> List[Tuple[int, int, float]]:
+            vecinos = list(adj[v].items())
+            atajos = []
+            for i, (u, (wu, _)) in enumerate(vecinos):
+                objetivos = {w: wu + ww for w, (ww, _) in vecinos[i + 1 :]}
+                if not objetivos:
+                    continue
+                testigos = _busqueda_testigos(
+                    adj, u, v, objetivos, max(objetivos.values())
+                )
+                for w, via in objetivos.items():
+                    if testigos.get(w, INF) > via:
+                        atajos.append((u, w, via))
+            return atajos
+
+        def prioridad(v: int) -> int:
+            return len(atajos_necesarios(v)) - len(adj[v]) + contraidos_vecinos[v]
+
+        heap = [(prioridad(v), v) for v in range(n)]
+        heapq.heapify(heap)
+
+        siguiente = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Actualización perezosa: si empeoró, vuelve a la cola
+            actual = prioridad(v)
+            if heap and actual > heap[0][0]:
+                heapq.heappush(heap, (actual, v))
+                continue
+
+            for u, w, via in atajos_necesarios(v):
+                if via < adj[u].get(w, (INF, -1))[0]:
+                    adj[u][w] = (via, v)
+                    adj[w][u] = (via, v)
+
+            rango[v] = siguiente
+            siguiente += 1
+            for u, (w, medio) in adj[v].items():
+                subida[v].append((u, w, medio))
+                del adj[u][v]
+                contraidos_vecinos[u] += 1
+            adj[v] = {}
+
+        offsets = array("q", [0])
+        vecinos_up = array("q")
+        pesos_up = array("d")
+        medios = array("q")
+        for v in range(n):
+            for u, w, medio in subida[v]:
+                vecinos_up.append(u)
+                pesos_up.append(w)
+                medios.append(medio)
+            offsets.append(len(vecinos_up))
+
+        ch = cls(csr.huella(), rango, offsets, vecinos_up, pesos_up, medios)
+        logger.info(
+            f"Jerarquía de contracción: {n} nodo(s), {ch.num_atajos} atajo(s) "
+            f"en {time.perf_counter() - t0:.1f}s."
+        )
+        return ch
+
+    # CONSULTA
+    # --------
+
+    def ruta(
+        self,
+        csr: CompactGraph,
+        origen: Ubicacion,
+        destino: Ubicacion,
+        limite: float = INF,
+    ) -> Tuple[Optional[float], List[int], int]:
+        """
+        Búsqueda bidireccional ascendente (solo hacia nodos de mayor rango).
+
+        Returns:
+            Tuple(Distancia, Camino, NodosAsentados), con la misma convención
+            que CompactGraph.ruta: (None, [], n) sin camino, (INF, [], n) si
+            supera el límite.
+        """
+        return csr.resolver_ruta(
+            origen, destino, limite, functools.partial(self._buscar, csr)
+        )
+
+    def _buscar(
+        self,
+        csr: CompactGraph,
+        fuentes: Dict[int, float],
+        sumideros: Dict[int, float],
+        limite: float,
+    ) -> Tuple[Optional[float], List[int], int]:
+        """Búsqueda sobre el núcleo; devuelve el camino ya desempacado."""
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        dist = (dict(fuentes), dict(sumideros))
+        padre = ({v: -1 for v in fuentes}, {v: -1 for v in sumideros})
+        colas = (
+            [(d, v) for v, d in fuentes.items()],
+            [(d, v) for v, d in sumideros.items()],
+        )
+        heapq.heapify(colas[0])
+        heapq.heapify(colas[1])
+        mejor = INF
+        encuentro = -1
+        asentados = 0
+        cortado = False
+
+        while colas[0] or colas[1]:
+            # Alterna lados; cada uno termina cuando su tope supera al mejor
+            for lado in (0, 1):
+                cola = colas[lado]
+                if not cola:
+                    continue
+                d, u = heappop(cola)
+                if d >= mejor:
+                    cola.clear()
+                    continue
+                if d > limite:
+                    cortado = True
+                    cola.clear()
+                    continue
+                d_propia = dist[lado]
+                if d > d_propia[u]:
+                    continue
+                asentados += 1
+                otra = dist[1 - lado].get(u)
+                if otra is not None and d + otra < mejor:
+                    mejor = d + otra
+                    encuentro = u
+                p_propio = padre[lado]
+                for e in range(offsets[u], offsets[u + 1]):
+                    v = vecinos[e]
+                    nd = d + pesos[e]
+                    if nd < d_propia.get(v, INF):
+                        d_propia[v] = nd
+                        p_propio[v] = u
+                        heappush(cola, (nd, v))
+
+        if encuentro == -1:
+            return (INF if cortado else None), [], asentados
+        if mejor > limite:
+            return INF, [], asentados
+
+        subida = csr.reconstruir_camino(padre[0], encuentro)
+        bajada = csr.reconstruir_camino(padre[1], encuentro)[::-1]
+        camino_ch = subida + bajada[1:]
+
+        camino = [camino_ch[0]]
+        for a, b in zip(camino_ch, camino_ch[1:]):
+            camino.extend(self._desempacar(a, b)[1:])
+        return mejor, camino, asentados
+
+    def _arista(self, a: int, b: int) -> Tuple[float, int]:
+        """Arista ascendente entre a y b (guardada en el de menor rango)."""
+        bajo, alto = (a, b) if self.rango[a] < self.rango[b] else (b, a)
+        mejor = (INF, -1)
+        for e in range(self.offsets[bajo], self.offsets[bajo + 1]):
+            if self.vecinos[e] == alto and self.pesos[e] < mejor[0]:
+                mejor = (self.pesos[e], self.medios[e])
+        return mejor
+
+    def _desempacar(self, a: int, b: int) -> List[int]:
+        """Expande recursivamente un atajo a la secuencia de nodos originales."""
+        resultado = [a]
+        pila = [(a, b)]
+        while pila:
+            x, y = pila.pop()
+            _, medio = self._arista(x, y)
+            if medio == -1:
+                resultado.append(y)
+            else:
+                # Primero x->medio, luego medio->y (pila LIFO)
+                pila.append((medio, y))
+                pila.append((x, medio))
+        return resultado
+
+    # PERSISTENCIA
+    # ------------
+
+    def guardar(self, ruta: str) -> None:
+        """Escribe el índice en un archivo binario (a un temporal y luego lo mueve)."""
+        dir_padre = os.path.dirname(ruta)
+        if dir_padre:
+            os.makedirs(dir_padre, exist_ok=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            f.write(_MAGIC)
+            huella_b = self.huella.encode("ascii")
+            f.write(len(huella_b).to_bytes(2, "little"))
+            f.write(huella_b)
+            escribir_arreglos(
+                f,
+                {
+                    "rango": self.rango,
+                    "offsets": self.offsets,
+                    "vecinos": self.vecinos,
+                    "pesos": self.pesos,
+                    "medios": self.medios,
+                },
+            )
+        os.replace(temporal, ruta)  # Nunca queda un archivo a medio escribir
+
+    @classmethod
+    def cargar(
+        cls, ruta: str, huella_esperada: Optional[str] = None
+    ) -> Optional["ContractionHierarchy"]:
+        """
+        Lee un índice guardado. Retorna None si no existe, está dañado o
+        truncado, o fue construido para otra red (huella distinta).
+        """
+        try:
+            with open(ruta, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                largo = int.from_bytes(f.read(2), "little")
+                huella = f.read(largo).decode("ascii")
+                if huella_esperada is not None and huella != huella_esperada:
+                    return None
+                arr = leer_arreglos(f)
+            ch = cls(
+                huella,
+                arr["rango"],
+                arr["offsets"],
+                arr["vecinos"],
+                arr["pesos"],
+                arr["medios"],
+            )
+            m = len(ch.vecinos)
+            if (
+                len(ch.offsets) != len(ch.rango) + 1
+                or ch.offsets[-1] != m
+                or len(ch.pesos) != m
+                or len(ch.medios) != m
+            ):
+                raise ValueError("arreglos de largo inconsistente")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Índice de jerarquía ilegible ({ruta}): {e}")
+            return None
+        return ch
+
+
+def _busqueda_testigos(
+    adj: List[Dict[int, Tuple[float, int]]],
+    origen: int,
+    excluido: int,
+    objetivos: Dict[int, float],
+    max_dist: float,
+) -> Dict[int, float]:
+    """
+    Dijkstra local desde 'origen' evitando 'excluido', acotado por distancia
+    y cantidad de nodos. Retorna las distancias encontradas a los objetivos.
+    """
+    dist = {origen: 0.0}
+    queue = [(0.0, origen)]
+    pendientes = set(objetivos)
+    encontrados: Dict[int, float] = {}
+    asentados = 0
+
+    while queue and pendientes and asentados < LIMITE_TESTIGOS:
+        d, u = heapq.heappop(queue)
+        if d > max_dist:
+            break
+        if d > dist[u]:
+            continue
+        asentados += 1
+        if u in pendientes:
+            pendientes.discard(u)
+            encontrados[u] = d
+        for v, (w, _) in adj[u].items():
+            if v == excluido:
+                continue
+            nd = d + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(queue, (nd, v))
+
+    # Objetivos alcanzados pero no asentados también sirven de cota superior
+    for w in pendientes:
+        if w in dist:
+            encontrados[w] = dist[w]
+    return encontrados
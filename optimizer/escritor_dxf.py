@@ -0,0 +1,254 @@
+"""
+Escritor de DXF de superposición.
+Alternativa a escribir los resultados en vivo por COM: la misma ColaDibujo
+que llenan acad_drawer, acad_labeler y el cambio de capa de los tramos se
+vuelca a un DXF (R12, ASCII) en una sola pasada secuencial, listo para
+insertar o referenciar (xref) sobre el plano. Conserva las capas de
+SysLayers y las 'CABLE PRECONECT ...' con sus colores.
+Se activa con 'cad.salida_dibujo: "dxf"' en config.yaml.
+"""
+
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .acad_cola_dibujo import ColaDibujo, ComandoDibujo
+from .config_loader import get_config
+from .constants import ASI
+from .feedback_logger import logger, get_base_path
+
+_POR_CAPA = 256  # acByLayer
+
+# acAlignment (COM) -> (72 horizontal, 73 vertical) del TEXT en DXF
+_ALINEACIONES: Dict[int, Tuple[int, int]] = {
+    0: (0, 0),  # Left
+    1: (1, 0),  # Center
+    2: (2, 0),  # Right
+    3: (3, 0),  # Aligned
+    4: (4, 0),  # Middle
+    5: (5, 0),  # Fit
+    6: (0, 3),  # TopLeft
+    7: (1, 3),  # TopCenter
+    8: (2, 3),  # TopRight
+    9: (0, 2),  # MiddleLeft
+    10: (1, 2),  # MiddleCenter
+    11: (2, 2),  # MiddleRight
+    12: (0, 1),  # BottomLeft
+    13: (1, 1),  # BottomCenter
+    14: (2, 1),  # BottomRight
+}
+
+
+def salida_en_dxf() -> bool:
+    """True si los resultados se escriben en un DXF en vez de por COM."""
+    return str(get_config("cad.salida_dibujo", "cad")).lower() == "dxf"
+
+
+def ruta_superposicion() -> str:
+    """Ruta automática del DXF en 'reportes/' (como los CSV)."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(get_base_path(), "reportes", f"superposicion_{timestamp}.dxf")
+
+
+class CapasDXF:
+    """
+    Mismo uso que RegistroCapas, pero las capas se declaran en la tabla
+    LAYER del DXF (no se toca el dibujo abierto).
+    """
+
+    def __init__(self):
+        self._capas: Dict[str, Tuple[str, int]] = {}
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre.upper() in self._capas
+
+    def garantizar(self, nombre: str, color_id: int = ASI.BLANCO) -> str:
+        self._capas.setdefault(nombre.upper(), (nombre, color_id))
+        return nombre
+
+    solicitar = garantizar
+
+    def crear_pendientes(self) -> int:
+        """Nada que crear: la tabla se escribe junto con las entidades."""
+        return 0
+
+    def tabla(self) -> List[Tuple[str, int]]:
+        return list(self._capas.values())
+
+
+class ColaDXF(ColaDibujo):
+    """
+    ColaDibujo que al vaciarse escribe un DXF en lugar de crear entidades.
+    Los cambios de propiedades por handle (ej. el cambio de capa de un
+    tramo) se dibujan como una copia de la polilínea en la capa nueva, para
+    lo cual hacen falta sus coordenadas en 'geometrias'.
+    """
+
+    def __init__(
+        self,
+        ruta: Optional[str] = None,
+        capas: Optional[CapasDXF] = None,
+        geometrias: Optional[Dict[str, Sequence[float]]] = None,
+    ):
+        super().__init__(None)
+        self.ruta = ruta or ruta_superposicion()
+        self.capas = capas if capas is not None else CapasDXF()
+        self.geometrias: Dict[str, Sequence[float]] = dict(geometrias or {})
+        self._cuerpo: List[str] = []
+
+    def vaciar(self) -> int:
+        """
+        Agrega lo encolado y reescribe el DXF completo (entidades de vaciados
+        anteriores incluidas).
+        Returns:
+            int: Cantidad de comandos escritos en este vaciado.
+        """
+        if not self._grupos and not self._modificaciones:
+            return 0
+
+        grupos, self._grupos = self._grupos, {}
+        modificaciones, self._modificaciones = self._modificaciones, []
+
+        hechos = 0
+        for (capa, _), comandos in grupos.items():
+            self.capas.garantizar(capa)
+            for cmd in comandos:
+                try:
+                    self._cuerpo.append(_entidad(cmd))
+                    hechos += 1
+                except Exception as e:
+                    logger.warning(f"Error al escribir {cmd.tipo} en DXF: {e}")
+
+        for cmd in modificaciones:
+            handle, propiedades = cmd.datos
+            props = dict(propiedades)
+            coords = self.geometrias.get(handle)
+            if coords is None or "Layer" not in props:
+                logger.warning(f"Sin geometría para copiar {handle} al DXF.")
+                continue
+            capa = self.capas.garantizar(props["Layer"])
+            puntos = list(zip(coords[::2], coords[1::2]))
+            self._cuerpo.append(
+                _polilinea(capa, _POR_CAPA, puntos, props.get("ConstantWidth", 0.0))
+            )
+            hechos += 1
+
+        escribir_dxf(self.ruta, self.capas.tabla(), self._cuerpo)
+        return hechos
+
+
+def escribir_dxf(
+    ruta: str, capas: Iterable[Tuple[str, int]], entidades: Iterable[str]
+) -> None:
+    """Escribe cabecera, tablas (LTYPE y LAYER) y entidades de una vez."""
+    capas = list(capas)
+    partes = [
+        _par(0, "SECTION"),
+        _par(2, "HEADER"),
+        _par(9, "$ACADVER"),
+        _par(1, "AC1009"),
+        _par(9, "$DWGCODEPAGE"),
+        _par(3, "ANSI_1252"),
+        _par(0, "ENDSEC"),
+        _par(0, "SECTION"),
+        _par(2, "TABLES"),
+        _par(0, "TABLE"),
+        _par(2, "LTYPE"),
+        _par(70, 1),
+        _par(0, "LTYPE"),
+        _par(2, "CONTINUOUS"),
+        _par(70, 0),
+        _par(3, "Solid line"),
+        _par(72, 65),
+        _par(73, 0),
+        _par(40, 0.0),
+        _par(0, "ENDTAB"),
+        _par(0, "TABLE"),
+        _par(2, "LAYER"),
+        _par(70, len(capas)),
+    ]
+    for nombre, color in capas:
+        partes.append(
+            _par(0, "LAYER")
+            + _par(2, nombre)
+            + _par(70, 0)
+            + _par(62, color)
+            + _par(6, "CONTINUOUS")
+        )
+    partes += [_par(0, "ENDTAB"), _par(0, "ENDSEC")]
+    partes += [_par(0, "SECTION"), _par(2, "ENTITIES")]
+    partes.extend(entidades)
+    partes += [_par(0, "ENDSEC"), _par(0, "EOF")]
+
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta, "w", encoding="cp1252", errors="replace", newline="\r\n") as f:
+        f.write("".join(partes))
+    logger.info(f"DXF de superposición escrito en: {ruta}")
+
+
+def _num(valor: float) -> str:
+    return repr(float(valor))
+
+
+def _par(codigo: int, valor: object) -> str:
+    return f"{codigo:>3}\n{valor}\n"
+
+
+def _comunes(tipo: str, capa: str, color: Optional[int]) -> str:
+    texto = f"  0\n{tipo}\n  8\n{capa}\n"
+    if color is not None and color != _POR_CAPA:
+        texto += f" 62\n{color}\n"
+    return texto
+
+
+def _entidad(cmd: ComandoDibujo) -> str:
+    """Texto DXF de un comando de la cola."""
+    if cmd.tipo == "linea":
+        (x1, y1), (x2, y2) = cmd.datos
+        return _comunes("LINE", cmd.capa, cmd.color) + (
+            f" 10\n{_num(x1)}\n 20\n{_num(y1)}\n 30\n0.0\n"
+            f" 11\n{_num(x2)}\n 21\n{_num(y2)}\n 31\n0.0\n"
+        )
+    if cmd.tipo == "circulo":
+        (x, y), radio = cmd.datos
+        return _comunes("CIRCLE", cmd.capa, cmd.color) + (
+            f" 10\n{_num(x)}\n 20\n{_num(y)}\n 30\n0.0\n 40\n{_num(radio)}\n"
+        )
+    if cmd.tipo == "polilinea":
+        return _polilinea(cmd.capa, cmd.color, cmd.datos[0])
+    if cmd.tipo == "texto":
+        texto, (x, y), altura, rotacion, alineacion = cmd.datos
+        dxf = _comunes("TEXT", cmd.capa, cmd.color) + (
+            f" 10\n{_num(x)}\n 20\n{_num(y)}\n 30\n0.0\n"
+            f" 40\n{_num(altura)}\n  1\n{texto}\n"
+        )
+        if rotacion:
+            dxf += f" 50\n{_num(math.degrees(rotacion))}\n"
+        h, v = _ALINEACIONES.get(alineacion or 0, (0, 0))
+        if h or v:
+            dxf += f" 72\n{h}\n 11\n{_num(x)}\n 21\n{_num(y)}\n 31\n0.0\n 73\n{v}\n"
+        return dxf
+    raise ValueError(f"Comando de dibujo desconocido: {cmd.tipo}")
+
+
+def _polilinea(
+    capa: str,
+    color: Optional[int],
+    puntos: Sequence[Tuple[float, float]],
+    ancho: float = 0.0,
+) -> str:
+    """POLYLINE 2D abierta con sus VERTEX (R12 no tiene LWPOLYLINE)."""
+    partes = [
+        _comunes("POLYLINE", capa, color),
+        " 66\n1\n 10\n0.0\n 20\n0.0\n 30\n0.0\n 70\n0\n",
+    ]
+    if ancho:
+        partes.append(f" 40\n{_num(ancho)}\n 41\n{_num(ancho)}\n")
+    for x, y in puntos:
+        partes.append(
+            f"  0\nVERTEX\n  8\n{capa}\n 10\n{_num(x)}\n 20\n{_num(y)}\n 30\n0.0\n"
+        )
+    partes.append(f"  0\nSEQEND\n  8\n{capa}\n")
+    return "".join(partes)
@@ -0,0 +1,797 @@
+"""
+Módulo de Grafo Compacto (CSR).
+Representación congelada de la red vial en arreglos contiguos
+(Compressed Sparse Row) para rutear con identificadores enteros.
+"""
+
+import functools
+import hashlib
+import heapq
+import math
+from array import array
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from .constants import Busqueda
+
+Point2D = Tuple[float, float]
+
+INF = float("inf")
+
+# Holgura relativa del límite: las cadenas colapsadas suman su largo por
+# adelantado, en otro orden que la búsqueda, y difieren en unos pocos ulps.
+HOLGURA_LIMITE = 1e-12
+
+# Arreglos que describen las cadenas de grado 2 colapsadas (ver desde_adyacencia)
+CAMPOS_CADENA = (
+    "arista_cadena",
+    "cadena_de",
+    "indice_cadena",
+    "posicion",
+    "cadena_extremos",
+    "cadena_largo",
+    "cadena_offsets",
+    "cadena_nodos",
+)
+
+# Punto de la red entre nodos (nodo virtual): nodos reales desde los que se
+# alcanza y la distancia hasta cada uno, ej. ((u, 3.5), (v, 16.5)) en la arista u-v
+Extremos = Tuple[Tuple[int, float], ...]
+Ubicacion = Union[int, Extremos]
+
+# Resultado crudo de una búsqueda sobre el núcleo: (Distancia, CaminoNucleo, Asentados)
+BuscarNucleo = Callable[
+    [Dict[int, float], Dict[int, float], float],
+    Tuple[Optional[float], List[int], int],
+]
+
+
+class CompactGraph:
+    """
+    Grafo no dirigido congelado en formato CSR.
+
+    - Nodo: entero 0..n-1 (coordenadas en xs/ys).
+    - Vecinos del nodo u: vecinos[offsets[u]:offsets[u + 1]] con sus pesos.
+
+    Al compilar se simplifica: cada cadena de nodos de grado 2 se colapsa en
+    una sola arista del "núcleo" (arista_cadena indica cuál) y de las aristas
+    paralelas queda solo la más corta. Los nodos interiores de una cadena no
+    tienen aristas propias; se ubican por cadena_de/posicion y, al rutear
+    desde o hacia ellos, se parte de los dos extremos de su cadena.
+
+    Se construye a partir de NetworkGraph (constructor con diccionarios)
+    y no admite modificaciones: ante cambios se vuelve a compilar.
+    """
+
+    __slots__ = (
+        "claves",
+        "ids",
+        "xs",
+        "ys",
+        "offsets",
+        "vecinos",
+        "pesos",
+        "factor_heuristica",
+    ) + CAMPOS_CADENA
+
+    def __init__(
+        self,
+        claves: List[Hashable],
+        xs: array,
+        ys: array,
+        offsets: array,
+        vecinos: array,
+        pesos: array,
+        ids: Optional[Dict[Hashable, int]] = None,
+        cadenas: Optional[Dict[str, array]] = None,
+        factor_heuristica: Optional[float] = None,
+    ):
+        self.claves = claves
+        self.ids: Dict[Hashable, int] = (
+            ids if ids is not None else {k: i for i, k in enumerate(claves)}
+        )
+        self.xs = xs
+        self.ys = ys
+        self.offsets = offsets
+        self.vecinos = vecinos
+        self.pesos = pesos
+
+        if cadenas is None:
+            # Sin simplificar: todos los nodos son del núcleo
+            n = len(claves)
+            cadenas = {
+                "arista_cadena": array("q", [-1]) * len(vecinos),
+                "cadena_de": array("q", [-1]) * n,
+                "indice_cadena": array("q", [0]) * n,
+                "posicion": array("d", [0.0]) * n,
+                "cadena_extremos": array("q"),
+                "cadena_largo": array("d"),
+                "cadena_offsets": array("q", [0]),
+                "cadena_nodos": array("q"),
+            }
+        for campo in CAMPOS_CADENA:
+            setattr(self, campo, cadenas[campo])
+
+        self.factor_heuristica = (
+            factor_heuristica
+            if factor_heuristica is not None
+            else self._calcular_factor_heuristica()
+        )
+
+    @classmethod
+    def desde_adyacencia(
+        cls,
+        nodes: Dict[Hashable, Point2D],
+        adj: Dict[Hashable, List[Tuple[Hashable, float]]],
+        simplificar: bool = True,
+    ) -> "CompactGraph":
+        """
+        Compila los diccionarios de NetworkGraph (nodes/adj) a arreglos CSR.
+        Conserva el orden de inserción de nodos.
+
+        Args:
+            simplificar (bool): Colapsa cadenas de grado 2 y descarta aristas
+                paralelas más largas. Con False se copia la adyacencia tal cual.
+        """
+        claves = list(nodes.keys())
+        ids = {k: i for i, k in enumerate(claves)}
+        n = len(claves)
+
+        xs = array("d", (nodes[k][0] for k in claves))
+        ys = array("d", (nodes[k][1] for k in claves))
+
+        if not simplificar:
+            offsets = array("q", [0])
+            vecinos = array("q")
+            pesos = array("d")
+            for k in claves:
+                for vecino, peso in adj.get(k, ()):
+                    vecinos.append(ids[vecino])
+                    pesos.append(peso)
+                offsets.append(len(vecinos))
+            return cls(claves, xs, ys, offsets, vecinos, pesos, ids)
+
+        # 1. Vecinos distintos (la arista paralela más corta) y sin bucles
+        ady: List[Dict[int, float]] = []
+        for u, k in enumerate(claves):
+            d: Dict[int, float] = {}
+            for vecino, peso in adj.get(k, ()):
+                v = ids[vecino]
+                if v != u and peso < d.get(v, INF):
+                    d[v] = peso
+            ady.append(d)
+
+        # 2. Núcleo: todo nodo de grado distinto de 2
+        nucleo = bytearray(1 if len(d) != 2 else 0 for d in ady)
+        cadena_de = array("q", [-1]) * n
+        indice_cadena = array("q", [0]) * n
+        posicion = array("d", [0.0]) * n
+        cadena_extremos = array("q")
+        cadena_largo = array("d")
+        cadena_offsets = array("q", [0])
+        cadena_nodos = array("q")
+
+        # Arista del núcleo por par de nodos: (peso, cadena o -1)
+        mejores: Dict[Tuple[int, int], Tuple[float, int]] = {}
+
+        def registrar(a: int, b: int, peso: float, cadena: int) -> None:
+            if a == b:
+                return  # Lazo: sus nodos interiores igual quedan ubicados
+            par = (a, b) if a < b else (b, a)
+            if peso < mejores.get(par, (INF, -1))[0]:
+                mejores[par] = (peso, cadena)
+
+        def recorrer(a: int) -> None:
+            """Sigue cada cadena que sale del nodo de núcleo 'a'."""
+            for v, peso in ady[a].items():
+                if nucleo[v]:
+                    registrar(a, v, peso, -1)
+                    continue
+                if cadena_de[v] != -1:
+                    continue  # Ya recorrida desde su otro extremo
+                c = len(cadena_largo)
+                previo, actual, largo, i = a, v, peso, 0
+                while not nucleo[actual]:
+                    cadena_de[actual] = c
+                    indice_cadena[actual] = i
+                    posicion[actual] = largo
+                    cadena_nodos.append(actual)
+                    i += 1
+                    (x1, w1), (x2, w2) = ady[actual].items()
+                    siguiente, paso = (x2, w2) if x1 == previo else (x1, w1)
+                    previo, actual = actual, siguiente
+                    largo += paso
+                cadena_extremos.extend((a, actual))
+                cadena_largo.append(largo)
+                cadena_offsets.append(len(cadena_nodos))
+                registrar(a, actual, largo, c)
+
+        for u in range(n):
+            if nucleo[u]:
+                recorrer(u)
+        # Anillos aislados (todo grado 2): se promueve un nodo al núcleo
+        for u in range(n):
+            if not nucleo[u] and cadena_de[u] == -1:
+                nucleo[u] = 1
+                recorrer(u)
+
+        # 3. CSR del núcleo (cada arista en ambos sentidos)
+        offsets = array("q", [0]) * (n + 1)
+        for a, b in mejores:
+            offsets[a + 1] += 1
+            offsets[b + 1] += 1
+        for u in range(n):
+            offsets[u + 1] += offsets[u]
+        total = offsets[n]
+        vecinos = array("q", [0]) * total
+        pesos = array("d", [0.0]) * total
+        arista_cadena = array("q", [-1]) * total
+        cursor = array("q", offsets[:n])
+        for (a, b), (peso, c) in mejores.items():
+            for x, y in ((a, b), (b, a)):
+                e = cursor[x]
+                vecinos[e] = y
+                pesos[e] = peso
+                arista_cadena[e] = c
+                cursor[x] = e + 1
+
+        cadenas = {
+            "arista_cadena": arista_cadena,
+            "cadena_de": cadena_de,
+            "indice_cadena": indice_cadena,
+            "posicion": posicion,
+            "cadena_extremos": cadena_extremos,
+            "cadena_largo": cadena_largo,
+            "cadena_offsets": cadena_offsets,
+            "cadena_nodos": cadena_nodos,
+        }
+        return cls(claves, xs, ys, offsets, vecinos, pesos, ids, cadenas)
+
+    def _calcular_factor_heuristica(self) -> float:
+        """
+        Escala la distancia en línea recta para que sea una cota inferior
+        (admisible y consistente) del costo real.
+
+        Por el snap, las coordenadas de un nodo pueden diferir de los extremos
+        reales de sus líneas, así que la recta entre nodos podría superar al
+        peso de la arista. Se divide por la peor razón recta/peso observada.
+        """
+        razon = 1.0
+        xs, ys, offsets, vecinos, pesos = (
+            self.xs,
+            self.ys,
+            self.offsets,
+            self.vecinos,
+            self.pesos,
+        )
+        for u in range(len(offsets) - 1):
+            for e in range(offsets[u], offsets[u + 1]):
+                v = vecinos[e]
+                recta = math.hypot(xs[u] - xs[v], ys[u] - ys[v])
+                if recta > razon * pesos[e]:
+                    razon = recta / pesos[e]
+        # Margen para errores de redondeo en la suma de pesos
+        return 1.0 / (razon * (1.0 + 1e-9))
+
+    @property
+    def num_nodos(self) -> int:
+        return len(self.claves)
+
+    @property
+    def num_nodos_nucleo(self) -> int:
+        """Nodos que quedan en la búsqueda (no interiores de una cadena)."""
+        return sum(1 for c in self.cadena_de if c == -1)
+
+    @property
+    def num_aristas(self) -> int:
+        """Cantidad de aristas no dirigidas del núcleo (cada una se guarda dos veces)."""
+        return len(self.vecinos) // 2
+
+    @property
+    def num_cadenas(self) -> int:
+        return len(self.cadena_largo)
+
+    def coordenadas(self, nodo: int) -> Point2D:
+        return (self.xs[nodo], self.ys[nodo])
+
+    def arreglos(self) -> Dict[str, array]:
+        """Todos los arreglos del grafo, por nombre de atributo."""
+        base = ("xs", "ys", "offsets", "vecinos", "pesos")
+        return {campo: getattr(self, campo) for campo in base + CAMPOS_CADENA}
+
+    def memoria_bytes(self) -> int:
+        """Tamaño aproximado de los arreglos CSR (sin el mapa de claves)."""
+        return sum(a.itemsize * len(a) for a in self.arreglos().values())
+
+    def huella(self) -> str:
+        """Hash (SHA-1) de la topología y pesos; identifica índices derivados."""
+        h = hashlib.sha1()
+        for a in self.arreglos().values():
+            h.update(memoryview(a).cast("B"))
+        return h.hexdigest()
+
+    # CONSULTAS PUNTO A PUNTO
+    # -----------------------
+
+    def ruta(
+        self,
+        origen: Ubicacion,
+        destino: Ubicacion,
+        estrategia: str = Busqueda.DIJKSTRA,
+        limite: float = INF,
+    ) -> Tuple[Optional[float], List[int], int]:
+        """
+        Camino más corto punto a punto sobre identificadores enteros.
+
+        Args:
+            origen (Ubicacion): Nodo de inicio, o Extremos de un nodo virtual.
+            destino (Ubicacion): Nodo de fin, o Extremos de un nodo virtual.
+            estrategia (str): Una de las constantes de Busqueda.
+            limite (float): Distancia máxima de interés. La búsqueda se corta
+                cuando el frente la supera.
+
+        Returns:
+            Tuple(Distancia, Camino, NodosAsentados):
+                (None, [], n) si no hay camino;
+                (INF, [], n) si el camino supera el límite.
+            El camino incluye los nodos interiores de las cadenas recorridas
+            (de un nodo virtual, desde el extremo por el que se sale).
+        """
+        if estrategia == Busqueda.DIJKSTRA:
+            buscar = self._dijkstra
+        elif estrategia == Busqueda.ASTAR:
+            buscar = self._astar
+        elif estrategia == Busqueda.BIDIRECCIONAL:
+            buscar = functools.partial(self._bidireccional, heuristica=False)
+        elif estrategia == Busqueda.BIDIRECCIONAL_ASTAR:
+            buscar = functools.partial(self._bidireccional, heuristica=True)
+        else:
+            raise ValueError(f"Estrategia de búsqueda desconocida: '{estrategia}'")
+        return self.resolver_ruta(origen, destino, limite, buscar)
+
+    def resolver_ruta(
+        self, origen: Ubicacion, destino: Ubicacion, limite: float, buscar: BuscarNucleo
+    ) -> Tuple[Optional[float], List[int], int]:
+        """
+        Traduce una consulta entre nodos cualesquiera a una búsqueda sobre el
+        núcleo: fuentes y sumideros son los extremos de cadena con su distancia.
+        'buscar(fuentes, sumideros, limite)' devuelve el camino del núcleo.
+        """
+        if origen == destino and not isinstance(origen, tuple):
+            return 0.0, [origen], 1
+
+        limite = _con_holgura(limite)
+        desde, hasta = _como_extremos(origen), _como_extremos(destino)
+        fuentes, via_fuente = self._semillas_extremos(desde)
+        sumideros, via_sumidero = self._semillas_extremos(hasta)
+        dist, nucleo, asentados = buscar(fuentes, sumideros, limite)
+
+        # Ambos en la misma cadena: el tramo directo también es candidato
+        directo = self._directo_extremos(desde, hasta)
+        if directo is not None and directo[0] <= limite:
+            if dist is None or dist == INF or directo[0] <= dist:
+                return directo[0], directo[1], asentados
+
+        if dist is None or dist == INF:
+            return dist, [], asentados
+        total = self._longitud_nucleo(fuentes, nucleo, sumideros)
+        camino = self._expandir(via_fuente[nucleo[0]], nucleo, via_sumidero[nucleo[-1]])
+        return total, camino, asentados
+
+    def _dijkstra(
+        self, fuentes: Dict[int, float], sumideros: Dict[int, float], limite: float
+    ) -> Tuple[Optional[float], List[int], int]:
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        dist: Dict[int, float] = dict(fuentes)
+        padre: Dict[int, int] = {v: -1 for v in fuentes}
+        queue: List[Tuple[float, int]] = [(d, v) for v, d in fuentes.items()]
+        heapq.heapify(queue)
+        mejor = INF
+        fin = -1
+        asentados = 0
+
+        while queue:
+            d, u = heappop(queue)
+            if d >= mejor:
+                break
+            if d > limite:
+                return INF, [], asentados
+            if d > dist[u]:
+                continue
+            asentados += 1
+            extra = sumideros.get(u)
+            if extra is not None and d + extra < mejor:
+                mejor = d + extra
+                fin = u
+            for e in range(offsets[u], offsets[u + 1]):
+                v = vecinos[e]
+                nd = d + pesos[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    padre[v] = u
+                    heappush(queue, (nd, v))
+
+        if fin == -1:
+            return None, [], asentados
+        if mejor > limite:
+            return INF, [], asentados
+        return mejor, self.reconstruir_camino(padre, fin), asentados
+
+    def _cota_inferior(self, semillas: Dict[int, float]) -> Callable[[int], float]:
+        """
+        Heurística hacia un conjunto de semillas: min(f * recta + desfase).
+        El mínimo de funciones consistentes sigue siendo consistente.
+        """
+        xs, ys = self.xs, self.ys
+        f = self.factor_heuristica
+        hypot = math.hypot
+        puntos = [(xs[t], ys[t], extra) for t, extra in semillas.items()]
+        if len(puntos) == 1:
+            tx, ty, extra = puntos[0]
+            return lambda v: f * hypot(xs[v] - tx, ys[v] - ty) + extra
+
+        def cota(v: int) -> float:
+            x, y = xs[v], ys[v]
+            return min(f * hypot(x - tx, y - ty) + extra for tx, ty, extra in puntos)
+
+        return cota
+
+    def _astar(
+        self, fuentes: Dict[int, float], sumideros: Dict[int, float], limite: float
+    ) -> Tuple[Optional[float], List[int], int]:
+        """A* con la distancia en línea recta (escalada) como heurística."""
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        heappush, heappop = heapq.heappush, heapq.heappop
+        h = self._cota_inferior(sumideros)
+
+        dist: Dict[int, float] = dict(fuentes)
+        padre: Dict[int, int] = {v: -1 for v in fuentes}
+        queue = [(d + h(v), d, v) for v, d in fuentes.items()]
+        heapq.heapify(queue)
+        mejor = INF
+        fin = -1
+        asentados = 0
+
+        while queue:
+            clave, d, u = heappop(queue)
+            if clave >= mejor:
+                break
+            if clave > limite:
+                # La heurística es cota inferior: ningún camino cabe en el límite
+                return INF, [], asentados
+            if d > dist[u]:
+                continue
+            asentados += 1
+            extra = sumideros.get(u)
+            if extra is not None and d + extra < mejor:
+                mejor = d + extra
+                fin = u
+            for e in range(offsets[u], offsets[u + 1]):
+                v = vecinos[e]
+                nd = d + pesos[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    padre[v] = u
+                    heappush(queue, (nd + h(v), nd, v))
+
+        if fin == -1:
+            return None, [], asentados
+        if mejor > limite:
+            return INF, [], asentados
+        return mejor, self.reconstruir_camino(padre, fin), asentados
+
+    def _bidireccional(
+        self,
+        fuentes: Dict[int, float],
+        sumideros: Dict[int, float],
+        limite: float,
+        heuristica: bool,
+    ) -> Tuple[Optional[float], List[int], int]:
+        """
+        Dijkstra bidireccional (opcionalmente A* con potenciales promediados).
+
+        Con heurística, ambos frentes usan pf(v) = (h_destino(v) - h_origen(v)) / 2
+        y pb = -pf, que son consistentes; así el criterio de parada clásico
+        (tope_adelante + tope_atras >= mejor) sigue siendo exacto.
+        """
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        if heuristica:
+            h_destino = self._cota_inferior(sumideros)
+            h_origen = self._cota_inferior(fuentes)
+
+            def potencial(v: int) -> float:
+                return (h_destino(v) - h_origen(v)) / 2
+
+        else:
+
+            def potencial(v: int) -> float:
+                return 0.0
+
+        # Índice 0: frente desde el origen; 1: frente desde el destino
+        signo = (1.0, -1.0)
+        dist: Tuple[Dict[int, float], Dict[int, float]] = (dict(fuentes), dict(sumideros))
+        padre: Tuple[Dict[int, int], Dict[int, int]] = (
+            {v: -1 for v in fuentes},
+            {v: -1 for v in sumideros},
+        )
+        colas = (
+            [(d + potencial(v), d, v) for v, d in fuentes.items()],
+            [(d - potencial(v), d, v) for v, d in sumideros.items()],
+        )
+        heapq.heapify(colas[0])
+        heapq.heapify(colas[1])
+        mejor = INF
+        encuentro = -1
+        for v, d in fuentes.items():
+            if v in sumideros and d + sumideros[v] < mejor:
+                mejor = d + sumideros[v]
+                encuentro = v
+        asentados = 0
+        cortado = False
+
+        while colas[0] and colas[1]:
+            tope = colas[0][0][0] + colas[1][0][0]
+            if tope >= mejor:
+                break
+            if tope > limite:
+                cortado = True
+                break
+            lado = 0 if colas[0][0][0] <= colas[1][0][0] else 1
+            d_propia, d_otra = dist[lado], dist[1 - lado]
+            p_propio = padre[lado]
+            cola = colas[lado]
+            sg = signo[lado]
+
+            _, d, u = heappop(cola)
+            if d > d_propia[u]:
+                continue
+            asentados += 1
+            for e in range(offsets[u], offsets[u + 1]):
+                v = vecinos[e]
+                nd = d + pesos[e]
+                if nd < d_propia.get(v, INF):
+                    d_propia[v] = nd
+                    p_propio[v] = u
+                    heappush(cola, (nd + sg * potencial(v), nd, v))
+                    otra = d_otra.get(v)
+                    if otra is not None and nd + otra < mejor:
+                        mejor = nd + otra
+                        encuentro = v
+
+        if encuentro == -1:
+            return (INF if cortado else None), [], asentados
+        if mejor > limite:
+            return INF, [], asentados
+
+        ida = self.reconstruir_camino(padre[0], encuentro)
+        vuelta = self.reconstruir_camino(padre[1], encuentro)
+        return mejor, ida + vuelta[-2::-1], asentados
+
+    # CADENAS COLAPSADAS
+    # ------------------
+
+    def _semillas(self, nodo: int) -> Dict[int, float]:
+        """Nodos del núcleo desde los que se alcanza 'nodo', con su distancia."""
+        c = self.cadena_de[nodo]
+        if c == -1:
+            return {nodo: 0.0}
+        a, b = self.cadena_extremos[2 * c], self.cadena_extremos[2 * c + 1]
+        pos = self.posicion[nodo]
+        resto = self.cadena_largo[c] - pos
+        if a == b:
+            return {a: min(pos, resto)}
+        return {a: pos, b: resto}
+
+    def _semillas_extremos(
+        self, extremos: Extremos
+    ) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Semillas de varios nodos con su desfase (la menor por nodo del
+        núcleo) y, por cada semilla, el nodo del que proviene.
+        """
+        semillas: Dict[int, float] = {}
+        via: Dict[int, int] = {}
+        for nodo, desfase in extremos:
+            for x, d in self._semillas(nodo).items():
+                if d + desfase < semillas.get(x, INF):
+                    semillas[x] = d + desfase
+                    via[x] = nodo
+        return semillas, via
+
+    def _directo_extremos(
+        self, desde: Extremos, hasta: Extremos
+    ) -> Optional[Tuple[float, List[int]]]:
+        """El mejor recorrido sin pasar por el núcleo entre dos ubicaciones."""
+        mejor = None
+        if len(desde) == 2 and len(hasta) == 2:
+            (a, da), (b, db) = desde
+            (a2, da2), (b2, db2) = hasta
+            # Dos nodos virtuales sobre la misma arista: se va directo por ella
+            if (a, b) == (a2, b2) and abs((da + db) - (da2 + db2)) <= 1e-9 * (da + db):
+                mejor = (abs(da - da2), [])
+        for o, d_o in desde:
+            for t, d_t in hasta:
+                if o == t:
+                    candidato = (d_o + d_t, [o])
+                else:
+                    tramo = self._tramo_directo(o, t)
+                    if tramo is None:
+                        continue
+                    candidato = (d_o + tramo[0] + d_t, tramo[1])
+                if mejor is None or candidato[0] < mejor[0]:
+                    mejor = candidato
+        return mejor
+
+    def _nodos_cadena(self, c: int) -> array:
+        return self.cadena_nodos[self.cadena_offsets[c] : self.cadena_offsets[c + 1]]
+
+    def _tramo_directo(
+        self, origen: int, destino: int
+    ) -> Optional[Tuple[float, List[int]]]:
+        """Recorrido sin salir de la cadena si ambos son interiores de la misma."""
+        c = self.cadena_de[origen]
+        if c == -1 or self.cadena_de[destino] != c:
+            return None
+        i, j = self.indice_cadena[origen], self.indice_cadena[destino]
+        nodos = self._nodos_cadena(c)
+        camino = list(nodos[i : j + 1]) if i <= j else list(nodos[j : i + 1])[::-1]
+        return abs(self.posicion[destino] - self.posicion[origen]), camino
+
+    def _tramo_hasta(self, nodo: int, extremo: int) -> List[int]:
+        """Nodos desde 'nodo' (incluido) hasta el extremo de su cadena (excluido)."""
+        c = self.cadena_de[nodo]
+        if c == -1:
+            return []
+        a, b = self.cadena_extremos[2 * c], self.cadena_extremos[2 * c + 1]
+        pos = self.posicion[nodo]
+        hacia_a = extremo == a and (a != b or pos <= self.cadena_largo[c] - pos)
+        i = self.indice_cadena[nodo]
+        nodos = self._nodos_cadena(c)
+        return list(nodos[i::-1]) if hacia_a else list(nodos[i:])
+
+    def _arista(self, u: int, v: int) -> int:
+        """Índice de la arista u->v más corta."""
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        mejor = -1
+        for e in range(offsets[u], offsets[u + 1]):
+            if vecinos[e] == v and (mejor == -1 or pesos[e] < pesos[mejor]):
+                mejor = e
+        return mejor
+
+    def _expandir(self, origen: int, nucleo: List[int], destino: int) -> List[int]:
+        """Camino completo: tramo inicial, cadenas del núcleo y tramo final."""
+        camino = self._tramo_hasta(origen, nucleo[0])
+        camino.append(nucleo[0])
+        for u, v in zip(nucleo, nucleo[1:]):
+            c = self.arista_cadena[self._arista(u, v)]
+            if c != -1:
+                interiores = list(self._nodos_cadena(c))
+                if u != self.cadena_extremos[2 * c]:
+                    interiores.reverse()
+                camino.extend(interiores)
+            camino.append(v)
+        camino.extend(reversed(self._tramo_hasta(destino, nucleo[-1])))
+        return camino
+
+    def _longitud_nucleo(
+        self, fuentes: Dict[int, float], nucleo: List[int], sumideros: Dict[int, float]
+    ) -> float:
+        """
+        Suma el camino del núcleo en orden Inicio->Fin (desfase de la fuente,
+        aristas y desfase del sumidero), igual que lo acumula Dijkstra, para
+        que todas las estrategias den exactamente el mismo valor.
+        """
+        pesos = self.pesos
+        total = fuentes[nucleo[0]]
+        for u, v in zip(nucleo, nucleo[1:]):
+            total += pesos[self._arista(u, v)]
+        return total + sumideros[nucleo[-1]]
+
+    # UN ORIGEN, MUCHOS DESTINOS
+    # --------------------------
+
+    def arbol_caminos(
+        self,
+        origen: Ubicacion,
+        destinos: Iterable[Ubicacion],
+        limite: float = INF,
+        reconstruir: bool = True,
+    ) -> Tuple[Dict[Ubicacion, Tuple[float, List[int]]], int]:
+        """
+        Dijkstra de un origen a muchos destinos (árbol de caminos mínimos).
+        Se detiene en cuanto todos los destinos quedan asentados o el frente
+        supera 'limite'.
+        Origen y destinos pueden ser nodos o nodos virtuales (Extremos).
+
+        Returns:
+            Tuple(Rutas, NodosAsentados): {destino: (Distancia, Camino)} para
+            cada destino alcanzable; (INF, []) si quedó más allá del límite.
+            Sin 'reconstruir' los caminos quedan vacíos.
+        """
+        offsets, vecinos, pesos = self.offsets, self.vecinos, self.pesos
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        limite = _con_holgura(limite)
+        desde = _como_extremos(origen)
+        fuentes, via_fuente = self._semillas_extremos(desde)
+        sumideros = {t: self._semillas_extremos(_como_extremos(t)) for t in destinos}
+        pendientes = {x for s, _ in sumideros.values() for x in s}
+        asentados: Dict[int, float] = {}
+        dist: Dict[int, float] = dict(fuentes)
+        padre: Dict[int, int] = {v: -1 for v in fuentes}
+        queue: List[Tuple[float, int]] = [(d, v) for v, d in fuentes.items()]
+        heapq.heapify(queue)
+        n_asentados = 0
+        cortado = False
+
+        while queue and pendientes:
+            d, u = heappop(queue)
+            if d > limite:
+                cortado = True
+                break
+            if d > dist[u]:
+                continue
+            n_asentados += 1
+            if u in pendientes:
+                pendientes.discard(u)
+                asentados[u] = d
+            for e in range(offsets[u], offsets[u + 1]):
+                v = vecinos[e]
+                nd = d + pesos[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    padre[v] = u
+                    heappush(queue, (nd, v))
+
+        rutas: Dict[Ubicacion, Tuple[float, List[int]]] = {}
+        for t, (semillas, via) in sumideros.items():
+            if t == origen and not isinstance(origen, tuple):
+                rutas[t] = (0.0, [origen])
+                continue
+            mejor, fin = INF, -1
+            for x, extra in semillas.items():
+                if x in asentados and asentados[x] + extra < mejor:
+                    mejor, fin = asentados[x] + extra, x
+
+            directo = self._directo_extremos(desde, _como_extremos(t))
+            if directo is not None and directo[0] <= limite and directo[0] <= mejor:
+                rutas[t] = (directo[0], directo[1] if reconstruir else [])
+            elif fin != -1 and mejor <= limite:
+                camino = []
+                if reconstruir:
+                    nucleo = self.reconstruir_camino(padre, fin)
+                    camino = self._expandir(via_fuente[nucleo[0]], nucleo, via[fin])
+                rutas[t] = (mejor, camino)
+            elif fin != -1 or cortado:
+                rutas[t] = (INF, [])
+
+        return rutas, n_asentados
+
+    def reconstruir_camino(self, padre: Dict[int, int], destino: int) -> List[int]:
+        """Recorre los padres desde el destino y devuelve la ruta Inicio->Fin."""
+        camino = []
+        actual = destino
+        while actual != -1:
+            camino.append(actual)
+            actual = padre[actual]
+        camino.reverse()
+        return camino
+
+    def nodo_de(self, clave: Any) -> Optional[int]:
+        """Identificador entero de una clave del constructor (o None)."""
+        return self.ids.get(clave)
+
+
+def _como_extremos(ubicacion: Ubicacion) -> Extremos:
+    """Un nodo real equivale a un nodo virtual a distancia 0 de él."""
+    if isinstance(ubicacion, tuple):
+        return ubicacion
+    return ((ubicacion, 0.0),)
+
+
+def _con_holgura(limite: float) -> float:
+    """Límite ampliado en HOLGURA_LIMITE (relativa) para absorber el redondeo."""
+    return limite + abs(limite) * HOLGURA_LIMITE
@@ -0,0 +1,297 @@
+"""
+Lector de DXF sin AutoCAD.
+Recorre un DXF ASCII mapeado en memoria (mmap) leyendo pares código/valor y
+produce la misma InstantaneaModelo que el escaneo COM: líneas viales,
+tramos (LWPOLYLINE), bloques de equipos con sus atributos y textos.
+Las secciones que no interesan (HEADER, CLASSES, BLOCKS, OBJECTS, ...) y las
+entidades de otros tipos se saltan buscando el siguiente código 0 sin
+decodificarlas, así la memoria usada depende solo de lo que se extrae.
+"""
+
+import mmap
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .acad_snapshot import (
+    InstantaneaModelo,
+    Segmento,
+    TextoCAD,
+    TramoCAD,
+    parametros_segun_config,
+)
+from .feedback_logger import logger
+
+# Un código 0 seguido de su valor (nombre de entidad/sección en mayúsculas).
+# Un valor "0" va siempre seguido de una línea de código (numérica), así que
+# el patrón no puede confundirse con datos.
+# Los patrones incluyen el salto de línea previo: anclar con '^' y re.M es
+# varias veces más lento sobre archivos grandes.
+_CODIGO_0 = re.compile(rb"\n[ \t]*0\r?\n(?=[A-Z_])")
+_FIN_SECCION = re.compile(rb"\n[ \t]*0\r?\nENDSEC\r?\n")
+_FIN_TABLA = re.compile(rb"\n[ \t]*0\r?\nENDTAB\r?\n")
+
+_CENTINELA_BINARIO = b"AutoCAD Binary DXF"
+_TIPOS_TEXTO = (b"TEXT", b"MTEXT")
+_ATRIBUTOS = (b"ATTRIB", b"SEQEND")
+
+
+def _texto(valor: bytes) -> str:
+    """Valor de cadena (UTF-8 desde R2007, ANSI en versiones anteriores)."""
+    try:
+        return valor.decode("utf-8")
+    except UnicodeDecodeError:
+        return valor.decode("cp1252", errors="replace")
+
+
+class _Lector:
+    """Cursor de pares (código, valor) sobre el archivo mapeado."""
+
+    def __init__(self, mm: mmap.mmap):
+        self.mm = mm
+        self.readline = mm.readline
+
+    def par(self) -> Tuple[int, bytes]:
+        codigo = self.readline()
+        if not codigo:
+            return -1, b"EOF"
+        return int(codigo), self.readline().rstrip(b"\r\n")
+
+    def grupos(self) -> List[Tuple[int, bytes]]:
+        """Pares de la entidad actual, hasta el siguiente código 0 (en bloque)."""
+        mm = self.mm
+        inicio = mm.tell()
+        m = _CODIGO_0.search(mm, inicio - 1)
+        fin = m.start() + 1 if m else len(mm)
+        mm.seek(fin)
+        lineas = mm[inicio:fin].splitlines()
+        return list(zip(map(int, lineas[::2]), lineas[1::2]))
+
+    def saltar(self, patron: "re.Pattern[bytes]") -> None:
+        """
+        Avanza hasta el siguiente match de 'patron' (sin consumirlo). El
+        cursor siempre está al inicio de una línea: se busca desde el salto
+        de línea anterior.
+        """
+        m = patron.search(self.mm, self.mm.tell() - 1)
+        self.mm.seek(m.start() + 1 if m else len(self.mm))
+
+
+def leer_dxf(
+    ruta: str,
+    capa_red: Optional[str] = None,
+    capa_tramos: Optional[str] = None,
+    nombres_bloques: Iterable[str] = (),
+    textos: bool = False,
+    capa_textos: Optional[str] = None,
+) -> InstantaneaModelo:
+    """
+    Instantánea del ModelSpace de un DXF ASCII (mismos argumentos y
+    registros que capturar_modelo). Los bloques dinámicos anónimos (*U...)
+    se resuelven a su nombre efectivo con la tabla BLOCK_RECORD; las
+    propiedades dinámicas no se leen ('dynamic_props' queda vacío).
+    'entidades' cuenta las entidades de los tipos pedidos que se leyeron (como
+    el escaneo COM con conjuntos de selección); las demás se saltan sin
+    contarlas.
+    """
+    with open(ruta, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:22].startswith(_CENTINELA_BINARIO):
+                raise ValueError(f"DXF binario no soportado: {ruta}")
+            modelo = _leer(
+                _Lector(mm),
+                capa_red.upper() if capa_red else None,
+                capa_tramos.upper() if capa_tramos else None,
+                set(nombres_bloques),
+                textos,
+                capa_textos.upper() if capa_textos else None,
+            )
+
+    logger.debug(
+        f"DXF: {modelo.entidades} entidad(es) -> {len(modelo.lineas)} línea(s), "
+        f"{len(modelo.tramos)} tramo(s), {len(modelo.bloques)} bloque(s), "
+        f"{len(modelo.textos)} texto(s)."
+    )
+    return modelo
+
+
+def _leer(
+    lector: _Lector,
+    red: Optional[str],
+    tramo: Optional[str],
+    buscados: Set[str],
+    textos: bool,
+    capa_txt: Optional[str],
+) -> InstantaneaModelo:
+    efectivos: Dict[str, str] = {}
+    lineas: List[Segmento] = []
+    tramos: List[TramoCAD] = []
+    bloques: List[Dict[str, Any]] = []
+    hallados_txt: List[TextoCAD] = []
+    entidades = 0
+
+    while True:
+        codigo, valor = lector.par()
+        if codigo == -1 or (codigo == 0 and valor == b"EOF"):
+            break
+        if codigo != 0 or valor != b"SECTION":
+            continue
+        _, seccion = lector.par()
+        if seccion == b"TABLES" and buscados:
+            efectivos = _leer_block_records(lector)
+        elif seccion == b"ENTITIES":
+            entidades = _leer_entidades(
+                lector,
+                red,
+                tramo,
+                buscados,
+                textos,
+                capa_txt,
+                efectivos,
+                (lineas, tramos, bloques, hallados_txt),
+            )
+        else:
+            lector.saltar(_FIN_SECCION)
+
+    return InstantaneaModelo(lineas, tramos, bloques, hallados_txt, entidades)
+
+
+def _leer_block_records(lector: _Lector) -> Dict[str, str]:
+    """
+    Nombre efectivo de cada definición anónima de bloque dinámico: su
+    BLOCK_RECORD lleva XDATA 'AcDbBlockRepBTag' con el handle del original.
+    """
+    nombres: Dict[bytes, str] = {}  # handle -> nombre
+    referencias: Dict[str, bytes] = {}  # nombre anónimo -> handle original
+    handle, nombre, app = b"", "", b""
+
+    while True:
+        codigo, valor = lector.par()
+        if codigo == -1 or (codigo == 0 and valor == b"ENDSEC"):
+            break
+        if codigo == 0:
+            if valor == b"TABLE":
+                _, tabla = lector.par()
+                if tabla != b"BLOCK_RECORD":
+                    lector.saltar(_FIN_TABLA)
+                continue
+            if handle and nombre:
+                nombres[handle] = nombre
+            handle, nombre, app = b"", "", b""
+        elif codigo == 5:
+            handle = valor
+        elif codigo == 2:
+            nombre = _texto(valor)
+        elif codigo == 1001:
+            app = valor
+        elif codigo == 1005 and app == b"AcDbBlockRepBTag":
+            referencias[nombre] = valor
+
+    return {
+        anonimo: nombres[h] for anonimo, h in referencias.items() if h in nombres
+    }
+
+
+def _leer_entidades(
+    lector: _Lector,
+    red: Optional[str],
+    tramo: Optional[str],
+    buscados: Set[str],
+    textos: bool,
+    capa_txt: Optional[str],
+    efectivos: Dict[str, str],
+    salida: Tuple[list, list, list, list],
+) -> int:
+    """Clasifica las entidades del ModelSpace; devuelve cuántas leyó (sin ATTRIB)."""
+    lineas, tramos, bloques, hallados_txt = salida
+    interesan = set()
+    if red:
+        interesan.add(b"LINE")
+    if tramo:
+        interesan.add(b"LWPOLYLINE")
+    if buscados:
+        interesan.update((b"INSERT",) + _ATRIBUTOS)
+    if textos:
+        interesan.update(_TIPOS_TEXTO)
+
+    # Las entidades de otros tipos se saltan de una sola búsqueda
+    proxima = re.compile(
+        rb"\n[ \t]*0\r?\n(?:%s)\r?\n" % b"|".join(sorted(interesan) + [b"ENDSEC"])
+    )
+
+    total = 0
+    bloque_actual: Optional[Dict[str, Any]] = None
+    while True:
+        lector.saltar(proxima)
+        codigo, tipo = lector.par()
+        if codigo == -1 or tipo == b"ENDSEC":
+            break
+        if tipo not in _ATRIBUTOS:
+            total += 1
+            bloque_actual = None
+
+        pares = lector.grupos()
+        grupos = dict(pares)
+        if grupos.get(67) == b"1":  # Espacio papel
+            pass
+        elif tipo == b"ATTRIB":
+            if bloque_actual is not None and 2 in grupos:
+                bloque_actual["attributes"][_texto(grupos[2])] = _texto(
+                    grupos.get(1, b"")
+                )
+        elif tipo == b"SEQEND":
+            bloque_actual = None
+        else:
+            capa = _texto(grupos.get(8, b"0"))
+            handle = _texto(grupos.get(5, b""))
+            clave = capa.upper()
+            if tipo == b"LINE":
+                if clave == red:
+                    lineas.append(
+                        (
+                            handle,
+                            (float(grupos[10]), float(grupos[20])),
+                            (float(grupos[11]), float(grupos[21])),
+                        )
+                    )
+            elif tipo == b"LWPOLYLINE":
+                if clave == tramo:
+                    coords = tuple(float(v) for c, v in pares if c == 10 or c == 20)
+                    tramos.append(TramoCAD(handle, capa, coords))
+            elif tipo == b"INSERT":
+                nombre = _texto(grupos.get(2, b""))
+                nombre = efectivos.get(nombre, nombre)
+                if nombre in buscados:
+                    bloque = {
+                        "name": nombre,
+                        "handle": handle,
+                        "layer": capa,
+                        "xyz": (
+                            float(grupos.get(10, 0)),
+                            float(grupos.get(20, 0)),
+                            float(grupos.get(30, 0)),
+                        ),
+                        "attributes": {},
+                        "dynamic_props": {},
+                    }
+                    bloques.append(bloque)
+                    if grupos.get(66) == b"1":
+                        bloque_actual = bloque
+            elif capa_txt is None or clave == capa_txt:
+                texto = grupos.get(1, b"")
+                if tipo == b"MTEXT":
+                    # Texto largo: trozos de 250 caracteres en código 3
+                    texto = b"".join(v for c, v in pares if c == 3) + texto
+                hallados_txt.append(
+                    TextoCAD(
+                        handle,
+                        capa,
+                        (float(grupos.get(10, 0)), float(grupos.get(20, 0))),
+                        _texto(texto),
+                    )
+                )
+
+    return total
+
+
+def capturar_dxf_segun_config(ruta: str, textos: bool = False) -> InstantaneaModelo:
+    """Como capturar_segun_config, pero leyendo un DXF exportado."""
+    return leer_dxf(ruta, **parametros_segun_config(textos))
@@ -0,0 +1,197 @@
+"""
+Módulo de Noding (Nodado de la red vial).
+Detecta cruces entre líneas y contactos en "T" (un extremo apoyado en medio
+de otra línea) y parte los segmentos en esos puntos antes de armar el grafo.
+Usa una rejilla de cubetas para comparar solo segmentos vecinos (no O(n²)).
+"""
+
+import math
+from typing import Dict, Iterable, List, Tuple
+from .feedback_logger import logger
+from .spatial_index import recorrido_celdas
+from .utils_math import proyectar_en_segmento
+
+Point2D = Tuple[float, float]
+Segmento = Tuple[Point2D, Point2D]
+Celda = Tuple[int, int]
+
+
+def distancia_segmentos(a: Point2D, b: Point2D, c: Point2D, d: Point2D) -> float:
+    """Distancia mínima entre los segmentos ab y cd (0 si se cruzan)."""
+
+    def orientacion(p: Point2D, q: Point2D, r: Point2D) -> float:
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    if (
+        orientacion(a, b, c) * orientacion(a, b, d) < 0
+        and orientacion(c, d, a) * orientacion(c, d, b) < 0
+    ):
+        return 0.0
+    return min(
+        proyectar_en_segmento(a, c, d)[0],
+        proyectar_en_segmento(b, c, d)[0],
+        proyectar_en_segmento(c, a, b)[0],
+        proyectar_en_segmento(d, a, b)[0],
+    )
+
+
+def tamano_celda(segmentos: List[Segmento], tolerancia: float) -> float:
+    """Celda del orden del largo medio de los segmentos (mínimo 4 tolerancias)."""
+    total = sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in segmentos)
+    medio = total / len(segmentos) if segmentos else 1.0
+    return max(medio, 4 * tolerancia, 1e-6)
+
+
+def nodar_segmentos(
+    segmentos: List[Segmento], tolerancia: float
+) -> Tuple[List[Segmento], Dict[str, int]]:
+    """
+    Parte los segmentos en cruces y contactos en T (ver nodar_con_origen).
+
+    Returns:
+        Tuple(Piezas, Estadisticas)
+    """
+    piezas, _, stats = nodar_con_origen(segmentos, tolerancia)
+    return piezas, stats
+
+
+def nodar_con_origen(
+    segmentos: List[Segmento], tolerancia: float
+) -> Tuple[List[Segmento], List[int], Dict[str, int]]:
+    """
+    Parte los segmentos en cruces y contactos en T.
+
+    - Cruce: dos segmentos se intersectan lejos (> tolerancia) de sus extremos;
+      ambos se cortan en el mismo punto de intersección.
+    - Contacto en T: un extremo queda a <= tolerancia del interior de otro
+      segmento; el otro se corta exactamente en ese extremo.
+
+    Cada segmento se anota solo en las celdas que atraviesa (recorrido DDA,
+    ver spatial_index.recorrido_celdas), no en toda su caja envolvente. Un
+    cruce se evalúa solo en la celda que contiene el punto de intersección,
+    así no se repite aunque ambos segmentos compartan varias celdas; los
+    contactos en T se buscan en las celdas alrededor de cada extremo.
+
+    Args:
+        segmentos (List[Segmento]): Lista de líneas ((x1, y1), (x2, y2)).
+        tolerancia (float): Distancia de snap de la red (metros).
+
+    Returns:
+        Tuple(Piezas, Origen, Estadisticas): Segmentos resultantes, índice
+        del segmento de entrada del que sale cada pieza y conteo de
+        {"cruces": int, "contactos_t": int, "segmentos_partidos": int}.
+    """
+    stats = {"cruces": 0, "contactos_t": 0, "segmentos_partidos": 0}
+    if not segmentos:
+        return [], [], stats
+
+    celda = tamano_celda(segmentos, tolerancia)
+
+    def celda_de(p: Point2D) -> Celda:
+        return (math.floor(p[0] / celda), math.floor(p[1] / celda))
+
+    # 1. Cubetas: cada segmento en las celdas que atraviesa
+    cubetas: Dict[Celda, List[int]] = {}
+    cajas: List[Tuple[float, float, float, float]] = []
+    for i, (a, b) in enumerate(segmentos):
+        cajas.append(
+            (min(a[0], b[0]), min(a[1], b[1]), max(a[0], b[0]), max(a[1], b[1]))
+        )
+        for c in recorrido_celdas(a, b, celda):
+            cubetas.setdefault(c, []).append(i)
+
+    # 2. Puntos de corte por segmento: (parámetro t, punto)
+    cortes: Dict[int, List[Tuple[float, Point2D]]] = {}
+
+    # 2a. Contactos en T: extremos de i apoyados en el interior de otro segmento.
+    # La celda es >= 4 tolerancias: el círculo de cada extremo toca <= 4 celdas.
+    for i, extremos in enumerate(segmentos):
+        for p in extremos:
+            x0, y0 = celda_de((p[0] - tolerancia, p[1] - tolerancia))
+            x1, y1 = celda_de((p[0] + tolerancia, p[1] + tolerancia))
+            if x0 == x1 and y0 == y1:
+                vecinos: Iterable[int] = cubetas[(x0, y0)]  # Caso común: una celda
+            else:
+                vecinos = dict.fromkeys(
+                    j
+                    for ix in range(x0, x1 + 1)
+                    for iy in range(y0, y1 + 1)
+                    for j in cubetas.get((ix, iy), ())
+                )
+            for j in vecinos:
+                xj0, yj0, xj1, yj1 = cajas[j]
+                if j == i or not (
+                    xj0 - tolerancia <= p[0] <= xj1 + tolerancia
+                    and yj0 - tolerancia <= p[1] <= yj1 + tolerancia
+                ):
+                    continue
+                a, b = segmentos[j]
+                d, t = proyectar_en_segmento(p, a, b)
+                if d > tolerancia:
+                    continue
+                # Cerca de un extremo de j: lo resuelve el snap de nodos
+                largo = math.hypot(b[0] - a[0], b[1] - a[1])
+                if t * largo <= tolerancia or (1 - t) * largo <= tolerancia:
+                    continue
+                cortes.setdefault(j, []).append((t, p))
+                stats["contactos_t"] += 1
+
+    # 2b. Cruces: pares que atraviesan la misma celda
+    for c, indices in cubetas.items():
+        if len(indices) < 2:
+            continue
+        for pos, i in enumerate(indices):
+            p1, p2 = segmentos[i]
+            rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+            largo_i = math.hypot(rx, ry)
+            xi0, yi0, xi1, yi1 = cajas[i]
+            for j in indices[pos + 1 :]:
+                xj0, yj0, xj1, yj1 = cajas[j]
+                if xj0 > xi1 or xi0 > xj1 or yj0 > yi1 or yi0 > yj1:
+                    continue  # Cajas disjuntas: no pueden cruzarse
+                q1, q2 = segmentos[j]
+                sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+
+                denom = rx * sy - ry * sx
+                if denom == 0:
+                    continue  # Paralelos (los solapes se cubren como contactos en T)
+                qpx, qpy = q1[0] - p1[0], q1[1] - p1[1]
+                t = (qpx * sy - qpy * sx) / denom
+                u = (qpx * ry - qpy * rx) / denom
+                if not (0.0 < t < 1.0 and 0.0 < u < 1.0):
+                    continue
+
+                largo_j = math.hypot(sx, sy)
+                if min(t, 1 - t) * largo_i <= tolerancia:
+                    continue
+                if min(u, 1 - u) * largo_j <= tolerancia:
+                    continue
+
+                x = (p1[0] + t * rx, p1[1] + t * ry)
+                if celda_de(x) != c:
+                    continue
+                cortes.setdefault(i, []).append((t, x))
+                cortes.setdefault(j, []).append((u, x))
+                stats["cruces"] += 1
+
+    # 3. Partir segmentos en orden a lo largo de cada uno
+    piezas: List[Segmento] = []
+    origen: List[int] = []
+    for i, (a, b) in enumerate(segmentos):
+        if i not in cortes:
+            piezas.append((a, b))
+            origen.append(i)
+            continue
+        stats["segmentos_partidos"] += 1
+        anterior = a
+        for _, p in sorted(cortes[i]):
+            piezas.append((anterior, p))
+            anterior = p
+        piezas.append((anterior, b))
+        origen.extend([i] * (len(cortes[i]) + 1))
+
+    logger.debug(
+        f"Noding: {stats['cruces']} cruce(s), {stats['contactos_t']} contacto(s) en T, "
+        f"{stats['segmentos_partidos']} segmento(s) partido(s)."
+    )
+    return piezas, origen, stats
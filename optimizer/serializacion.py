@@ -0,0 +1,87 @@
+"""
+Módulo de Serialización Binaria.
+Guarda y lee arreglos numéricos (array.array) en archivos compactos,
+para índices y cachés que deben cargarse en milisegundos.
+"""
+
+import os
+import struct
+from array import array
+from typing import BinaryIO, Dict
+
+_CABECERA = struct.Struct("<H")  # Largo del nombre
+_ARREGLO = struct.Struct("<cQ")  # Tipo de dato y cantidad de elementos
+
+
+def escribir_arreglos(f: BinaryIO, arreglos: Dict[str, array]) -> None:
+    """
+    Escribe un diccionario {nombre: array} en un archivo binario abierto.
+    Formato por arreglo: nombre, typecode, largo y bytes crudos.
+    """
+    f.write(struct.pack("<I", len(arreglos)))
+    for nombre, arr in arreglos.items():
+        nombre_b = nombre.encode("utf-8")
+        f.write(_CABECERA.pack(len(nombre_b)))
+        f.write(nombre_b)
+        f.write(_ARREGLO.pack(arr.typecode.encode("ascii"), len(arr)))
+        arr.tofile(f)
+
+
+def leer_arreglos(f: BinaryIO) -> Dict[str, array]:
+    """Lee lo escrito por escribir_arreglos."""
+    (cantidad,) = struct.unpack("<I", f.read(4))
+    arreglos: Dict[str, array] = {}
+    for _ in range(cantidad):
+        (largo_nombre,) = _CABECERA.unpack(f.read(_CABECERA.size))
+        nombre = f.read(largo_nombre).decode("utf-8")
+        typecode, largo = _ARREGLO.unpack(f.read(_ARREGLO.size))
+        arr = array(typecode.decode("ascii"))
+        arr.fromfile(f, largo)
+        arreglos[nombre] = arr
+    return arreglos
+
+
+def podar_archivos(ruta: str, conservar: int) -> int:
+    """
+    Borra versiones viejas de un archivo de caché: los de la misma carpeta
+    con el mismo prefijo (hasta el último '_') y extensión que 'ruta',
+    dejando los 'conservar' usados más recientemente ('ruta' siempre queda).
+    Returns:
+        int: Cantidad de archivos borrados.
+    """
+    carpeta, nombre = os.path.split(os.path.abspath(ruta))
+    prefijo = nombre.rsplit("_", 1)[0] + "_"
+    extension = os.path.splitext(nombre)[1]
+    try:
+        candidatos = [
+            os.path.join(carpeta, n)
+            for n in os.listdir(carpeta)
+            if n != nombre and n.startswith(prefijo) and n.endswith(extension)
+        ]
+    except OSError:
+        return 0
+    candidatos.sort(key=_modificado, reverse=True)
+
+    borrados = 0
+    for viejo in candidatos[max(conservar - 1, 0) :]:
+        try:
+            os.remove(viejo)
+            borrados += 1
+        except OSError:
+            continue
+    return borrados
+
+
+def marcar_uso(ruta: str) -> None:
+    """Actualiza la fecha del archivo al reutilizarlo (ver podar_archivos)."""
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+
+def _modificado(ruta: str) -> float:
+    try:
+        return os.path.getmtime(ruta)
+    except OSError:
+        return 0.0
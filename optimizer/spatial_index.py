@@ -0,0 +1,374 @@
+"""
+Módulo de Índice Espacial.
+Rejillas hash uniformes para consultas de vecindad sobre puntos y segmentos 2D.
+Evita recorrer todos los nodos del grafo en cada búsqueda de cercanía.
+"""
+
+import heapq
+import math
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from .utils_math import distancia_euclidiana, proyectar_en_segmento
+
+Point2D = Tuple[float, float]
+Celda = Tuple[int, int]
+
+
+class IndiceEspacial:
+    """
+    Rejilla uniforme (hash de celdas) que agrupa puntos por cuadrícula.
+
+    Cada elemento guarda su orden de inserción, de modo que los empates
+    de distancia se resuelven igual que un recorrido lineal en ese orden.
+    """
+
+    def __init__(
+        self,
+        tamano_celda: float = 10.0,
+        distancia: Callable[[Point2D, Point2D], float] = distancia_euclidiana,
+    ):
+        """
+        Args:
+            tamano_celda (float): Lado de cada celda de la rejilla (metros).
+            distancia (Callable): Métrica usada para comparar (por defecto euclidiana).
+        """
+        if tamano_celda <= 0:
+            raise ValueError("El tamaño de celda debe ser positivo.")
+        self.tamano_celda = tamano_celda
+        self.distancia = distancia
+        self._celdas: Dict[Celda, List[Tuple[int, Hashable, Point2D]]] = {}
+        self._ubicacion: Dict[Hashable, Tuple[Celda, int]] = {}
+        self._secuencia = 0
+        self._limites: Optional[List[int]] = None  # [min_x, min_y, max_x, max_y]
+
+    def __len__(self) -> int:
+        return len(self._ubicacion)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._ubicacion
+
+    def _celda(self, punto: Point2D) -> Celda:
+        return (
+            math.floor(punto[0] / self.tamano_celda),
+            math.floor(punto[1] / self.tamano_celda),
+        )
+
+    def insertar(self, clave: Hashable, punto: Point2D) -> None:
+        """Agrega (o reubica) un punto identificado por 'clave'."""
+        if clave in self._ubicacion:
+            self.eliminar(clave)
+
+        celda = self._celda(punto)
+        seq = self._secuencia
+        self._secuencia += 1
+        self._celdas.setdefault(celda, []).append((seq, clave, punto))
+        self._ubicacion[clave] = (celda, seq)
+
+        if self._limites is None:
+            self._limites = [celda[0], celda[1], celda[0], celda[1]]
+        else:
+            lim = self._limites
+            lim[0] = min(lim[0], celda[0])
+            lim[1] = min(lim[1], celda[1])
+            lim[2] = max(lim[2], celda[0])
+            lim[3] = max(lim[3], celda[1])
+
+    def insertar_lote(self, elementos: Iterable[Tuple[Hashable, Point2D]]) -> None:
+        """
+        Agrega muchos puntos de una vez (misma semántica que insertar en
+        orden, sin recalcular los límites en cada uno). Usado al cargar cachés.
+        """
+        celdas, ubicacion = self._celdas, self._ubicacion
+        c = self.tamano_celda
+        floor = math.floor
+        seq = self._secuencia
+        tocadas = []
+        for clave, punto in elementos:
+            if clave in ubicacion:
+                self.eliminar(clave)
+            celda = (floor(punto[0] / c), floor(punto[1] / c))
+            bucket = celdas.get(celda)
+            if bucket is None:
+                bucket = celdas[celda] = []
+                tocadas.append(celda)
+            bucket.append((seq, clave, punto))
+            ubicacion[clave] = (celda, seq)
+            seq += 1
+        self._secuencia = seq
+
+        if tocadas:
+            xs = [celda[0] for celda in tocadas]
+            ys = [celda[1] for celda in tocadas]
+            if self._limites is not None:
+                xs += [self._limites[0], self._limites[2]]
+                ys += [self._limites[1], self._limites[3]]
+            self._limites = [min(xs), min(ys), max(xs), max(ys)]
+
+    def eliminar(self, clave: Hashable) -> bool:
+        """Quita un punto del índice. Retorna False si no existía."""
+        ubic = self._ubicacion.pop(clave, None)
+        if ubic is None:
+            return False
+        celda, seq = ubic
+        bucket = self._celdas[celda]
+        for i, item in enumerate(bucket):
+            if item[0] == seq:
+                bucket.pop(i)
+                break
+        if not bucket:
+            del self._celdas[celda]
+        return True
+
+    def _recorrer_rango(
+        self, cx0: int, cy0: int, cx1: int, cy1: int
+    ) -> Iterator[Tuple[int, Hashable, Point2D]]:
+        """Itera los elementos de las celdas dentro del rectángulo de celdas."""
+        n_celdas = (cx1 - cx0 + 1) * (cy1 - cy0 + 1)
+        if n_celdas > len(self._celdas):
+            # Rango mayor que la rejilla ocupada: recorrer solo celdas existentes
+            for (ix, iy), bucket in self._celdas.items():
+                if cx0 <= ix <= cx1 and cy0 <= iy <= cy1:
+                    yield from bucket
+            return
+
+        for ix in range(cx0, cx1 + 1):
+            for iy in range(cy0, cy1 + 1):
+                bucket = self._celdas.get((ix, iy))
+                if bucket:
+                    yield from bucket
+
+    def en_radio(self, punto: Point2D, radio: float) -> List[Tuple[Any, float]]:
+        """
+        Retorna todos los elementos a distancia <= radio.
+
+        Returns:
+            List[(Clave, Distancia)]: Ordenada por distancia y orden de inserción.
+        """
+        if not self._celdas or radio < 0:
+            return []
+        cx0, cy0 = self._celda((punto[0] - radio, punto[1] - radio))
+        cx1, cy1 = self._celda((punto[0] + radio, punto[1] + radio))
+
+        encontrados = []
+        for seq, clave, coords in self._recorrer_rango(cx0, cy0, cx1, cy1):
+            d = self.distancia(punto, coords)
+            if d <= radio:
+                encontrados.append((d, seq, clave))
+
+        encontrados.sort()
+        return [(clave, d) for d, _, clave in encontrados]
+
+    def mas_cercano(
+        self, punto: Point2D, radio: float
+    ) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Elemento más cercano dentro del radio.
+
+        Returns:
+            Tuple(Clave, Distancia): (None, None) si no hay nada en el radio.
+        """
+        if not self._celdas or radio < 0:
+            return None, None
+        cx0, cy0 = self._celda((punto[0] - radio, punto[1] - radio))
+        cx1, cy1 = self._celda((punto[0] + radio, punto[1] + radio))
+
+        mejor = None
+        for seq, clave, coords in self._recorrer_rango(cx0, cy0, cx1, cy1):
+            d = self.distancia(punto, coords)
+            if d > radio:
+                continue
+            if mejor is None or (d, seq) < (mejor[0], mejor[1]):
+                mejor = (d, seq, clave)
+
+        if mejor is None:
+            return None, None
+        return mejor[2], mejor[0]
+
+    def k_mas_cercanos(
+        self, punto: Point2D, k: int, radio: Optional[float] = None
+    ) -> List[Tuple[Any, float]]:
+        """
+        Los 'k' elementos más cercanos, expandiendo anillos de celdas.
+
+        Args:
+            punto (Point2D): Punto de consulta.
+            k (int): Cantidad máxima de resultados.
+            radio (Optional[float]): Distancia máxima admitida (None = sin límite).
+
+        Returns:
+            List[(Clave, Distancia)]: Ordenada por distancia y orden de inserción.
+        """
+        if k <= 0 or not self._celdas:
+            return []
+
+        c = self.tamano_celda
+        cx, cy = self._celda(punto)
+        lim = self._limites
+        # Anillo máximo que aún puede contener celdas ocupadas
+        max_anillo = max(cx - lim[0], cy - lim[1], lim[2] - cx, lim[3] - cy, 0)
+        if radio is not None:
+            max_anillo = min(max_anillo, int(math.ceil(radio / c)) + 1)
+
+        # Max-heap (negado) con los k mejores: (-d, -seq, clave)
+        mejores: List[Tuple[float, int, Any]] = []
+        for anillo in range(max_anillo + 1):
+            for ix, iy in _celdas_anillo(cx, cy, anillo):
+                for seq, clave, coords in self._celdas.get((ix, iy), ()):
+                    d = self.distancia(punto, coords)
+                    if radio is not None and d > radio:
+                        continue
+                    item = (-d, -seq, clave)
+                    if len(mejores) < k:
+                        heapq.heappush(mejores, item)
+                    elif item > mejores[0]:
+                        heapq.heapreplace(mejores, item)
+
+            # Todo lo que queda fuera está al menos a anillo * c del punto
+            if len(mejores) == k and -mejores[0][0] < anillo * c:
+                break
+
+        ordenados = sorted((-d, -s, clave) for d, s, clave in mejores)
+        return [(clave, d) for d, _, clave in ordenados]
+
+
+def _celdas_anillo(cx: int, cy: int, anillo: int) -> Iterator[Celda]:
+    """Celdas a distancia de Chebyshev exacta 'anillo' de (cx, cy)."""
+    if anillo == 0:
+        yield (cx, cy)
+        return
+    for ix in range(cx - anillo, cx + anillo + 1):
+        yield (ix, cy - anillo)
+        yield (ix, cy + anillo)
+    for iy in range(cy - anillo + 1, cy + anillo):
+        yield (cx - anillo, iy)
+        yield (cx + anillo, iy)
+
+
+def recorrido_celdas(p1: Point2D, p2: Point2D, c: float) -> Iterator[Celda]:
+    """Celdas de lado 'c' que cruza el segmento, en orden (recorrido tipo DDA)."""
+    x0, y0, x1, y1 = p1[0] / c, p1[1] / c, p2[0] / c, p2[1] / c
+    ix, iy = math.floor(x0), math.floor(y0)
+    fx, fy = math.floor(x1), math.floor(y1)
+    yield (ix, iy)
+    if ix == fx and iy == fy:
+        return
+
+    dx, dy = x1 - x0, y1 - y0
+    paso_x = 1 if dx > 0 else -1
+    paso_y = 1 if dy > 0 else -1
+    # Parámetro (0..1) del próximo borde vertical / horizontal
+    t_x = ((ix + (paso_x > 0)) - x0) / dx if dx else math.inf
+    t_y = ((iy + (paso_y > 0)) - y0) / dy if dy else math.inf
+    delta_x = abs(1 / dx) if dx else math.inf
+    delta_y = abs(1 / dy) if dy else math.inf
+    for _ in range(abs(fx - ix) + abs(fy - iy)):
+        # Con un eje ya en su celda final solo avanza el otro (redondeo)
+        if iy == fy or (ix != fx and t_x < t_y):
+            ix += paso_x
+            t_x += delta_x
+        else:
+            iy += paso_y
+            t_y += delta_y
+        yield (ix, iy)
+
+
+class IndiceSegmentos:
+    """
+    Rejilla uniforme sobre segmentos: cada uno se anota solo en las celdas
+    que atraviesa (no en toda su caja envolvente, que para una línea larga
+    en diagonal serían miles). Sirve para encontrar las aristas cercanas a
+    una zona o a un punto sin recorrer toda la red.
+    """
+
+    def __init__(self, tamano_celda: float = 10.0):
+        if tamano_celda <= 0:
+            raise ValueError("El tamaño de celda debe ser positivo.")
+        self.tamano_celda = tamano_celda
+        self._celdas: Dict[Celda, Dict[Hashable, None]] = {}
+        self._segmentos: Dict[Hashable, Tuple[Point2D, Point2D]] = {}
+
+    def __len__(self) -> int:
+        return len(self._segmentos)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._segmentos
+
+    def _rango(self, x0: float, y0: float, x1: float, y1: float) -> Iterator[Celda]:
+        c = self.tamano_celda
+        for ix in range(math.floor(x0 / c), math.floor(x1 / c) + 1):
+            for iy in range(math.floor(y0 / c), math.floor(y1 / c) + 1):
+                yield (ix, iy)
+
+    def insertar(self, clave: Hashable, p1: Point2D, p2: Point2D) -> None:
+        """Agrega (o reubica) el segmento p1-p2 identificado por 'clave'."""
+        if clave in self._segmentos:
+            self.eliminar(clave)
+        self._segmentos[clave] = (p1, p2)
+        celdas = self._celdas
+        for celda in recorrido_celdas(p1, p2, self.tamano_celda):
+            bucket = celdas.get(celda)
+            if bucket is None:
+                celdas[celda] = {clave: None}
+            else:
+                bucket[clave] = None
+
+    def eliminar(self, clave: Hashable) -> bool:
+        """Quita un segmento. Retorna False si no existía."""
+        seg = self._segmentos.pop(clave, None)
+        if seg is None:
+            return False
+        for celda in recorrido_celdas(*seg, self.tamano_celda):
+            bucket = self._celdas.get(celda)
+            if bucket is not None:
+                bucket.pop(clave, None)
+                if not bucket:
+                    del self._celdas[celda]
+        return True
+
+    def segmento(self, clave: Hashable) -> Tuple[Point2D, Point2D]:
+        return self._segmentos[clave]
+
+    def en_caja(self, x0: float, y0: float, x1: float, y1: float) -> List[Hashable]:
+        """
+        Segmentos que atraviesan alguna celda del rectángulo dado
+        (candidatos; sin repetir, en orden de inserción por celda).
+        """
+        encontrados: Dict[Hashable, None] = {}
+        for celda in self._rango(x0, y0, x1, y1):
+            bucket = self._celdas.get(celda)
+            if bucket:
+                encontrados.update(bucket)
+        return list(encontrados)
+
+    def mas_cercano(
+        self, punto: Point2D, radio_max: float
+    ) -> Tuple[Optional[Hashable], Optional[float], Optional[float]]:
+        """
+        Segmento más cercano a 'punto' dentro de 'radio_max'.
+
+        Returns:
+            Tuple(Clave, Distancia, T): T (0..1) ubica el punto más cercano
+            sobre el segmento, desde su primer extremo. (None, None, None)
+            si no hay ninguno en el radio.
+        """
+        x, y = punto
+        mejor: Tuple[Optional[Hashable], Optional[float], Optional[float]] = (
+            None,
+            None,
+            None,
+        )
+        for clave in self.en_caja(x - radio_max, y - radio_max, x + radio_max, y + radio_max):
+            a, b = self._segmentos[clave]
+            d, t = proyectar_en_segmento(punto, a, b)
+            if d <= radio_max and (mejor[1] is None or d < mejor[1]):
+                mejor = (clave, d, t)
+        return mejor
@@ -4,11 +4,14 @@ Aloja funcionalidades puntuales invocadas desde la GUI.
 """
 
 from typing import Optional, Any, List, Dict
-import win32com.client
+from .acad_capas import registro_capas
+from .acad_cola_dibujo import ColaDibujo
 from .acad_interface import get_acad_com
-from .acad_block_reader import extract_specific_blocks
+from .acad_sesion import sesion_edicion
+from .acad_cache import bloques_en_cache, capturar_en_cache
+from .acad_snapshot import capturar_modelo
 from .config_loader import get_config
-from .acad_geometry import NetworkGraph
+from .cache_grafo import construir_grafo_red
 from .acad_drawer import dibujar_grafo_completo
 from .constants import ASI, SysLayers, Geometry
 from .feedback_logger import logger
@@ -20,6 +23,9 @@ def garantizar_capa_existente(
 ) -> Optional[str]:
     """
     Verifica si una capa existe en el documento. Si no, la crea.
+    La existencia se consulta en el registro de capas del documento, no en
+    AutoCAD: cada herramienta lo recarga al empezar con
+    registro_capas(doc, recargar=True).
     Args:
         doc: Documento activo de AutoCAD.
         nombre_capa: Nombre de la capa deseada.
@@ -27,18 +33,7 @@ def garantizar_capa_existente(
     Returns:
         str: El nombre de la capa si todo salió bien, o None si falló.
     """
-    try:
-        doc.Layers.Item(nombre_capa)
-    except Exception:
-        try:
-            nueva_capa = doc.Layers.Add(nombre_capa)
-            nueva_capa.Color = color_id
-            return nombre_capa
-        except Exception as e:
-            logger.error(f"No se pudo crear la capa '{nombre_capa}': {e}")
-            return None
-
-    return nombre_capa
+    return registro_capas(doc).garantizar(nombre_capa, color_id)
 
 
 def herramienta_visualizar_extremos() -> str:
@@ -54,69 +49,45 @@ def herramienta_visualizar_extremos() -> str:
     msp = acad.ActiveDocument.ModelSpace
     capa_tramo = get_config("rutas.capa_tramos_logicos", "TRAMO")
 
+    # La tabla de capas se relee en cada herramienta (pudo editarse a mano)
+    registro_capas(acad.ActiveDocument, recargar=True)
     garantizar_capa_existente(
         acad.ActiveDocument, SysLayers.TEMPORAL_EXTREMOS, ASI.MAGENTA
     )
 
     count = 0
-    import pythoncom
-
-    for i in range(msp.Count):
-        try:
-            obj = msp.Item(i)
-            if obj.ObjectName == "AcDbPolyline" and obj.Layer.upper() == capa_tramo:
-                coords = obj.Coordinates
-                if len(coords) < 4:
-                    continue
-
-                # Puntos 2D
-                p_ini = (coords[0], coords[1], 0.0)
-                p_fin = (coords[-2], coords[-1], 0.0)
-
-                # Dibujar INICIO (Verde)
-                c_ini = msp.AddCircle(
-                    win32com.client.VARIANT(
-                        pythoncom.VT_ARRAY | pythoncom.VT_R8, p_ini
-                    ),
-                    Geometry.RADIO_INI_FIN,
-                )
-                t_ini = msp.AddText(
-                    "INI",
-                    win32com.client.VARIANT(
-                        pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                        (p_ini[0] + 1, p_ini[1] + 1, 0),
-                    ),
-                    1.5,
-                )
-                t_ini.Color = ASI.VERDE
-                t_ini.Layer = SysLayers.TEMPORAL_EXTREMOS
-                c_ini.Color = ASI.VERDE
-                c_ini.Layer = SysLayers.TEMPORAL_EXTREMOS
-
-                # Dibujar FIN (Rojo)
-                c_fin = msp.AddCircle(
-                    win32com.client.VARIANT(
-                        pythoncom.VT_ARRAY | pythoncom.VT_R8, p_fin
-                    ),
-                    Geometry.RADIO_INI_FIN,
-                )
-
-                t_fin = msp.AddText(
-                    "FIN",
-                    win32com.client.VARIANT(
-                        pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                        (p_fin[0] + 1, p_fin[1] + 1, 0),
-                    ),
-                    1.5,
-                )
-                t_fin.Color = ASI.ROJO
-                t_fin.Layer = SysLayers.TEMPORAL_EXTREMOS
-                c_fin.Color = ASI.ROJO
-                c_fin.Layer = SysLayers.TEMPORAL_EXTREMOS
-
-                count += 1
-        except Exception:
-            continue
+    with sesion_edicion(acad.ActiveDocument), ColaDibujo(msp) as cola:
+        for tramo in capturar_modelo(msp, capa_tramos=capa_tramo).tramos:
+            extremos = tramo.extremos
+            if extremos is None:
+                continue
+            p_ini, p_fin = extremos
+
+            # Dibujar INICIO (Verde)
+            cola.circulo(
+                p_ini, Geometry.RADIO_INI_FIN, SysLayers.TEMPORAL_EXTREMOS, ASI.VERDE
+            )
+            cola.texto(
+                "INI",
+                (p_ini[0] + 1, p_ini[1] + 1),
+                1.5,
+                SysLayers.TEMPORAL_EXTREMOS,
+                ASI.VERDE,
+            )
+
+            # Dibujar FIN (Rojo)
+            cola.circulo(
+                p_fin, Geometry.RADIO_INI_FIN, SysLayers.TEMPORAL_EXTREMOS, ASI.ROJO
+            )
+            cola.texto(
+                "FIN",
+                (p_fin[0] + 1, p_fin[1] + 1),
+                1.5,
+                SysLayers.TEMPORAL_EXTREMOS,
+                ASI.ROJO,
+            )
+
+            count += 1
 
     logger.info(
         f"Visualización de extremos: {count} polilíneas marcadas en capa '{SysLayers.TEMPORAL_EXTREMOS}'."
@@ -139,7 +110,7 @@ def herramienta_inventario_rapido() -> str:
         return "No hay equipos configurados en config.yaml"
 
     logger.info("Iniciando inventario de bloques...")
-    bloques = extract_specific_blocks(target_names)
+    bloques = bloques_en_cache(target_names)
 
     conteo: Dict[str, int] = {}
     for b in bloques:
@@ -173,28 +144,15 @@ def herramienta_asociar_hubs() -> str:
     RADIO = get_config("tolerancias.radio_busqueda_acceso", 20.0)
     capa_textos = get_config("rutas.capa_textos_hubs", "HUB_BOX_3.5_P")
 
-    hubs = []
-    textos = []
-
     if not hbox_validos:
         return "No hay bloque 'hbox' configurado en config.yaml"
 
-    # Escaneo
-    for i in range(msp.Count):
-        try:
-            obj = msp.Item(i)
-            nombre_obj = obj.ObjectName
-
-            if nombre_obj == "AcDbBlockReference":
-                name = obj.EffectiveName if hasattr(obj, "EffectiveName") else obj.Name
-                if name in hbox_validos:
-                    hubs.append(obj)
-
-            elif nombre_obj in ["AcDbText", "AcDbMText"]:
-                if capa_textos is None or obj.Layer == capa_textos:
-                    textos.append(obj)
-        except Exception:
-            pass
+    # Escaneo (una sola pasada: hubs y textos)
+    modelo = capturar_en_cache(
+        msp, nombres_bloques=hbox_validos, textos=True, capa_textos=capa_textos
+    )
+    hubs = modelo.bloques
+    textos = modelo.textos
 
     if not hubs:
         return f"No se encontraron bloques '{hbox_validos}'."
@@ -205,24 +163,23 @@ def herramienta_asociar_hubs() -> str:
 
     for hub in hubs:
         try:
-            ins = hub.InsertionPoint
+            ins = hub["xyz"]
             p_hub = (ins[0], ins[1])
             mejor_txt = None
             min_dist = RADIO
 
             for txt in textos:
-                t_ins = txt.InsertionPoint
-                d = distancia_euclidiana(p_hub, (t_ins[0], t_ins[1]))
+                d = distancia_euclidiana(p_hub, txt.punto)
                 if d < min_dist:
                     min_dist = d
                     mejor_txt = txt
 
             if mejor_txt:
-                texto_limpio = mejor_txt.TextString.strip()
-                reporte += f"Hub ({hub.Name}) en ({p_hub}) -> '{texto_limpio}'\n"
+                texto_limpio = mejor_txt.texto.strip()
+                reporte += f"Hub ({hub['name']}) en ({p_hub}) -> '{texto_limpio}'\n"
                 asociados += 1
             else:
-                reporte += f"Hub ({hub.Name}) en ({p_hub}) -> SIN TEXTO (<{RADIO}m)\n"
+                reporte += f"Hub ({hub['name']}) en ({p_hub}) -> SIN TEXTO (<{RADIO}m)\n"
         except Exception as e:
             logger.debug(f"Error al asociar hub: {e}")
 
@@ -234,7 +191,7 @@ def herramienta_analizar_fat() -> str:
     Lista los atributos ID_NAME de las FATs encontradas.
     """
     nombres_fat = ["FAT_INT_3.0_P", "FAT_FINAL_3.0_P"]  # Agregar más si es necesario
-    bloques = extract_specific_blocks(nombres_fat)
+    bloques = bloques_en_cache(nombres_fat)
 
     if not bloques:
         return "No se encontraron FATs."
@@ -260,7 +217,8 @@ def herramienta_dibujar_grafo_vial() -> str:
     doc = acad.ActiveDocument
     msp = doc.ModelSpace
 
-    # 1. Preparar capas visuales
+    # 1. Preparar capas visuales (tabla releída: pudo editarse a mano)
+    registro_capas(doc, recargar=True)
     garantizar_capa_existente(doc, SysLayers.DEBUG_NODOS, ASI.CYAN)
     garantizar_capa_existente(doc, SysLayers.DEBUG_ARISTAS, ASI.GRIS)
 
@@ -269,25 +227,42 @@ def herramienta_dibujar_grafo_vial() -> str:
     capa_red = get_config("rutas.capa_red_vial")
     tol = get_config("tolerancias.snap_grafo_vial", 0.1)
 
-    grafo = NetworkGraph(tolerance=tol)
+    nodar = get_config("ruteo.nodar_intersecciones", True)
 
-    count = 0
-    for i in range(msp.Count):
-        try:
-            obj = msp.Item(i)
-            if obj.ObjectName == "AcDbLine" and obj.Layer.upper() == capa_red:
-                grafo.add_line(obj.StartPoint[:2], obj.EndPoint[:2])
-                count += 1
-        except Exception:
-            pass
+    segmentos = capturar_modelo(msp, capa_red=capa_red).lineas
 
+    count = len(segmentos)
     if count == 0:
         return f"No se encontraron líneas en la capa '{capa_red}'."
 
+    grafo, nodado = construir_grafo_red(
+        segmentos, tol, nodar=nodar, usar_cache=get_config("ruteo.cache_grafo", True)
+    )
+
     # 3. Dibujar
     logger.info(f"Dibujando {len(grafo.nodes)} nodos y sus conexiones...")
-    dibujar_grafo_completo(msp, grafo)
+    with sesion_edicion(doc):
+        dibujar_grafo_completo(msp, grafo)
+
+    # 4. Diagnóstico de islas (componentes desconectadas)
+    stats = grafo.component_stats()
+    tamanos = stats["tamanos"]
+    resumen_islas = f"Islas (componentes): {stats['componentes']}"
+    if len(tamanos) > 1:
+        muestra = ", ".join(str(t) for t in tamanos[:10])
+        if len(tamanos) > 10:
+            muestra += ", ..."
+        resumen_islas += f"\nNodos por isla: {muestra}"
+        logger.warning(f"Red vial fragmentada en {len(tamanos)} islas: {muestra}")
+
+    resumen_nodado = f"\nExtremos fusionados por snap: {nodado['fusiones_cercanas']}"
+    if nodar:
+        resumen_nodado += (
+            f"\nCruces conectados: {nodado['cruces']}"
+            f"\nContactos en T conectados: {nodado['contactos_t']}"
+        )
 
     return (
         f"Grafo dibujado.\nLíneas procesadas: {count}\nNodos únicos: {len(grafo.nodes)}"
+        f"{resumen_nodado}\n{resumen_islas}"
     )
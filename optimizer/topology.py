@@ -4,14 +4,20 @@ Realiza el 'match' entre coordenadas geométricas y entidades lógicas (equipos)
 """
 
 import math
-from typing import Tuple, List, Dict, Optional, Any, Union
+from typing import Tuple, List, Dict, Optional, Any, Union, Iterable, Callable
+from .cable_rules import obtener_grupo_equipo, longitud_maxima_cable
 from .config_loader import get_config
+from .constants import Geometry, Busqueda
 from .feedback_logger import logger
+from .spatial_index import IndiceEspacial
 
 Point2D = Tuple[float, float]
 
 R_RADIUS = get_config("tolerancias.radio_busqueda_acceso", 20.0)
 R_SNAP = get_config("tolerancias.radio_snap_equipos", 5.0)
+ESTRATEGIA = get_config("ruteo.estrategia_busqueda", Busqueda.DIJKSTRA)
+ACOTAR_POR_CATALOGO = get_config("ruteo.acotar_por_catalogo", True)
+ACCESO_POR_ARISTA = get_config("ruteo.acceso_por_arista", True)
 
 
 def obtener_puntos_extremos(
@@ -41,21 +47,157 @@ def obtener_puntos_extremos(
         return None, None
 
 
+def _distancia_hypot(p1: Point2D, p2: Point2D) -> float:
+    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+
+class IndiceEquipos:
+    """
+    Índice espacial de equipos (bloques) construido una sola vez.
+
+    Resuelve el bloque más cercano a un punto, opcionalmente filtrando por
+    grupo de equipo ('hbox', 'fat_int', ...), y memoriza el nodo de red vial
+    asignado a cada bloque para no repetir la búsqueda en el grafo.
+    """
+
+    def __init__(
+        self,
+        bloques: List[Dict[str, Any]],
+        tamano_celda: float = Geometry.CELDA_INDICE_ESPACIAL,
+    ):
+        """
+        Args:
+            bloques (List[Dict]): Salida de extract_specific_blocks (clave "xyz").
+            tamano_celda (float): Lado de celda de la rejilla espacial.
+        """
+        self.bloques = bloques
+        self.grupos: List[str] = []
+        self._tamano_celda = tamano_celda
+        self._indice = self._nuevo_indice()
+        self._por_grupo: Dict[str, IndiceEspacial] = {}
+        self._cache_nodos: Dict[Any, Tuple[Any, Optional[float]]] = {}
+        self._grafo_cache: Any = None
+        self._version_cache = -1
+
+        grupo_por_nombre: Dict[str, str] = {}
+        for pos, bloque in enumerate(bloques):
+            punto = (bloque["xyz"][0], bloque["xyz"][1])
+            nombre = bloque.get("name", "")
+            if nombre not in grupo_por_nombre:
+                grupo_por_nombre[nombre] = obtener_grupo_equipo(nombre)
+            grupo = grupo_por_nombre[nombre]
+
+            self.grupos.append(grupo)
+            self._indice.insertar(pos, punto)
+            if grupo not in self._por_grupo:
+                self._por_grupo[grupo] = self._nuevo_indice()
+            self._por_grupo[grupo].insertar(pos, punto)
+
+    def __len__(self) -> int:
+        return len(self.bloques)
+
+    def _nuevo_indice(self) -> IndiceEspacial:
+        # Misma métrica (hypot) que la búsqueda lineal para resultados idénticos
+        return IndiceEspacial(self._tamano_celda, distancia=_distancia_hypot)
+
+    def _indices(self, grupos: Optional[Iterable[str]]) -> List[IndiceEspacial]:
+        if grupos is None:
+            return [self._indice]
+        return [self._por_grupo[g] for g in grupos if g in self._por_grupo]
+
+    def cercano(
+        self,
+        punto: Point2D,
+        radio_max: float,
+        grupos: Optional[Iterable[str]] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """
+        Bloque más cercano a 'punto' dentro de 'radio_max'.
+        Los empates se resuelven por el orden original de la lista.
+
+        Returns:
+            Tuple[Optional[Dict], Optional[float]]: (Bloque, Distancia) o (None, None).
+        """
+        mejor = None
+        for indice in self._indices(grupos):
+            pos, dist = indice.mas_cercano(punto, radio_max)
+            if pos is not None and (mejor is None or (dist, pos) < mejor):
+                mejor = (dist, pos)
+
+        if mejor is None:
+            return None, None
+        return self.bloques[mejor[1]], mejor[0]
+
+    def en_radio(
+        self,
+        punto: Point2D,
+        radio: float,
+        grupos: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Todos los bloques a distancia <= radio, del más cercano al más lejano."""
+        encontrados = []
+        for indice in self._indices(grupos):
+            encontrados.extend((d, pos) for pos, d in indice.en_radio(punto, radio))
+        encontrados.sort()
+        return [(self.bloques[pos], d) for d, pos in encontrados]
+
+    def nodo_red(
+        self, bloque: Dict[str, Any], grafo: Any, radio_max: float
+    ) -> Tuple[Any, Optional[float]]:
+        """
+        Acceso del bloque al grafo vial (memorizado por bloque), ver
+        acceso_red. Lo memorizado se descarta si el grafo cambia, aunque sea
+        el mismo objeto actualizado en el lugar (NetworkGraph.version).
+
+        Returns:
+            Tuple(NodeKey, Distancia): (None, None) si no hay red en el radio.
+        """
+        if grafo is not self._grafo_cache or grafo.version != self._version_cache:
+            self._cache_nodos.clear()
+            self._grafo_cache = grafo
+            self._version_cache = grafo.version
+
+        clave = (bloque.get("handle") or id(bloque), radio_max)
+        if clave not in self._cache_nodos:
+            pos = (bloque["xyz"][0], bloque["xyz"][1])
+            self._cache_nodos[clave] = acceso_red(grafo, pos, radio_max)
+        return self._cache_nodos[clave]
+
+
+def acceso_red(
+    grafo: Any, punto: Point2D, radio_max: float
+) -> Tuple[Any, Optional[float]]:
+    """
+    Punto de entrada a la red vial: la proyección sobre la arista más cercana
+    (nodo virtual, ver NetworkGraph.find_nearest_access) o, con
+    'ruteo.acceso_por_arista' desactivado, el vértice más cercano.
+    """
+    if ACCESO_POR_ARISTA:
+        return grafo.find_nearest_access(punto, max_radius=radio_max)
+    return grafo.find_nearest_node(punto, max_radius=radio_max)
+
+
 def encontrar_bloque_cercano(
-    punto: Point2D, bloques: List[Dict[str, Any]], radio_max: float
+    punto: Point2D,
+    bloques: Union[List[Dict[str, Any]], IndiceEquipos],
+    radio_max: float,
 ) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
     """
     Busca el bloque más cercano a un punto dado dentro de un radio máximo.
 
     Args:
         punto (Point2D): Coordenada (x, y) de referencia.
-        bloques (List[Dict]): Lista de diccionarios de bloques (debe contener clave "xyz").
+        bloques (List[Dict] | IndiceEquipos): Lista de diccionarios de bloques
+            (debe contener clave "xyz") o un índice ya construido.
         radio_max (float): Distancia máxima permitida para el snap.
 
     Returns:
         Tuple[Optional[Dict], Optional[float]]:
             (Mejor Bloque, Distancia) o (None, None) si no encuentra nada.
     """
+    if isinstance(bloques, IndiceEquipos):
+        return bloques.cercano(punto, radio_max)
+
     mejor_bloque = None
     mejor_dist = float("inf")
 
@@ -72,30 +214,20 @@ def encontrar_bloque_cercano(
     return None, None
 
 
-def calcular_ruta_completa(
-    p_inicio: Point2D, p_fin: Point2D, grafo: Any, lista_bloques: List[Dict[str, Any]]
-) -> Tuple[Optional[float], List[Point2D], Union[Dict[str, Any], str]]:
+def _conectar_extremos(
+    p_inicio: Point2D,
+    p_fin: Point2D,
+    grafo: Any,
+    lista_bloques: Union[List[Dict[str, Any]], IndiceEquipos],
+) -> Union[str, Dict[str, Any]]:
     """
-    Calcula la ruta completa entre dos puntos geográficos, pasando por la red vial.
-
-    Flujo:
-    1. Identifica equipos cercanos a p_inicio y p_fin (Snap).
-    2. Busca acceso a la red vial (Grafo).
-    3. Calcula ruta más corta (Dijkstra).
-
-    Args:
-        p_inicio (Point2D): Coordenada inicial de la polilínea.
-        p_fin (Point2D): Coordenada final de la polilínea.
-        grafo (NetworkGraph): Instancia del grafo de red vial.
-        lista_bloques (List[Dict]): Inventario de equipos disponibles.
+    Pasos 1 y 2 del cálculo de ruta: snap a equipos y acceso a la red vial.
 
     Returns:
-        Tuple:
-            - distancia_total (float | None): Distancia en metros o None si falla.
-            - camino_visual (List[Point2D]): Lista de puntos para dibujar la ruta debug.
-            - metadata (Dict | str): Datos del tramo (origen, destino) o mensaje de error.
+        str con el mensaje de error, o un dict con los equipos, sus posiciones,
+        los nodos de acceso ("eq_inicio", "pos_ini", "node_a", "dist_a", ...)
+        y la cota de búsqueda según el catálogo ("limite", None si no aplica).
     """
-
     # Identifica Equipos (Inicio y Fin)
     eq_inicio, d_ini = encontrar_bloque_cercano(
         p_inicio, lista_bloques, radio_max=R_SNAP
@@ -108,42 +240,57 @@ def calcular_ruta_completa(
         logger.debug(
             f"Fallo snap equipos: Ini={eq_inicio['name'] if eq_inicio else 'None'} ({txt_d_ini}), Fin={eq_fin['name'] if eq_fin else 'None'} ({txt_d_fin})"
         )
-        return None, [], f"Error: Extremo sin equipo cercano (<{R_SNAP}m)"
+        return f"Error: Extremo sin equipo cercano (<{R_SNAP}m)"
 
     # Conectar a la Red (Grafo)
-    # Buscamos el nodo de calle más cercano a cada equipo
+    # Buscamos el punto de calle más cercano a cada equipo
     pos_ini: Point2D = (eq_inicio["xyz"][0], eq_inicio["xyz"][1])
     pos_fin: Point2D = (eq_fin["xyz"][0], eq_fin["xyz"][1])
 
-    node_a, dist_acceso_a = grafo.find_nearest_node(pos_ini, max_radius=R_RADIUS)
-    node_b, dist_acceso_b = grafo.find_nearest_node(pos_fin, max_radius=R_RADIUS)
+    if isinstance(lista_bloques, IndiceEquipos):
+        node_a, dist_acceso_a = lista_bloques.nodo_red(eq_inicio, grafo, R_RADIUS)
+        node_b, dist_acceso_b = lista_bloques.nodo_red(eq_fin, grafo, R_RADIUS)
+    else:
+        node_a, dist_acceso_a = acceso_red(grafo, pos_ini, R_RADIUS)
+        node_b, dist_acceso_b = acceso_red(grafo, pos_fin, R_RADIUS)
 
-    if not node_a or not node_b:
+    if node_a is None or node_b is None:
         # Logs detallados para depuración
         d_a_str = f"{dist_acceso_a}" if dist_acceso_a is not None else "Fuera de Rango"
         d_b_str = f"{dist_acceso_b}" if dist_acceso_b is not None else "Fuera de Rango"
         logger.debug(
             f"Equipo aislado de calle: {eq_inicio['name']} (DistRed: {d_a_str}), {eq_fin['name']} (DistRed: {d_b_str})"
         )
-        return (
-            None,
-            [],
-            f"Error: Equipo aislado de la red (<{R_RADIUS}m)",
-        )
+        return f"Error: Equipo aislado de la red (<{R_RADIUS}m)"
 
-    dist_red, path_red = grafo.get_path_length(node_a, node_b)
+    return {
+        "eq_inicio": eq_inicio,
+        "eq_fin": eq_fin,
+        "pos_ini": pos_ini,
+        "pos_fin": pos_fin,
+        "node_a": node_a,
+        "node_b": node_b,
+        "dist_a": dist_acceso_a,
+        "dist_b": dist_acceso_b,
+        "limite": (
+            longitud_maxima_cable(eq_inicio["name"], eq_fin["name"])
+            if ACOTAR_POR_CATALOGO
+            else None
+        ),
+    }
 
-    if dist_red is None:
-        logger.warning(
-            f"ISLAS DETECTADAS: No hay camino entre nodos {node_a} y {node_b}"
-        )
-        return None, [], "Error: Islas (Red desconectada)"
+
+def _armar_resultado(
+    ext: Dict[str, Any], dist_red: float, path_red: List[Point2D]
+) -> Tuple[float, List[Point2D], Dict[str, Any]]:
+    """Paso final: arma el camino visual y la metadata del tramo."""
+    eq_inicio, eq_fin = ext["eq_inicio"], ext["eq_fin"]
 
     # Equipo A -> Punto A -> ...Ruta... -> Punto B -> Equipo B
-    camino_visual = [pos_ini] + path_red + [pos_fin]
+    camino_visual = [ext["pos_ini"]] + path_red + [ext["pos_fin"]] if path_red else []
 
-    d_acc_a = dist_acceso_a if dist_acceso_a else 0.00
-    d_acc_b = dist_acceso_b if dist_acceso_b else 0.00
+    d_acc_a = ext["dist_a"] if ext["dist_a"] else 0.00
+    d_acc_b = ext["dist_b"] if ext["dist_b"] else 0.00
 
     meta = {
         "origen": eq_inicio["name"],
@@ -153,3 +300,154 @@ def calcular_ruta_completa(
     }
 
     return dist_red, camino_visual, meta
+
+
+def _resultado_islas(ext: Dict[str, Any]) -> Tuple[None, List[Point2D], str]:
+    logger.warning(
+        f"ISLAS DETECTADAS: No hay camino entre nodos {ext['node_a']} y {ext['node_b']}"
+    )
+    return None, [], "Error: Islas (Red desconectada)"
+
+
+def _resultado_excede(ext: Dict[str, Any]) -> Tuple[None, List[Point2D], str]:
+    logger.debug(
+        f"Ruta {ext['eq_inicio']['name']}->{ext['eq_fin']['name']} supera el cable "
+        f"más largo del catálogo ({ext['limite']:.0f}m)."
+    )
+    return None, [], f"Error: Excede catálogo (>{ext['limite']:.0f}m)"
+
+
+def calcular_ruta_completa(
+    p_inicio: Point2D,
+    p_fin: Point2D,
+    grafo: Any,
+    lista_bloques: Union[List[Dict[str, Any]], IndiceEquipos],
+    estrategia: Optional[str] = None,
+) -> Tuple[Optional[float], List[Point2D], Union[Dict[str, Any], str]]:
+    """
+    Calcula la ruta completa entre dos puntos geográficos, pasando por la red vial.
+
+    Flujo:
+    1. Identifica equipos cercanos a p_inicio y p_fin (Snap).
+    2. Busca acceso a la red vial (Grafo).
+    3. Calcula ruta más corta (Dijkstra, A* o bidireccional), acotada por el
+       cable más largo que admite la regla topológica del par de equipos.
+
+    Args:
+        p_inicio (Point2D): Coordenada inicial de la polilínea.
+        p_fin (Point2D): Coordenada final de la polilínea.
+        grafo (NetworkGraph): Instancia del grafo de red vial.
+        lista_bloques (List[Dict] | IndiceEquipos): Inventario de equipos disponibles.
+            Con un IndiceEquipos el acceso a la red de cada equipo se memoriza.
+        estrategia (Optional[str]): Búsqueda a usar (constants.Busqueda).
+            Si es None se usa 'ruteo.estrategia_busqueda' del config.
+
+    Returns:
+        Tuple:
+            - distancia_total (float | None): Distancia en metros o None si falla.
+            - camino_visual (List[Point2D]): Lista de puntos para dibujar la ruta debug.
+            - metadata (Dict | str): Datos del tramo (origen, destino) o mensaje de error.
+    """
+    ext = _conectar_extremos(p_inicio, p_fin, grafo, lista_bloques)
+    if isinstance(ext, str):
+        return None, [], ext
+
+    # Islas: se descartan sin buscar (etiquetas de componente del grafo)
+    if not grafo.same_component(ext["node_a"], ext["node_b"]):
+        return _resultado_islas(ext)
+
+    dist_red, path_red = grafo.get_path_length(
+        ext["node_a"],
+        ext["node_b"],
+        strategy=estrategia or ESTRATEGIA,
+        max_length=ext["limite"],
+    )
+
+    if dist_red is None:
+        return _resultado_islas(ext)
+    if dist_red == math.inf:
+        return _resultado_excede(ext)
+
+    return _armar_resultado(ext, dist_red, path_red)
+
+
+def calcular_rutas_lote(
+    extremos: List[Tuple[Point2D, Point2D]],
+    grafo: Any,
+    lista_bloques: Union[List[Dict[str, Any]], IndiceEquipos],
+    reconstruir_camino: bool = True,
+    estrategia: Optional[str] = None,
+    progreso: Optional[Callable[[int, int], None]] = None,
+) -> List[Tuple[Optional[float], List[Point2D], Union[Dict[str, Any], str]]]:
+    """
+    Versión por lotes de calcular_ruta_completa.
+
+    Agrupa los tramos por nodo de red de origen y ejecuta una sola búsqueda
+    (árbol de caminos mínimos) por origen, hasta asentar todos sus destinos.
+    Es equivalente a llamar calcular_ruta_completa tramo por tramo.
+
+    Args:
+        extremos (List[(Point2D, Point2D)]): Inicio y fin de cada tramo.
+        grafo (NetworkGraph): Instancia del grafo de red vial.
+        lista_bloques (List[Dict] | IndiceEquipos): Inventario de equipos disponibles.
+        reconstruir_camino (bool): Si es False solo se calcula la distancia y el
+            camino visual queda vacío (sin etiquetas ni ruta debug no hace falta).
+        estrategia (Optional[str]): Búsqueda para orígenes con un único destino
+            (constants.Busqueda). Si es None se usa la del config.
+        progreso (Optional[Callable]): Se llama con (tramos resueltos, total)
+            después de cada búsqueda de origen (ej. barra de progreso).
+
+    Returns:
+        List: Un resultado (distancia, camino_visual, metadata) por tramo, en orden.
+    """
+    resultados: List[Any] = [None] * len(extremos)
+    por_origen: Dict[Any, List[Tuple[int, Dict[str, Any]]]] = {}
+
+    for i, (p_inicio, p_fin) in enumerate(extremos):
+        ext = _conectar_extremos(p_inicio, p_fin, grafo, lista_bloques)
+        if isinstance(ext, str):
+            resultados[i] = (None, [], ext)
+        elif not grafo.same_component(ext["node_a"], ext["node_b"]):
+            resultados[i] = _resultado_islas(ext)
+        else:
+            por_origen.setdefault(ext["node_a"], []).append((i, ext))
+
+    resueltos = len(extremos) - sum(len(p) for p in por_origen.values())
+    for node_a, pendientes in por_origen.items():
+        destinos = {ext["node_b"] for _, ext in pendientes}
+        limites = [ext["limite"] for _, ext in pendientes]
+        # La búsqueda compartida se acota por la mayor cota de sus tramos
+        limite = None if None in limites else max(limites)
+
+        if len(destinos) == 1 or (estrategia or ESTRATEGIA) == Busqueda.CONTRACCION:
+            # Un solo destino (o jerarquía preparada): consultas punto a punto
+            rutas = {}
+            for node_b in destinos:
+                dist_red, path_red = grafo.get_path_length(
+                    node_a, node_b, strategy=estrategia or ESTRATEGIA, max_length=limite
+                )
+                if dist_red is not None:
+                    rutas[node_b] = (dist_red, path_red)
+        else:
+            rutas = grafo.get_path_lengths_from(
+                node_a, destinos, reconstruir_camino, max_length=limite
+            )
+
+        for i, ext in pendientes:
+            if ext["node_b"] not in rutas:
+                resultados[i] = _resultado_islas(ext)
+                continue
+            dist_red, path_red = rutas[ext["node_b"]]
+            if ext["limite"] is not None and dist_red > ext["limite"]:
+                resultados[i] = _resultado_excede(ext)
+                continue
+            resultados[i] = _armar_resultado(ext, dist_red, path_red)
+
+        resueltos += len(pendientes)
+        if progreso is not None:
+            progreso(resueltos, len(extremos))
+
+    logger.debug(
+        f"Rutas por lote: {len(extremos)} tramo(s), {len(por_origen)} búsqueda(s) de origen."
+    )
+    return resultados
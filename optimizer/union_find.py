@@ -0,0 +1,75 @@
+"""
+Módulo de Conjuntos Disjuntos (Union-Find).
+Etiqueta componentes conexas de forma incremental, en tiempo casi constante
+por operación (unión por tamaño + compresión de caminos).
+"""
+
+from typing import Dict, Hashable, Iterator, List
+
+
+class UnionFind:
+    """
+    Estructura Union-Find sobre claves arbitrarias (hashables).
+
+    Cada conjunto se identifica con un entero estable: el orden de inserción
+    de su representante.
+    """
+
+    def __init__(self):
+        self._padre: Dict[Hashable, Hashable] = {}
+        self._tamano: Dict[Hashable, int] = {}
+        self._orden: Dict[Hashable, int] = {}
+        self.num_conjuntos = 0
+
+    def __contains__(self, x: Hashable) -> bool:
+        return x in self._padre
+
+    def __len__(self) -> int:
+        return len(self._padre)
+
+    def agregar(self, x: Hashable) -> None:
+        """Crea el conjunto {x} si x no existía."""
+        if x in self._padre:
+            return
+        self._padre[x] = x
+        self._tamano[x] = 1
+        self._orden[x] = len(self._orden)
+        self.num_conjuntos += 1
+
+    def buscar(self, x: Hashable) -> Hashable:
+        """Representante del conjunto de x (con compresión por mitades)."""
+        padre = self._padre
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a: Hashable, b: Hashable) -> bool:
+        """Une los conjuntos de a y b. Retorna False si ya estaban unidos."""
+        ra, rb = self.buscar(a), self.buscar(b)
+        if ra == rb:
+            return False
+        # El conjunto menor cuelga del mayor; a igual tamaño, gana el más antiguo
+        if (self._tamano[ra], -self._orden[ra]) < (self._tamano[rb], -self._orden[rb]):
+            ra, rb = rb, ra
+        self._padre[rb] = ra
+        self._tamano[ra] += self._tamano.pop(rb)
+        self.num_conjuntos -= 1
+        return True
+
+    def conectados(self, a: Hashable, b: Hashable) -> bool:
+        return self.buscar(a) == self.buscar(b)
+
+    def id_conjunto(self, x: Hashable) -> int:
+        """Identificador entero del conjunto de x."""
+        return self._orden[self.buscar(x)]
+
+    def tamano(self, x: Hashable) -> int:
+        return self._tamano[self.buscar(x)]
+
+    def raices(self) -> Iterator[Hashable]:
+        return iter(self._tamano)
+
+    def tamanos(self) -> List[int]:
+        """Tamaño de cada conjunto, de mayor a menor."""
+        return sorted(self._tamano.values(), reverse=True)
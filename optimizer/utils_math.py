@@ -1,5 +1,5 @@
 import math
-from typing import Tuple
+from typing import List, Tuple
 
 Point2D = Tuple[float, float]
 
@@ -53,3 +53,52 @@ def obtener_vectores_offset(p1: Point2D, p2: Point2D, distancia: float) -> Point
     off_y = (delta_x / longitud) * distancia * inv
 
     return (off_x, off_y)
+
+
+def proyectar_en_segmento(
+    p: Point2D, a: Point2D, b: Point2D
+) -> Tuple[float, float]:
+    """
+    Distancia de p al segmento ab y parámetro t (0..1) del punto más cercano
+    (a + t * (b - a)).
+    """
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    largo2 = dx * dx + dy * dy
+    if largo2 == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1]), 0.0
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / largo2
+    t = max(0.0, min(1.0, t))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy)), t
+
+
+def desplazar_polilinea(puntos: List[Point2D], distancia: float) -> List[Point2D]:
+    """
+    Polilínea paralela a 'distancia' (positiva = a la izquierda del sentido
+    de avance). Las esquinas se unen en inglete y las muy agudas se biselan
+    para que el vértice desplazado no se dispare lejos de la ruta.
+    """
+    pts = [p for i, p in enumerate(puntos) if i == 0 or p != puntos[i - 1]]
+    if len(pts) < 2:
+        return list(pts)
+
+    normales = []
+    for a, b in zip(pts, pts[1:]):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        largo = math.hypot(dx, dy)
+        normales.append((-dy / largo, dx / largo))
+
+    nx, ny = normales[0]
+    res = [(pts[0][0] + nx * distancia, pts[0][1] + ny * distancia)]
+    for i in range(1, len(pts) - 1):
+        (ax, ay), (bx, by) = normales[i - 1], normales[i]
+        p = pts[i]
+        coseno = 1.0 + ax * bx + ay * by  # 1 + cos(giro)
+        if coseno < 0.5:  # Giro de más de 120°: bisel
+            res.append((p[0] + ax * distancia, p[1] + ay * distancia))
+            res.append((p[0] + bx * distancia, p[1] + by * distancia))
+        else:
+            f = distancia / coseno
+            res.append((p[0] + (ax + bx) * f, p[1] + (ay + by) * f))
+    nx, ny = normales[-1]
+    res.append((pts[-1][0] + nx * distancia, pts[-1][1] + ny * distancia))
+    return res
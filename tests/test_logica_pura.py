@@ -1,6 +1,237 @@
+import os
+import random
+import tempfile
+import threading
+import time
 import unittest
 from optimizer.cable_rules import seleccionar_cable
 from optimizer.acad_geometry import NetworkGraph, distancia_euclidiana
+from optimizer.constants import Busqueda, SysLayers
+from optimizer.contraction import ContractionHierarchy
+from optimizer.graph_csr import CompactGraph
+from optimizer.noding import nodar_segmentos, tamano_celda
+from optimizer.clustering import agrupar_vertices
+from optimizer.cache_grafo import cargar_grafo, guardar_grafo, huella_red
+from optimizer.serializacion import podar_archivos
+from optimizer.acad_cache import capturar_en_cache, invalidar_cache
+from optimizer.acad_capas import RegistroCapas, registro_capas
+from optimizer.acad_cola_dibujo import ColaDibujo
+from optimizer.acad_drawer import dibujar_circulo_error, dibujar_debug_offset
+from optimizer.acad_labeler import insertar_etiqueta_tramo
+from optimizer.acad_interface import BackendCAD, get_acad_com, usar_backend
+from optimizer.acad_memoria import AplicacionMemoria, BackendMemoria, coincide_comodin
+from optimizer.acad_instrumentacion import MedidorCOM, desenvolver, instrumentar
+from optimizer.acad_query import armar_filtro
+from optimizer.acad_sesion import VARIABLES_SILENCIADAS, sesion_edicion
+from optimizer.acad_snapshot import capturar_modelo
+from optimizer.escritor_dxf import CapasDXF, ColaDXF
+from optimizer.lector_dxf import leer_dxf
+from optimizer.tools import herramienta_visualizar_extremos
+from optimizer.topology import (
+    IndiceEquipos,
+    acceso_red,
+    encontrar_bloque_cercano,
+    calcular_ruta_completa,
+    calcular_rutas_lote,
+)
+
+
+class EntidadFalsa:
+    """Entidad COM simulada: cuenta cada propiedad leída."""
+
+    def __init__(self, lecturas, **props):
+        self._lecturas = lecturas
+        self._props = props
+
+    def __getattr__(self, nombre):
+        if nombre not in self._props:
+            raise AttributeError(nombre)
+        self._lecturas[0] += 1
+        return self._props[nombre]
+
+
+class ConjuntoFalso:
+    """SelectionSet simulado: aplica los filtros DXF de tipo, capa y nombre."""
+
+    def __init__(self, msp):
+        self._msp = msp
+        self._sel = []
+        msp.conjuntos_abiertos += 1
+
+    def Select(self, modo, p1, p2, tipos, datos):
+        # VARIANT de win32com o tupla (sin win32com)
+        codigos = getattr(tipos, "value", tipos)
+        valores = getattr(datos, "value", datos)
+        filtro = dict(zip(codigos, valores))
+        dxf = set(filtro[0].split(","))
+        capa = filtro.get(8, "").replace("`", "").upper()
+        nombres = set(filtro.get(2, "").replace("`", "").split(","))
+        self._sel = [
+            e
+            for e in self._msp.entidades
+            if e._props.get("Dxf") in dxf
+            and (not capa or e._props.get("Layer", "").upper() == capa)
+            and (
+                2 not in filtro
+                or e._props.get("Name") in nombres
+                or e._props.get("Name", "").startswith("*U")
+            )
+        ]
+
+    @property
+    def Count(self):
+        return len(self._sel)
+
+    def Item(self, i):
+        self._msp.marshalados += 1
+        return self._sel[i]
+
+    def Delete(self):
+        self._msp.conjuntos_abiertos -= 1
+
+
+class ModelSpaceFalso:
+    """ModelSpace simulado que cuenta los objetos entregados (marshalados)."""
+
+    def __init__(self, lecturas, entidades, con_filtros=False):
+        for e in entidades:
+            e._lecturas = lecturas
+        self.entidades = entidades
+        self.marshalados = 0
+        self.conjuntos_abiertos = 0
+        self._con_filtros = con_filtros
+
+    @property
+    def Count(self):
+        return len(self.entidades)
+
+    def Item(self, i):
+        self.marshalados += 1
+        return self.entidades[i]
+
+    @property
+    def Document(self):
+        if not self._con_filtros:
+            raise AttributeError("Document")
+        msp = self
+
+        class Conjuntos:
+            def Item(self, nombre):
+                raise KeyError(nombre)
+
+            def Add(self, nombre):
+                return ConjuntoFalso(msp)
+
+        class Documento:
+            SelectionSets = Conjuntos()
+
+        return Documento()
+
+
+class DibujoFalso:
+    """ModelSpace + Document simulados que registran cada llamada COM."""
+
+    def __init__(self, con_documento=True):
+        self.llamadas = []
+        self.creados = []
+        self.capa_actual = "0"
+        self.color_actual = "BYLAYER"
+        self._con_documento = con_documento
+        dibujo = self
+
+        class Entidad:
+            def __init__(self, tipo):
+                object.__setattr__(self, "props", {"tipo": tipo})
+
+            def __setattr__(self, nombre, valor):
+                dibujo.llamadas.append(nombre)
+                self.props[nombre] = valor
+
+        def crear(tipo):
+            def add(*args):
+                dibujo.llamadas.append(tipo)
+                ent = Entidad(tipo)
+                ent.props.update(Layer=dibujo.capa_actual, Color=dibujo.color_actual)
+                dibujo.creados.append(ent)
+                return ent
+
+            return add
+
+        self.AddLine = crear("AddLine")
+        self.AddCircle = crear("AddCircle")
+        self.AddText = crear("AddText")
+        self.AddLightWeightPolyline = crear("AddLightWeightPolyline")
+        self._entidad = Entidad
+
+    @property
+    def Document(self):
+        if not self._con_documento:
+            raise AttributeError("Document")
+        dibujo = self
+
+        class Capas:
+            def Item(self, nombre):
+                dibujo.llamadas.append("Layers.Item")
+                return nombre
+
+        class Documento:
+            Layers = Capas()
+
+            @property
+            def ActiveLayer(self):
+                return dibujo.capa_actual
+
+            @ActiveLayer.setter
+            def ActiveLayer(self, capa):
+                dibujo.llamadas.append("ActiveLayer")
+                dibujo.capa_actual = capa
+
+            def GetVariable(self, nombre):
+                return dibujo.color_actual
+
+            def SetVariable(self, nombre, valor):
+                dibujo.llamadas.append("SetVariable")
+                dibujo.color_actual = valor
+
+            def HandleToObject(self, handle):
+                dibujo.llamadas.append("HandleToObject")
+                ent = dibujo._entidad(handle)
+                dibujo.creados.append(ent)
+                return ent
+
+        return Documento()
+
+
+def _entidades_de_prueba():
+    def e(**props):
+        return EntidadFalsa([0], **props)
+
+    bloque = dict(
+        ObjectName="AcDbBlockReference",
+        Dxf="INSERT",
+        Layer="EQ",
+        InsertionPoint=(2.0, 2.0, 0.0),
+        HasAttributes=False,
+        IsDynamicBlock=False,
+    )
+    return [
+        e(ObjectName="AcDbLine", Dxf="LINE", Layer="red", Handle="L1",
+          StartPoint=(0.0, 0.0, 0.0), EndPoint=(5.0, 0.0, 0.0)),
+        e(ObjectName="AcDbLine", Dxf="LINE", Layer="OTRA", Handle="L2",
+          StartPoint=(0.0, 0.0, 0.0), EndPoint=(1.0, 0.0, 0.0)),
+        e(ObjectName="AcDbPolyline", Dxf="LWPOLYLINE", Layer="TRAMO", Handle="T1",
+          Coordinates=(0.0, 0.0, 3.0, 4.0)),
+        e(ObjectName="AcDbPolyline", Dxf="LWPOLYLINE", Layer="TRAMO", Handle="T2",
+          Coordinates=(1.0, 1.0)),
+        e(Handle="B1", Name="HBOX", EffectiveName="HBOX", **bloque),
+        e(Handle="B2", Name="OTRO", EffectiveName="OTRO", **bloque),
+        e(Handle="B3", Name="*U12", EffectiveName="HBOX", **bloque),
+        e(ObjectName="AcDbMText", Dxf="MTEXT", Layer="HUB", Handle="X1",
+          InsertionPoint=(2.5, 2.0, 0.0), TextString=" HUB-01 "),
+        e(ObjectName="AcDbText", Dxf="TEXT", Layer="OTRA", Handle="X2",
+          InsertionPoint=(9.0, 9.0, 0.0), TextString="X"),
+        e(ObjectName="AcDbCircle", Dxf="CIRCLE", Layer="0"),
+    ]
 
 
 class TestLogicaSinCad(unittest.TestCase):
@@ -18,13 +249,1130 @@ class TestLogicaSinCad(unittest.TestCase):
 
         # Debe encontrar camino de (0,0) a (10,10) -> distancia 20
         # Ojo: necesitamos encontrar los IDs de nodo primero o usar coordenadas exactas
-        # Como NetworkGraph usa coordenadas redondeadas como keys:
+        # NetworkGraph identifica nodos con ids enteros:
         node_a = g.find_nearest_node((0, 0))[0]
         node_b = g.find_nearest_node((10, 10))[0]
 
         dist, path = g.get_path_length(node_a, node_b)
         self.assertAlmostEqual(dist, 20.0)
 
+    def test_grafo_compilado_csr(self):
+        """El grafo compilado conserva nodos, aristas y rutas."""
+        g = NetworkGraph(tolerance=0.1)
+        g.add_line((0, 0), (10, 0))
+        g.add_line((10, 0), (10, 10))
+        g.add_line((0, 0), (0, 30))
+
+        csr = g.compilar()
+        self.assertEqual(csr.num_nodos, 4)
+        # (0,0) y (10,0) son de grado 2: queda una sola arista de 50 m
+        self.assertEqual(csr.num_nodos_nucleo, 2)
+        self.assertEqual(csr.num_aristas, 1)
+        self.assertIs(g.compilar(), csr)  # Memorizado
+
+        dist, path = g.get_path_length(
+            g.find_nearest_node((0, 30))[0], g.find_nearest_node((10, 10))[0]
+        )
+        self.assertAlmostEqual(dist, 50.0)
+        self.assertEqual(path, [(0, 30), (0, 0), (10, 0), (10, 10)])
+
+        g.add_line((10, 10), (20, 10))
+        self.assertIsNot(g.compilar(), csr)  # Invalidado por add_line
+
+    def test_estrategias_busqueda(self):
+        """A* y bidireccional dan la misma distancia que Dijkstra."""
+        rnd = random.Random(11)
+        g = NetworkGraph(tolerance=0.1)
+        for i in range(15):
+            for j in range(15):
+                p = (i * 30 + rnd.uniform(-4, 4), j * 30 + rnd.uniform(-4, 4))
+                if i < 14 and rnd.random() < 0.85:
+                    g.add_line(p, ((i + 1) * 30, j * 30))
+                if j < 14 and rnd.random() < 0.85:
+                    g.add_line(p, (i * 30, (j + 1) * 30))
+
+        claves = list(g.nodes)
+        for _ in range(40):
+            a, b = rnd.choice(claves), rnd.choice(claves)
+            ref, _ = g.get_path_length(a, b)
+            asentados_ref = g.ultima_busqueda["nodos_asentados"]
+            for estrategia in (
+                Busqueda.ASTAR,
+                Busqueda.BIDIRECCIONAL,
+                Busqueda.BIDIRECCIONAL_ASTAR,
+            ):
+                dist, path = g.get_path_length(a, b, strategy=estrategia)
+                self.assertEqual(dist, ref, estrategia)
+                if ref is not None:
+                    self.assertEqual(path[0], g.nodes[a])
+                    self.assertEqual(path[-1], g.nodes[b])
+            if ref is not None:
+                g.get_path_length(a, b, strategy=Busqueda.ASTAR)
+                self.assertLessEqual(
+                    g.ultima_busqueda["nodos_asentados"], asentados_ref
+                )
+
+    def test_limite_igual_a_distancia_de_cadena(self):
+        """Un límite igual a la distancia exacta no descarta la cadena colapsada."""
+        rnd = random.Random(0)
+        g = NetworkGraph(tolerance=0.1)
+        pts = [(i * 10 + rnd.uniform(-3, 3), rnd.uniform(-3, 3)) for i in range(8)]
+        g.add_lines(list(zip(pts, pts[1:])), nodar=False)
+        plano = CompactGraph.desde_adyacencia(g.nodes, g.adj, simplificar=False)
+        a, b = g.find_nearest_node(pts[7])[0], g.find_nearest_node(pts[0])[0]
+        exacta, _, _ = plano.ruta(a, b)
+
+        for estrategia in (Busqueda.DIJKSTRA, Busqueda.BIDIRECCIONAL_ASTAR):
+            dist, path = g.get_path_length(a, b, estrategia, max_length=exacta)
+            self.assertAlmostEqual(dist, exacta, places=9)
+            self.assertEqual(len(path), len(pts))
+        rutas, _ = g.compilar().arbol_caminos(a, [b], exacta)
+        self.assertAlmostEqual(rutas[b][0], exacta, places=9)
+
+    def test_ruta_sin_camino_y_fuera_de_cota(self):
+        """Sin camino da (None, []); un camino más largo que la cota, (inf, [])."""
+        g = NetworkGraph(tolerance=0.1)
+        g.add_lines([((0, 0), (10, 0)), ((10, 0), (20, 0)), ((20, 0), (20, 10))])
+        g.add_line((100, 0), (110, 0))  # Isla
+        a = g.find_nearest_node((0, 0))[0]
+        b = g.find_nearest_node((20, 10))[0]
+        isla = g.find_nearest_node((110, 0))[0]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            g.preparar_jerarquia(ruta_cache=os.path.join(tmp, "red.ch"))
+            for estrategia in (
+                Busqueda.DIJKSTRA,
+                Busqueda.ASTAR,
+                Busqueda.BIDIRECCIONAL_ASTAR,
+                Busqueda.CONTRACCION,
+            ):
+                self.assertEqual(g.get_path_length(a, isla, estrategia), (None, []))
+                self.assertEqual(
+                    g.get_path_length(a, isla, estrategia, max_length=5.0), (None, [])
+                )
+                self.assertEqual(g.get_path_length(a, -1, estrategia), (None, []))
+
+                dist, path = g.get_path_length(a, b, estrategia, max_length=25.0)
+                self.assertEqual((dist, path), (float("inf"), []), estrategia)
+                self.assertTrue(g.ultima_busqueda["excede_limite"])
+                dist, path = g.get_path_length(a, b, estrategia, max_length=30.0)
+                self.assertAlmostEqual(dist, 30.0)
+                self.assertFalse(g.ultima_busqueda["excede_limite"])
+
+            rutas = g.get_path_lengths_from(a, [b, isla], max_length=25.0)
+            self.assertEqual(rutas, {b: (float("inf"), [])})
+
+    def test_simplificacion_cadenas(self):
+        """Colapsar cadenas y aristas paralelas no cambia distancias ni trazados."""
+        rnd = random.Random(5)
+        g = NetworkGraph(tolerance=0.1)
+        for i in range(8):
+            for j in range(8):
+                # Calles partidas en 3 tramos (cadenas de grado 2)
+                for a, b in (((i, j), (i + 1, j)), ((i, j), (i, j + 1))):
+                    if max(b) > 7 or rnd.random() < 0.2:
+                        continue
+                    p = (a[0] * 40, a[1] * 40)
+                    q = (b[0] * 40, b[1] * 40)
+                    m1 = (p[0] + (q[0] - p[0]) / 3, p[1] + (q[1] - p[1]) / 3 + 2)
+                    m2 = (p[0] + 2 * (q[0] - p[0]) / 3, p[1] + 2 * (q[1] - p[1]) / 3)
+                    g.add_lines([(p, m1), (m1, m2), (m2, q)], nodar=False)
+                    if rnd.random() < 0.2:
+                        g.add_line(p, q)  # Paralela recta (más corta)
+        g.add_lines([((500, 0), (510, 0)), ((510, 0), (510, 10)), ((510, 10), (500, 0))])
+
+        csr = g.compilar()
+        plano = CompactGraph.desde_adyacencia(g.nodes, g.adj, simplificar=False)
+        self.assertLess(csr.num_nodos_nucleo, csr.num_nodos / 2)
+
+        claves = list(g.nodes)
+        anillo = g.find_nearest_node((510, 10))[0]
+        pares = [(rnd.choice(claves), rnd.choice(claves)) for _ in range(60)]
+        pares += [(anillo, g.find_nearest_node((510, 0))[0])]
+        for a, b in pares:
+            ref, camino_ref, _ = plano.ruta(a, b)
+            for estrategia in (Busqueda.DIJKSTRA, Busqueda.ASTAR, Busqueda.BIDIRECCIONAL_ASTAR):
+                dist, camino, _ = csr.ruta(a, b, estrategia)
+                if ref is None:
+                    self.assertIsNone(dist)
+                    continue
+                self.assertAlmostEqual(dist, ref, places=6)
+                self.assertEqual((camino[0], camino[-1]), (a, b))
+                # Camino continuo por aristas originales y de la misma longitud
+                largo = sum(
+                    min(w for v, w in g.adj[x] if v == y) for x, y in zip(camino, camino[1:])
+                )
+                self.assertAlmostEqual(largo, dist, places=6)
+
+        # El árbol de un origen a muchos destinos coincide con las consultas sueltas
+        origen = claves[0]
+        rutas, _ = csr.arbol_caminos(origen, claves[:40])
+        for t, (dist, camino) in rutas.items():
+            ref, _, _ = csr.ruta(origen, t)
+            self.assertAlmostEqual(dist, ref, places=6)
+            self.assertEqual((camino[0], camino[-1]), (origen, t))
+
+    def test_jerarquia_contraccion(self):
+        """La jerarquía de contracción da las mismas distancias y se puede guardar."""
+        rnd = random.Random(19)
+        g = NetworkGraph(tolerance=0.1)
+        for i in range(12):
+            for j in range(12):
+                if i < 11 and rnd.random() < 0.8:
+                    g.add_line((i * 25, j * 25), ((i + 1) * 25, j * 25))
+                if j < 11 and rnd.random() < 0.8:
+                    g.add_line((i * 25, j * 25), (i * 25, (j + 1) * 25))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "red.ch")
+            ch = g.preparar_jerarquia(ruta_cache=ruta)
+            self.assertTrue(os.path.exists(ruta))
+
+            claves = list(g.nodes)
+            for _ in range(60):
+                a, b = rnd.choice(claves), rnd.choice(claves)
+                ref, _ = g.get_path_length(a, b)
+                dist, path = g.get_path_length(a, b, strategy=Busqueda.CONTRACCION)
+                self.assertEqual(dist, ref)
+                if ref is not None:
+                    self.assertEqual((path[0], path[-1]), (g.nodes[a], g.nodes[b]))
+
+            cargada = ContractionHierarchy.cargar(ruta, g.compilar().huella())
+            self.assertEqual(list(cargada.medios), list(ch.medios))
+            self.assertIsNone(ContractionHierarchy.cargar(ruta, "otra-red"))
+            self.assertEqual(os.listdir(tmp), ["red.ch"])  # Sin temporales
+
+            # Un archivo truncado o dañado es un fallo de caché: se reconstruye
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            for dañado in (contenido[: len(contenido) // 2], contenido[:60], b"\0" * 8):
+                with open(ruta, "wb") as f:
+                    f.write(dañado)
+                self.assertIsNone(ContractionHierarchy.cargar(ruta, ch.huella))
+                self.assertIsNone(ContractionHierarchy.cargar(ruta))
+            g._jerarquia = None
+            g.preparar_jerarquia(ruta_cache=ruta)
+            self.assertIsNotNone(ContractionHierarchy.cargar(ruta, ch.huella))
+
+    def test_cache_grafo(self):
+        """El grafo guardado se recupera igual y la huella detecta cambios."""
+        segmentos = [
+            ("1A", (0, 0), (20, 0)),
+            ("1B", (10, -10), (10, 10)),
+            ("1C", (20, 0), (20, 30)),
+            ("1D", (50, 0), (60, 0)),
+        ]
+        huella = huella_red(segmentos, 0.1, True)
+        self.assertEqual(huella, huella_red(segmentos[::-1], 0.1, True))
+        movida = segmentos[:3] + [("1D", (50, 0), (60, 0.5))]
+        self.assertNotEqual(huella, huella_red(movida, 0.1, True))
+        self.assertNotEqual(huella, huella_red(segmentos, 0.2, True))
+
+        g = NetworkGraph(tolerance=0.1)
+        stats = g.add_lines([(p1, p2) for _, p1, p2 in segmentos])
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "red.bin")
+            guardar_grafo(g, ruta, huella, stats)
+            self.assertIsNone(cargar_grafo(ruta, huella_red(movida, 0.1, True)))
+            cargado, stats_c = cargar_grafo(ruta, huella)
+
+        self.assertEqual(stats_c, stats)
+        self.assertEqual(cargado.nodes, g.nodes)
+        self.assertEqual(cargado.adj, g.adj)
+        self.assertEqual(cargado.component_stats(), g.component_stats())
+        self.assertEqual(cargado.compilar().huella(), g.compilar().huella())
+        a = cargado.find_nearest_node((10, -10))[0]
+        b = cargado.find_nearest_node((20, 30))[0]
+        self.assertEqual(cargado.get_path_length(a, b), g.get_path_length(a, b))
+
+        # Sigue siendo editable: el extremo registrado se reutiliza
+        cargado.add_line((60.05, 0), (70, 0))
+        self.assertEqual(len(cargado.nodes), len(g.nodes) + 1)
+
+        # Cada versión de la red es otro archivo: se conservan las recientes
+        with tempfile.TemporaryDirectory() as tmp:
+            nombres = [f"grafo_{i:016x}.bin" for i in range(5)] + ["otro_1.bin"]
+            for i, nombre in enumerate(nombres):
+                ruta = os.path.join(tmp, nombre)
+                with open(ruta, "wb"):
+                    pass
+                os.utime(ruta, (1000 + i, 1000 + i))
+            actual = os.path.join(tmp, nombres[0])  # La más vieja, recién usada
+            self.assertEqual(podar_archivos(actual, 2), 3)
+            self.assertEqual(
+                sorted(os.listdir(tmp)), sorted([nombres[0], nombres[4], "otro_1.bin"])
+            )
+
+    def test_actualizacion_incremental(self):
+        """Quitar y reinsertar líneas por handle equivale a reconstruir."""
+        segmentos = [
+            ("A", (0, 0), (20, 0)),
+            ("B", (10, -10), (10, 10)),  # Cruza a "A"
+            ("C", (20, 0), (20, 30)),
+            ("D", (50, 0), (60, 0)),  # Isla
+        ]
+        g = NetworkGraph(tolerance=0.1)
+        g.sincronizar(segmentos)
+        self.assertEqual(g.component_stats()["componentes"], 2)
+
+        def como_nuevo(lineas):
+            nuevo = NetworkGraph(tolerance=0.1)
+            nuevo.sincronizar(lineas)
+            return nuevo
+
+        def pesos(grafo):
+            return sorted(round(d, 9) for v in grafo.adj.values() for _, d in v)
+
+        # Quitar el cruce: "A" vuelve a ser una sola arista y "B" queda aislada
+        stats = g.remove_lines(["B"])
+        self.assertEqual(stats["lineas_renodadas"], 1)
+        esperado = como_nuevo([s for s in segmentos if s[0] != "B"])
+        self.assertEqual(pesos(g), pesos(esperado))
+        self.assertEqual(len(g.nodes), len(esperado.nodes))
+        self.assertEqual(g.component_stats(), esperado.component_stats())
+
+        # Mover "D" hasta tocar "C" en T une las dos islas
+        editados = segmentos[:3] + [("D", (20, 15), (40, 15))]
+        stats = g.sincronizar(editados)
+        self.assertEqual(
+            (stats["lineas_agregadas"], stats["lineas_modificadas"], stats["lineas_quitadas"]),
+            (1, 1, 0),
+        )
+        esperado = como_nuevo(editados)
+        self.assertEqual(pesos(g), pesos(esperado))
+        self.assertEqual(g.component_stats(), esperado.component_stats())
+        a = g.find_nearest_node((40, 15))[0]
+        b = g.find_nearest_node((10, -10))[0]
+        self.assertAlmostEqual(g.get_path_length(a, b)[0], 20 + 15 + 10 + 10)
+
+        # Sin cambios no se toca nada; el estado sobrevive a la caché
+        self.assertEqual(g.sincronizar(editados)["lineas_renodadas"], 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "red.bin")
+            guardar_grafo(g, ruta, "x", {})
+            cargado, _ = cargar_grafo(ruta, "x")
+        stats = cargado.remove_lines(["D"])
+        self.assertEqual(cargado.component_stats()["componentes"], 1)
+        self.assertEqual(pesos(cargado), pesos(como_nuevo(editados[:3])))
+
+    def test_componentes_conexas(self):
+        """Las islas se etiquetan al construir y se rechazan sin buscar."""
+        g = NetworkGraph(tolerance=0.1)
+        g.add_line((0, 0), (10, 0))
+        g.add_line((10, 0), (20, 0))
+        g.add_line((100, 0), (110, 0))  # Isla separada
+
+        a = g.find_nearest_node((0, 0))[0]
+        b = g.find_nearest_node((20, 0))[0]
+        c = g.find_nearest_node((110, 0))[0]
+        self.assertTrue(g.same_component(a, b))
+        self.assertFalse(g.same_component(a, c))
+        self.assertEqual(g.component_id(a), g.component_id(b))
+        self.assertEqual(g.component_stats(), {"componentes": 2, "tamanos": [3, 2]})
+        self.assertEqual(g.get_path_length(a, c), (None, []))
+
+        bloques = [
+            {"name": "HBOX_3.5P", "handle": "A", "xyz": (0, 1, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "B", "xyz": (110, 1, 0)},
+        ]
+        dist, ruta, meta = calcular_ruta_completa((0, 1), (110, 1), g, bloques)
+        self.assertEqual((dist, ruta), (None, []))
+        self.assertIn("Islas", meta)
+
+        g.add_line((20, 0), (100, 0))  # Puente entre islas
+        self.assertTrue(g.same_component(a, c))
+        self.assertEqual(g.component_stats()["componentes"], 1)
+
+    def test_nodado_cruces_y_t(self):
+        """Cruces y extremos sobre otra línea quedan conectados al nodar."""
+        segmentos = [
+            ((0, 0), (20, 0)),
+            ((10, -10), (10, 10)),  # Cruza a la primera en (10, 0)
+            ((5, 8), (5, 0.05)),  # Termina (dentro de tolerancia) sobre la primera
+            ((30, 0), (40, 0)),  # Isla real
+        ]
+        piezas, stats = nodar_segmentos(segmentos, 0.1)
+        self.assertEqual(stats["cruces"], 1)
+        self.assertEqual(stats["contactos_t"], 1)
+        self.assertEqual(len(piezas), 4 + 3)
+
+        sin_nodar = NetworkGraph(tolerance=0.1)
+        sin_nodar.add_lines(segmentos, nodar=False)
+        self.assertEqual(sin_nodar.component_stats()["componentes"], 4)
+
+        g = NetworkGraph(tolerance=0.1)
+        g.add_lines(segmentos)
+        self.assertEqual(g.component_stats()["componentes"], 2)
+        a = g.find_nearest_node((5, 8))[0]
+        b = g.find_nearest_node((10, 10))[0]
+        dist, _ = g.get_path_length(a, b)
+        self.assertAlmostEqual(dist, 8 + 5 + 10, delta=0.1)
+
+    def test_nodado_diagonal_y_borde_de_celda(self):
+        """Una diagonal y un contacto en T del otro lado de un borde de celda."""
+        segmentos = [
+            ((1, 9.95), (9, 9.95)),  # Fila de celdas 0 (celda de 10 m)
+            ((5, 10.02), (5, 18.02)),  # Su extremo cae en la fila 1, sobre la anterior
+            ((0, 0), (12, 16)),  # Diagonal: cruza a la primera
+            ((12, 2), (12, 6)),  # Isla
+        ]
+        self.assertEqual(tamano_celda(segmentos, 0.1), 10.0)
+        piezas, stats = nodar_segmentos(segmentos, 0.1)
+        self.assertEqual((stats["cruces"], stats["contactos_t"]), (1, 1))
+        self.assertEqual(len(piezas), 4 + 3)
+
+        g = NetworkGraph(tolerance=0.1)
+        g.add_lines(segmentos)
+        self.assertEqual(g.component_stats()["componentes"], 2)
+
+    def test_agrupamiento_vertices(self):
+        """Extremos cercanos se fusionan aunque crucen un borde de celda."""
+        # 0.049 y 0.051 redondeaban a celdas distintas con tolerancia 0.1
+        ids, fusiones = agrupar_vertices([(0.049, 0), (0.051, 0), (0.049, 0)], 0.1)
+        self.assertEqual((ids, fusiones), ([0, 0, 0], 1))
+
+        # Fusión transitiva: A y C a 0.15, unidos por B
+        ids, fusiones = agrupar_vertices([(0, 0), (0.15, 0), (0.075, 0), (5, 5)], 0.1)
+        self.assertEqual((ids, fusiones), ([0, 0, 0, 1], 2))
+
+        g = NetworkGraph(tolerance=0.1)
+        stats = g.add_lines(
+            [((0, 0), (10.049, 0)), ((10.051, 0), (20, 0)), ((20.0, 0.0), (20, 10))],
+            nodar=False,
+        )
+        self.assertEqual(stats["fusiones_cercanas"], 1)
+        self.assertEqual(sorted(g.nodes), [0, 1, 2, 3])
+        self.assertEqual(g.component_stats()["componentes"], 1)
+
+    def test_indice_espacial_igual_a_lineal(self):
+        """El índice espacial debe dar el mismo resultado que un recorrido lineal."""
+        g = NetworkGraph(tolerance=0.1)
+        rnd = random.Random(7)
+        for _ in range(300):
+            p1 = (rnd.uniform(0, 500), rnd.uniform(0, 500))
+            p2 = (p1[0] + rnd.uniform(-30, 30), p1[1] + rnd.uniform(-30, 30))
+            g.add_line(p1, p2)
+
+        for _ in range(200):
+            q = (rnd.uniform(-20, 520), rnd.uniform(-20, 520))
+            cercanos = sorted(
+                (distancia_euclidiana(q, c), k) for k, c in g.nodes.items()
+            )
+            esperado = next(
+                ((k, d) for d, k in cercanos if d <= 20.0), (None, None)
+            )
+            self.assertEqual(g.find_nearest_node(q, max_radius=20.0), esperado)
+
+            k_vecinos = g.find_k_nearest_nodes(q, 5)
+            self.assertEqual([d for _, d in k_vecinos], [d for d, _ in cercanos[:5]])
+
+    def test_indice_equipos(self):
+        """El índice de equipos replica la búsqueda lineal y filtra por grupo."""
+        rnd = random.Random(3)
+        nombres = ["HBOX_3.5P", "FAT_INT_3.0_P", "X_BOX_P"]
+        bloques = [
+            {
+                "name": rnd.choice(nombres),
+                "handle": f"H{i}",
+                "xyz": (rnd.uniform(0, 200), rnd.uniform(0, 200), 0.0),
+            }
+            for i in range(400)
+        ]
+        indice = IndiceEquipos(bloques)
+
+        for _ in range(100):
+            q = (rnd.uniform(0, 200), rnd.uniform(0, 200))
+            self.assertEqual(
+                encontrar_bloque_cercano(q, indice, 5.0),
+                encontrar_bloque_cercano(q, bloques, 5.0),
+            )
+            hbox, _ = indice.cercano(q, 30.0, grupos=["hbox"])
+            if hbox:
+                self.assertEqual(hbox["name"], "HBOX_3.5P")
+
+        # El acceso memorizado se recalcula si el grafo cambia en el lugar
+        g = NetworkGraph(tolerance=0.1)
+        g.sincronizar([("L1", (0, 10), (50, 10))])
+        bloque = bloques[0]
+        punto = (bloque["xyz"][0], bloque["xyz"][1])
+        radio = 500.0
+        _, dist = indice.nodo_red(bloque, g, radio)
+        self.assertAlmostEqual(dist, acceso_red(g, punto, radio)[1])
+        x, y = punto
+        g.sincronizar([("L1", (x - 5, y + 1), (x + 5, y + 1))])  # Misma línea, movida
+        _, dist = indice.nodo_red(bloque, g, radio)
+        self.assertAlmostEqual(dist, 1.0)
+
+    def test_instantanea_modelo(self):
+        """Una sola pasada clasifica entidades y lee cada una una única vez."""
+        lecturas = [0]
+        msp = ModelSpaceFalso(lecturas, _entidades_de_prueba())
+        modelo = capturar_modelo(
+            msp,
+            capa_red="RED",
+            capa_tramos="tramo",
+            nombres_bloques=["HBOX"],
+            textos=True,
+            capa_textos="HUB",
+            filtrar=False,
+        )
+
+        self.assertEqual(msp.marshalados, len(msp.entidades))
+        self.assertEqual(modelo.entidades, len(msp.entidades))
+        self.assertEqual(modelo.lineas, [("L1", (0.0, 0.0), (5.0, 0.0))])
+        self.assertEqual([t.handle for t in modelo.tramos], ["T1", "T2"])
+        self.assertEqual(modelo.tramos[0].extremos, ((0.0, 0.0), (3.0, 4.0)))
+        self.assertIsNone(modelo.tramos[1].extremos)
+        self.assertEqual([b["handle"] for b in modelo.bloques], ["B1", "B3"])
+        self.assertEqual(modelo.bloques[0]["attributes"], {})
+        self.assertEqual(modelo.textos[0].texto.strip(), "HUB-01")
+
+        # Sin capas ni bloques pedidos solo se consulta el tipo de cada entidad
+        lecturas[0] = 0
+        vacio = capturar_modelo(
+            ModelSpaceFalso(lecturas, _entidades_de_prueba()), filtrar=False
+        )
+        self.assertEqual(lecturas[0], len(msp.entidades))
+        self.assertFalse(vacio.lineas or vacio.tramos or vacio.bloques or vacio.textos)
+
+    def test_conjuntos_seleccion(self):
+        """Los filtros traen solo lo relevante y sin soporte se recorre todo."""
+        argumentos = dict(
+            capa_red="RED",
+            capa_tramos="tramo",
+            nombres_bloques=["HBOX"],
+            textos=True,
+            capa_textos="HUB",
+        )
+        completo = capturar_modelo(
+            ModelSpaceFalso([0], _entidades_de_prueba()), filtrar=False, **argumentos
+        )
+
+        msp = ModelSpaceFalso([0], _entidades_de_prueba(), con_filtros=True)
+        filtrado = capturar_modelo(msp, filtrar=True, **argumentos)
+        self.assertEqual(filtrado[:4], completo[:4])
+        # L1, T1, T2, B1, el anónimo B3 y X1: ni L2, B2, X2 ni el círculo
+        self.assertEqual(msp.marshalados, 6)
+        self.assertEqual(msp.conjuntos_abiertos, 0)
+
+        sin_filtros = ModelSpaceFalso([0], _entidades_de_prueba())
+        respaldo = capturar_modelo(sin_filtros, filtrar=True, **argumentos)
+        self.assertEqual(respaldo[:4], completo[:4])
+        self.assertEqual(sin_filtros.marshalados, len(sin_filtros.entidades))
+
+        self.assertEqual(
+            armar_filtro(("AcDbBlockReference",), "A.B", ["X_BOX-P"]),
+            [(0, "INSERT"), (410, "Model"), (8, "A`.B"), (2, "X_BOX`-P,`*U*")],
+        )
+
+    def test_cola_dibujo(self):
+        """La cola no toca COM hasta vaciarse y agrupa por capa y color."""
+        msp = DibujoFalso()
+        cola = ColaDibujo(msp)
+        for i in range(3):
+            dibujar_circulo_error(cola, (i, 0.0))
+            insertar_etiqueta_tramo(cola, [(0.0, 0.0), (10.0, 0.0)], f"T{i}")
+        dibujar_debug_offset(cola, [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)])
+        cola.modificar("A1", Layer="CABLE", ConstantWidth=0.5)
+        self.assertEqual(msp.llamadas, [])
+        self.assertEqual(len(cola), 8)
+
+        self.assertEqual(cola.vaciar(), 8)
+        self.assertEqual(len(cola), 0)
+        # Capa/color heredados: nunca se asignan por entidad
+        self.assertNotIn("Color", msp.llamadas)
+        # Una activación por grupo (3) y la restauración final
+        self.assertEqual(msp.llamadas.count("ActiveLayer"), 4)
+        circulos = [e for e in msp.creados if e.props["tipo"] == "AddCircle"]
+        self.assertTrue(all(e.props["Layer"] == "ERRORES_TOPOLOGIA" for e in circulos))
+        self.assertTrue(all(e.props["Color"] == "1" for e in circulos))
+        self.assertEqual((msp.capa_actual, msp.color_actual), ("0", "BYLAYER"))
+        modificado = msp.creados[-1].props
+        self.assertEqual(modificado["Layer"], "CABLE")
+        self.assertEqual(modificado["ConstantWidth"], 0.5)
+
+        # Sin documento se asignan capa y color a cada entidad
+        msp = DibujoFalso(con_documento=False)
+        with ColaDibujo(msp) as cola:
+            dibujar_circulo_error(cola, (0.0, 0.0))
+        self.assertEqual(msp.llamadas, ["AddCircle", "Layer", "Color"])
+
+    def test_registro_capas(self):
+        """La tabla de capas se lee una vez y las faltantes se crean en lote."""
+
+        class Capa:
+            def __init__(self, nombre):
+                self.Name = nombre
+                self.Color = 7
+
+        class Capas:
+            def __init__(self, nombres):
+                self.lista = [Capa(n) for n in nombres]
+                self.llamadas = 0
+
+            @property
+            def Count(self):
+                self.llamadas += 1
+                return len(self.lista)
+
+            def Item(self, i):
+                self.llamadas += 1
+                return self.lista[i]
+
+            def Add(self, nombre):
+                self.llamadas += 1
+                self.lista.append(Capa(nombre))
+                return self.lista[-1]
+
+        class Documento:
+            def __init__(self, nombres):
+                self.Layers = Capas(nombres)
+
+        doc = Documento(["0", "Texto_Tramos"])
+        capas = registro_capas(doc)
+        lectura = doc.Layers.llamadas
+        for _ in range(1000):
+            self.assertIn("TEXTO_TRAMOS", capas)
+            capas.solicitar("CABLE 2H SM (100M)")
+            capas.solicitar("CABLE 2H SM (150M)", color_id=3)
+        self.assertEqual(doc.Layers.llamadas, lectura)
+
+        self.assertEqual(capas.crear_pendientes(), 2)
+        self.assertEqual(doc.Layers.llamadas, lectura + 2)
+        self.assertEqual(doc.Layers.lista[-1].Color, 3)
+        self.assertEqual(capas.garantizar("cable 2h sm (100m)"), "cable 2h sm (100m)")
+        self.assertEqual(capas.crear_pendientes(), 0)
+        self.assertIs(registro_capas(doc), capas)
+
+        otro = Documento(["0"])
+        self.assertIsNot(registro_capas(otro), capas)
+        self.assertNotIn("TEXTO_TRAMOS", registro_capas(otro))
+
+        # Una capa purgada entre dos herramientas se vuelve a crear
+        app = AplicacionMemoria()
+        capas_memoria = app.ActiveDocument.Layers
+        anterior = usar_backend(BackendMemoria(app))
+        try:
+            herramienta_visualizar_extremos()
+            self.assertIn(SysLayers.TEMPORAL_EXTREMOS.upper(), capas_memoria._capas)
+            del capas_memoria._capas[SysLayers.TEMPORAL_EXTREMOS.upper()]
+            herramienta_visualizar_extremos()
+            self.assertIn(SysLayers.TEMPORAL_EXTREMOS.upper(), capas_memoria._capas)
+        finally:
+            usar_backend(anterior)
+
+    def test_sesion_edicion(self):
+        """La sesión silencia variables, agrupa el deshacer y restaura todo."""
+
+        class Documento:
+            def __init__(self):
+                self.variables = {n: 1 for n in VARIABLES_SILENCIADAS}
+                self.variables["CMDECHO"] = 5
+                self.eventos = []
+
+            def GetVariable(self, nombre):
+                return self.variables[nombre]
+
+            def SetVariable(self, nombre, valor):
+                self.eventos.append(nombre)
+                self.variables[nombre] = valor
+
+            def StartUndoMark(self):
+                self.eventos.append("inicio")
+
+            def EndUndoMark(self):
+                self.eventos.append("fin")
+
+            def Regen(self, ventanas):
+                self.eventos.append("regen")
+
+        doc = Documento()
+        originales = dict(doc.variables)
+        with self.assertRaises(RuntimeError):
+            with sesion_edicion(doc):
+                self.assertTrue(all(v == 0 for v in doc.variables.values()))
+                with sesion_edicion(doc):  # Anidada: no hace nada
+                    pass
+                raise RuntimeError("fallo a mitad de la corrida")
+
+        self.assertEqual(doc.variables, originales)
+        self.assertEqual(doc.eventos.count("inicio"), 1)
+        self.assertEqual(doc.eventos[-2:], ["fin", "regen"])
+        self.assertEqual(doc.eventos.count("regen"), 1)
+
+        # Tras salir se puede abrir otra sesión sobre el mismo documento
+        with sesion_edicion(doc):
+            pass
+        self.assertEqual(doc.eventos.count("inicio"), 2)
+
+    def test_instrumentacion_com(self):
+        """El proxy cuenta llamadas por miembro y etapa, y envuelve lo que devuelve."""
+
+        class ObjCOM:
+            _oleobj_ = object()
+
+            def __init__(self, **props):
+                self.__dict__.update(props)
+
+        capa = ObjCOM(Name="0")
+        entidad = ObjCOM(Layer="TRAMO", ObjectName="AcDbLine")
+        msp = ObjCOM(Count=1, Item=lambda i: entidad)
+        recibidos = []
+        doc = ObjCOM(ModelSpace=msp, ActiveLayer=capa)
+        doc.SetVariable = lambda nombre, valor: recibidos.append(valor)
+        app = ObjCOM(ActiveDocument=doc)
+
+        medidor = MedidorCOM()
+        acad = instrumentar(app, medidor=medidor)
+        with medidor.etapa("lectura_dibujo"):
+            m = acad.ActiveDocument.ModelSpace
+            for i in range(m.Count):
+                obj = m.Item(i)
+                self.assertEqual(obj.Layer, "TRAMO")
+                obj.Layer = "OTRA"
+        with medidor.etapa("procesamiento_tramos"):
+            d = acad.ActiveDocument
+            d.ActiveLayer = d.ActiveLayer
+            d.SetVariable("CECOLOR", d.ActiveLayer)
+
+        self.assertEqual(entidad.Layer, "OTRA")
+        self.assertIs(doc.ActiveLayer, capa)  # Se asigna el objeto real
+        self.assertIs(recibidos[0], capa)
+        self.assertEqual(d, doc)
+        self.assertIs(desenvolver(d), doc)
+
+        resumen = medidor.resumen()
+        lectura = resumen["etapas"]["lectura_dibujo"]["miembros"]
+        self.assertEqual(lectura["ModelSpace.Item()"]["llamadas"], 1)
+        self.assertEqual(lectura["Item.Layer"]["llamadas"], 1)
+        self.assertEqual(lectura["Item.Layer="]["llamadas"], 1)
+        self.assertEqual(sum(lectura["ModelSpace.Count"]["histograma"]), 1)
+        tramos = resumen["etapas"]["procesamiento_tramos"]
+        capa_activa = tramos["miembros"]["ActiveDocument.ActiveLayer"]
+        self.assertEqual(capa_activa["llamadas"], 2)
+        self.assertEqual(tramos["llamadas"], 5)
+
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = medidor.reportar(os.path.join(carpeta, "com.json"))
+            self.assertTrue(os.path.exists(ruta))
+
+    def test_backend_memoria(self):
+        """El dibujo en memoria responde al pipeline como AutoCAD, contando viajes."""
+        app = AplicacionMemoria()
+        doc = app.ActiveDocument
+        msp = doc.ModelSpace
+        msp.linea((0, 0), (10, 0), "RED")
+        msp.linea((0, 0), (0, 10), "OTRA")
+        msp.polilinea([(0, 0), (5, 5), (10, 0)], "tramo")
+        msp.insertar_bloque("FAT_INT_3.0_P", (1, 1), "EQ", {"ID_NAME": "F1"}, {"V": 1})
+        msp.insertar_bloque("X_BOX_P", (2, 2), "EQ")
+        msp.texto("HUB 1", (3, 3), "HUBS")
+
+        kwargs = dict(
+            capa_red="RED",
+            capa_tramos="TRAMO",
+            nombres_bloques=["FAT_INT_3.0_P"],
+            textos=True,
+            capa_textos="HUBS",
+        )
+        completo = capturar_modelo(msp, filtrar=False, **kwargs)
+        app.reiniciar_contador()
+        filtrado = capturar_modelo(msp, filtrar=True, **kwargs)
+        self.assertGreater(app.llamadas, 0)
+        self.assertEqual(completo[:4], filtrado[:4])
+        self.assertEqual(filtrado.entidades, 4)  # Solo lo que pasó el filtro
+        bloque = filtrado.bloques[0]
+        self.assertEqual(bloque["attributes"], {"ID_NAME": "F1"})
+        self.assertEqual(bloque["dynamic_props"], {"V": 1})
+        self.assertEqual(doc.SelectionSets.Count, 0)  # Conjuntos borrados
+
+        # Un backend incompleto falla al crearlo, no a mitad de una corrida
+        with self.assertRaises(TypeError):
+            type("BackendIncompleto", (BackendCAD,), {})()
+
+        self.assertTrue(coincide_comodin("*U12", "`*U*"))
+        self.assertTrue(coincide_comodin("fat_int_3.0_p", "FAT_INT_3`.0_P,X"))
+        self.assertFalse(coincide_comodin("FAT_INT_350P", "FAT_INT_3`.0_P"))
+        self.assertTrue(coincide_comodin("CAPA7", "CAPA#,~*"))
+        self.assertFalse(coincide_comodin("ABC", "~A*"))
+
+        # Capas y cola: las entidades nuevas heredan capa y color actuales
+        capas = RegistroCapas(doc)
+        capas.solicitar("RESULTADO", color_id=3)
+        self.assertEqual(capas.crear_pendientes(), 1)
+        handle_tramo = filtrado.tramos[0].handle
+        with sesion_edicion(doc), ColaDibujo(msp) as cola:
+            cola.circulo((1, 1), 2.0, "RESULTADO", 1)
+            cola.modificar(handle_tramo, Layer="RESULTADO")
+            self.assertEqual(doc.GetVariable("REGENMODE"), 0)
+        circulo = msp.Item(msp.Count - 1)
+        self.assertEqual((circulo.Layer, circulo.Color), ("RESULTADO", 1))
+        self.assertEqual(doc.HandleToObject(handle_tramo).Layer, "RESULTADO")
+        self.assertEqual(doc.ActiveLayer.Name, "0")
+        self.assertEqual(doc.GetVariable("CECOLOR"), "BYLAYER")
+        self.assertEqual(doc.GetVariable("REGENMODE"), 1)
+
+        # Latencia simulada por viaje
+        app.latencia_ms = 2.0
+        t0 = time.perf_counter()
+        for _ in range(5):
+            msp.Count
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.01)
+
+        anterior = usar_backend(BackendMemoria(app))
+        try:
+            self.assertIs(get_acad_com(), app)
+        finally:
+            usar_backend(anterior)
+
+    def test_lector_dxf(self):
+        """El DXF produce los mismos registros que el escaneo COM."""
+
+        # Pares "código valor" separados por " | " (una entidad por línea)
+        plano = """
+        0 SECTION | 2 HEADER | 9 $ACADVER | 1 AC1032
+        0 ENDSEC
+        0 SECTION | 2 TABLES
+        0 TABLE | 2 LAYER | 5 2
+        0 LAYER | 2 RED
+        0 ENDTAB
+        0 TABLE | 2 BLOCK_RECORD | 5 1
+        0 BLOCK_RECORD | 5 A0 | 2 FAT_INT_3.0_P
+        0 BLOCK_RECORD | 5 A1 | 2 *U7 | 1001 AcDbBlockRepBTag | 1070 1 | 1005 A0
+        0 ENDTAB
+        0 ENDSEC
+        0 SECTION | 2 BLOCKS
+        0 BLOCK | 8 0 | 2 X
+        0 LINE | 8 RED | 10 9 | 20 9 | 11 8 | 21 8
+        0 ENDBLK
+        0 ENDSEC
+        0 SECTION | 2 ENTITIES
+        0 LINE | 5 10 | 8 red | 10 0.0 | 20 0.0 | 30 0.0 | 11 10.0 | 21 0.0 | 31 0.0
+        0 LINE | 5 11 | 8 0 | 62 0 | 10 1 | 20 1 | 11 2 | 21 2
+        0 LINE | 5 12 | 67 1 | 8 RED | 10 5 | 20 5 | 11 6 | 21 6
+        0 CIRCLE | 5 13 | 8 RED | 10 0 | 20 0 | 40 1
+        0 LWPOLYLINE | 5 14 | 8 TRAMO | 90 3 | 10 0 | 20 0 | 10 5 | 20 5 | 10 10 | 20 0
+        0 INSERT | 5 15 | 8 EQ | 66 1 | 2 *U7 | 10 1.0 | 20 1.0 | 30 0.0
+        0 ATTRIB | 5 16 | 8 EQ | 1 F1 | 2 ID_NAME
+        0 SEQEND | 5 17 | 8 EQ
+        0 INSERT | 5 18 | 8 EQ | 2 OTRO | 10 3 | 20 3
+        0 MTEXT | 5 19 | 8 HUBS | 10 3.0 | 20 4.0 | 3 HUB | 1 -1
+        0 ENDSEC
+        0 SECTION | 2 OBJECTS
+        0 DICTIONARY | 5 C
+        0 ENDSEC
+        0 EOF
+        """
+        pares = [
+            par.strip().split(" ", 1)
+            for linea in plano.strip().splitlines()
+            for par in linea.split(" | ")
+        ]
+        contenido = "".join(f"{c:>3}\n{v}\n" for c, v in pares)
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, "plano.dxf")
+            with open(ruta, "w", encoding="utf-8", newline="\r\n") as f:
+                f.write(contenido)
+            modelo = leer_dxf(
+                ruta,
+                capa_red="RED",
+                capa_tramos="tramo",
+                nombres_bloques=["FAT_INT_3.0_P"],
+                textos=True,
+                capa_textos="HUBS",
+            )
+
+        self.assertEqual(modelo.lineas, [("10", (0.0, 0.0), (10.0, 0.0))])
+        self.assertEqual(modelo.tramos[0].coords, (0.0, 0.0, 5.0, 5.0, 10.0, 0.0))
+        self.assertEqual(modelo.tramos[0].extremos, ((0.0, 0.0), (10.0, 0.0)))
+        self.assertEqual(
+            modelo.bloques,
+            [
+                {
+                    "name": "FAT_INT_3.0_P",
+                    "handle": "15",
+                    "layer": "EQ",
+                    "xyz": (1.0, 1.0, 0.0),
+                    "attributes": {"ID_NAME": "F1"},
+                    "dynamic_props": {},
+                }
+            ],
+        )
+        self.assertEqual(modelo.textos[0].texto, "HUB-1")
+        self.assertEqual(modelo.textos[0].punto, (3.0, 4.0))
+        self.assertEqual(modelo.entidades, 7)  # El CIRCLE ni se lee
+
+    def test_bloque_diferido(self):
+        """Atributos y propiedades dinámicas se leen por COM solo al pedirlos."""
+        app = AplicacionMemoria()
+        msp = app.ActiveDocument.ModelSpace
+        msp.insertar_bloque("FAT_INT_3.0_P", (1, 1), "EQ", {"ID_NAME": "F1"}, {"V": 1})
+        bloque = capturar_modelo(
+            msp, nombres_bloques=["FAT_INT_3.0_P"], filtrar=True
+        ).bloques[0]
+
+        app.reiniciar_contador()
+        self.assertEqual(bloque["name"], "FAT_INT_3.0_P")
+        self.assertEqual(tuple(bloque["xyz"][:2]), (1.0, 1.0))
+        self.assertIn("attributes", bloque)
+        self.assertTrue(bloque)
+        self.assertEqual(len(bloque), 6)
+        self.assertEqual(app.llamadas, 0)  # Lo que usa el ruteo ya está leído
+
+        self.assertEqual(bloque.get("attributes", {}), {"ID_NAME": "F1"})
+        self.assertGreater(app.llamadas, 0)
+        app.reiniciar_contador()
+        self.assertEqual(bloque["attributes"]["ID_NAME"], "F1")
+        self.assertEqual(app.llamadas, 0)  # Queda guardado
+        with self.assertRaises(KeyError):
+            bloque["otro"]
+
+        # Compararlo o convertirlo a dict carga el resto
+        self.assertEqual(dict(bloque)["dynamic_props"], {"V": 1})
+        self.assertEqual(bloque, dict(bloque))
+        self.assertGreater(app.llamadas, 0)
+
+        # El objeto COM vencido (otro hilo, entidad ya no válida) no se usa:
+        # el bloque se vuelve a buscar por handle en el documento del hilo
+        class ObjetoVencido:
+            def __getattr__(self, nombre):
+                raise RuntimeError("El objeto invocado se ha desconectado")
+
+        anterior = usar_backend(BackendMemoria(app))
+        try:
+            vencido = capturar_modelo(
+                msp, nombres_bloques=["FAT_INT_3.0_P"], filtrar=True
+            ).bloques[0]
+            vencido._item = ObjetoVencido()
+            self.assertEqual(vencido["attributes"], {"ID_NAME": "F1"})
+
+            otro_hilo = capturar_modelo(
+                msp, nombres_bloques=["FAT_INT_3.0_P"], filtrar=True
+            ).bloques[0]
+            otro_hilo._item = ObjetoVencido()  # Solo válido en este hilo
+            leidos = []
+            hilo = threading.Thread(
+                target=lambda: leidos.append(otro_hilo["attributes"])
+            )
+            hilo.start()
+            hilo.join()
+            self.assertEqual(leidos, [{"ID_NAME": "F1"}])
+
+            # Otro documento activo, con los mismos handles: cada bloque se
+            # busca en el documento del que salió
+            del_primero = capturar_modelo(
+                msp, nombres_bloques=["FAT_INT_3.0_P"], filtrar=True
+            ).bloques[0]
+            otro = app.abrir("Otro.dwg").ModelSpace
+            otro.insertar_bloque("FAT_INT_3.0_P", (5, 5), "EQ", {"ID_NAME": "F9"})
+            del_segundo = capturar_modelo(
+                otro, nombres_bloques=["FAT_INT_3.0_P"], filtrar=True
+            ).bloques[0]
+            self.assertEqual(del_primero["handle"], del_segundo["handle"])
+            for bloque in (del_primero, del_segundo):
+                bloque._item = ObjetoVencido()
+            leidos = []
+            hilo = threading.Thread(
+                target=lambda: leidos.extend(
+                    [del_segundo["attributes"], del_primero["attributes"]]
+                )
+            )
+            hilo.start()
+            hilo.join()
+            self.assertEqual(leidos, [{"ID_NAME": "F9"}, {"ID_NAME": "F1"}])
+        finally:
+            usar_backend(anterior)
+
+    def test_cache_entidades(self):
+        """Las herramientas reutilizan bloques y textos hasta que el dibujo cambia."""
+        app = AplicacionMemoria()
+        msp = app.ActiveDocument.ModelSpace
+        msp.linea((0, 0), (10, 0), "RED")
+        msp.insertar_bloque("FAT_INT_3.0_P", (1, 1), "EQ", {"ID_NAME": "F1"})
+        msp.insertar_bloque("HBOX_3.5P", (9, 1), "EQ")
+        msp.texto("HUB 1", (9, 2), "HUBS")
+
+        anterior = usar_backend(BackendMemoria(app))
+        try:
+            # Inventario de FAT y luego asociación de hubs: solo se lee lo nuevo
+            fats = capturar_en_cache(msp, nombres_bloques=["FAT_INT_3.0_P"])
+            self.assertEqual(fats.entidades, 1)
+            self.assertEqual(fats.bloques[0]["attributes"], {"ID_NAME": "F1"})
+            hubs = capturar_en_cache(
+                msp, nombres_bloques=["HBOX_3.5P"], textos=True, capa_textos="HUBS"
+            )
+            self.assertEqual(hubs.entidades, 2)  # El hub y su texto
+
+            app.reiniciar_contador()
+            todos = capturar_en_cache(
+                msp, nombres_bloques=["FAT_INT_3.0_P", "HBOX_3.5P"]
+            )
+            self.assertEqual(todos.entidades, 0)
+            self.assertIs(todos.bloques[0], fats.bloques[0])
+            self.assertLessEqual(app.llamadas, 1)  # Solo ModelSpace.Document
+
+            # Mover un bloque (sin cambiar Count ni handles) descarta la caché
+            hbox = app.ActiveDocument.HandleToObject(hubs.bloques[0]["handle"])
+            hbox.InsertionPoint = (50.0, 50.0, 0.0)
+            movido = capturar_en_cache(msp, nombres_bloques=["HBOX_3.5P"])
+            self.assertEqual(movido.entidades, 1)
+            self.assertEqual(tuple(movido.bloques[0]["xyz"][:2]), (50.0, 50.0))
+
+            # Borrar también
+            msp.Item(0).Delete()
+            self.assertEqual(
+                capturar_en_cache(msp, nombres_bloques=["HBOX_3.5P"]).entidades, 1
+            )
+            invalidar_cache()
+            self.assertEqual(
+                capturar_en_cache(msp, nombres_bloques=["HBOX_3.5P"]).entidades, 1
+            )
+        finally:
+            usar_backend(anterior)
+
+        # Un backend sin eventos no usa la caché: siempre se lee del dibujo
+        class BackendSinEventos(BackendCAD):
+            def aplicacion(self):
+                return app
+
+        anterior = usar_backend(BackendSinEventos())
+        try:
+            otra = AplicacionMemoria()
+            otro_msp = otra.ActiveDocument.ModelSpace
+            otro_msp.insertar_bloque("HBOX_3.5P", (9, 1), "EQ")
+            for _ in range(2):
+                leido = capturar_en_cache(otro_msp, nombres_bloques=["HBOX_3.5P"])
+                self.assertEqual(leido.entidades, 1)
+        finally:
+            usar_backend(anterior)
+
+    def test_escritor_dxf(self):
+        """La cola vuelca al DXF lo mismo que dibujaría por COM."""
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, "superposicion.dxf")
+            capas = CapasDXF()
+            capas.solicitar("ERRORES", color_id=1)
+            cola = ColaDXF(ruta, capas, {"2A": (0.0, 0.0, 5.0, 5.0, 10.0, 0.0)})
+            dibujar_circulo_error(cola, (4.0, 4.0), radio=2.0, capa="ERRORES")
+            insertar_etiqueta_tramo(cola, [(0.0, 0.0), (10.0, 0.0)], "2H SM 10m")
+            cola.modificar("2A", Layer="CABLE PRECONECT 2H", ConstantWidth=0.5)
+            cola.modificar("FF", Layer="CABLE PRECONECT 2H")  # Sin geometría
+            self.assertEqual(cola.vaciar(), 3)
+            self.assertEqual(len(cola), 0)
+            with open(ruta, "r", encoding="cp1252") as f:
+                contenido = f.read()
+            modelo = leer_dxf(ruta, textos=True)
+
+        # La tabla declara las capas pedidas y las de los cambios de capa
+        self.assertIn("  2\nERRORES\n 70\n0\n 62\n1\n", contenido)
+        self.assertIn("  2\nCABLE PRECONECT 2H\n", contenido)
+        self.assertIn("  0\nCIRCLE\n  8\nERRORES\n", contenido)
+        self.assertIn("  0\nPOLYLINE\n  8\nCABLE PRECONECT 2H\n", contenido)
+        self.assertIn(" 40\n0.5\n 41\n0.5\n", contenido)
+        self.assertEqual(contenido.count("  0\nVERTEX\n"), 3)
+        self.assertEqual(modelo.textos[0].texto, "2H SM 10m")
+        self.assertTrue(contenido.endswith("  0\nEOF\n"))
+
+    def test_acceso_por_arista(self):
+        """Un equipo junto a una calle larga entra por la perpendicular."""
+        g = NetworkGraph(tolerance=0.1)
+        g.add_lines([((0, 0), (200, 0)), ((200, 0), (200, 100)), ((0, 0), (0, 100))])
+
+        # El vértice más cercano está a 100 m; la calle, a 3 m
+        self.assertEqual(g.find_nearest_node((100, 3), max_radius=20), (None, None))
+        acceso, dist = g.find_nearest_access((100, 3), max_radius=20)
+        self.assertAlmostEqual(dist, 3.0)
+        self.assertEqual(acceso.punto, (100.0, 0.0))
+        self.assertEqual(len(g.nodes), 4)  # El grafo no cambia
+
+        # Proyección sobre un vértice: se usa el nodo real
+        nodo, _ = g.find_nearest_access((201, 50.05), max_radius=20)
+        otro, _ = g.find_nearest_access((199, 100.05), max_radius=20)
+        self.assertEqual(otro, g.find_nearest_node((200, 100))[0])
+        self.assertTrue(g.same_component(acceso, otro))
+
+        for estrategia in (Busqueda.DIJKSTRA, Busqueda.BIDIRECCIONAL_ASTAR):
+            d, camino = g.get_path_length(acceso, nodo, strategy=estrategia)
+            self.assertAlmostEqual(d, 100 + 50.05)
+            self.assertEqual(camino[0], (100.0, 0.0))
+            self.assertEqual(camino[-1], nodo.punto)
+
+        # Dos accesos sobre la misma arista: tramo directo entre ambos
+        cerca, _ = g.find_nearest_access((120, -2), max_radius=20)
+        d, camino = g.get_path_length(acceso, cerca)
+        self.assertAlmostEqual(d, 20.0)
+        self.assertEqual(camino, [(100.0, 0.0), (120.0, 0.0)])
+        rutas = g.get_path_lengths_from(acceso, [cerca, otro])
+        self.assertAlmostEqual(rutas[cerca][0], 20.0)
+        self.assertAlmostEqual(rutas[otro][0], 100 + 100)
+
+    def test_rutas_por_lote(self):
+        """El ruteo por lotes coincide con el cálculo tramo a tramo."""
+        g = NetworkGraph(tolerance=0.1)
+        for i in range(6):
+            for j in range(6):
+                if i < 5:
+                    g.add_line((i * 40, j * 40), ((i + 1) * 40, j * 40))
+                if j < 5:
+                    g.add_line((i * 40, j * 40), (i * 40, (j + 1) * 40))
+
+        bloques = [
+            {"name": "HBOX_3.5P", "handle": "A", "xyz": (2, 1, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "B", "xyz": (118, 82, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "C", "xyz": (199, 160, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "D", "xyz": (500, 500, 0)},
+        ]
+        extremos = [
+            ((2, 1), (118, 82)),
+            ((2, 1), (199, 160)),
+            ((118, 82), (199, 160)),
+            ((2, 1), (500, 500)),  # Sin acceso a la red
+        ]
+        indice = IndiceEquipos(bloques)
+
+        lote = calcular_rutas_lote(extremos, g, indice)
+        uno_a_uno = [calcular_ruta_completa(a, b, g, bloques) for a, b in extremos]
+        # En una cuadrícula hay caminos empatados: se comparan distancia y metadata
+        self.assertEqual(
+            [(d, m) for d, _, m in lote], [(d, m) for d, _, m in uno_a_uno]
+        )
+
+        solo_dist = calcular_rutas_lote(extremos, g, indice, reconstruir_camino=False)
+        self.assertEqual([r[0] for r in solo_dist], [r[0] for r in uno_a_uno])
+        self.assertEqual(solo_dist[0][1], [])
+
+        # Progreso por búsqueda de origen: el tramo sin acceso ya viene resuelto
+        avances = []
+        calcular_rutas_lote(extremos, g, indice, progreso=lambda *a: avances.append(a))
+        self.assertEqual(avances, [(3, 4), (4, 4)])
+
+    def test_cota_por_catalogo(self):
+        """Una ruta más larga que el cable mayor del catálogo se corta y se reporta."""
+        g = NetworkGraph(tolerance=0.1)
+        for i in range(30):
+            g.add_line((i * 10, 0), ((i + 1) * 10, 0))
+
+        a = g.find_nearest_node((0, 0))[0]
+        b = g.find_nearest_node((300, 0))[0]
+        self.assertEqual(g.get_path_length(a, b, max_length=200.0), (float("inf"), []))
+        self.assertTrue(g.ultima_busqueda["excede_limite"])
+        self.assertAlmostEqual(g.get_path_length(a, b, max_length=300.0)[0], 300.0)
+
+        # HBOX -> FAT_INT usa 'distribucion_std' (máximo 200m)
+        bloques = [
+            {"name": "HBOX_3.5P", "handle": "A", "xyz": (0, 1, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "B", "xyz": (300, 1, 0)},
+            {"name": "FAT_INT_3.0_P", "handle": "C", "xyz": (150, 1, 0)},
+        ]
+        extremos = [((0, 1), (300, 1)), ((0, 1), (150, 1))]
+        dist, _, meta = calcular_ruta_completa(*extremos[0], g, bloques)
+        self.assertIsNone(dist)
+        self.assertIn("Excede", meta)
+
+        lote = calcular_rutas_lote(extremos, g, IndiceEquipos(bloques))
+        self.assertEqual(lote[0], (None, [], meta))
+        self.assertAlmostEqual(lote[1][0], 150.0)
+
     def test_reglas_cable(self):
         """Verifica que el config de cables se lea y calcule bien."""
         # Caso: XBOX->HBOX (MPO 300). Distancia 250m. Debe sobrar 50m.